@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Benchmark de motores de placeholders sobre las plantillas incluidas.
+
+Compara, por documento generado (cargar + reemplazar + guardar):
+- PlaceholderEngine (proxies de python-docx)
+- XmlPlaceholderEngine (lxml directo sobre las partes XML)
+
+Uso:
+    python benchmark_motores.py
+    python benchmark_motores.py --iteraciones 50 templates/plantilla_desempeno.docx
+"""
+import sys
+sys.path.insert(0, 'src')
+
+import argparse
+import io
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from docx import Document
+from core.placeholder_engine import PlaceholderEngine
+from core.xml_engine import XmlPlaceholderEngine
+
+
+def run_docx_engine(blob: bytes, data: Dict[str, str]) -> tuple:
+    """Flujo clásico con python-docx: (reemplazos, salida, segundos de reemplazo)"""
+    doc = Document(io.BytesIO(blob))
+    start = time.perf_counter()
+    count = PlaceholderEngine(doc).replace_all(data)
+    replace_time = time.perf_counter() - start
+    output = io.BytesIO()
+    doc.save(output)
+    return count, output.getvalue(), replace_time
+
+
+def run_xml_engine(blob: bytes, data: Dict[str, str]) -> tuple:
+    """Flujo lxml directo: (reemplazos, salida, segundos de reemplazo)"""
+    engine = XmlPlaceholderEngine(blob)
+    start = time.perf_counter()
+    count = engine.replace_all(data)
+    replace_time = time.perf_counter() - start
+    return count, engine.to_bytes(), replace_time
+
+
+ENGINES: Dict[str, Callable] = {
+    'python-docx': run_docx_engine,
+    'lxml': run_xml_engine,
+}
+
+
+def document_text(blob: bytes) -> List[str]:
+    """Texto de body, tablas, headers y footers para comparar resultados"""
+    doc = Document(io.BytesIO(blob))
+    texts = [p.text for p in doc.paragraphs]
+    for table in doc.tables:
+        for row in table.rows:
+            texts.extend(cell.text for cell in row.cells)
+    for section in doc.sections:
+        texts.extend(p.text for p in section.header.paragraphs)
+        texts.extend(p.text for p in section.footer.paragraphs)
+    return texts
+
+
+def benchmark_template(template_path: Path, iterations: int) -> None:
+    """Ejecuta todos los motores sobre una plantilla e imprime resultados"""
+    blob = template_path.read_bytes()
+    placeholders = PlaceholderEngine(Document(io.BytesIO(blob))).find_all_placeholders()
+    data = {key: f"valor_{key}" for key in placeholders}
+
+    print(f"\n📄 {template_path.name}  ({len(placeholders)} placeholders, "
+          f"{len(blob) / 1024:.0f} KB, {iterations} iteraciones)")
+
+    results = {}
+    for name, runner in ENGINES.items():
+        runner(blob, data)  # Calentamiento
+
+        replace_total = 0.0
+        start = time.perf_counter()
+        for _ in range(iterations):
+            count, output, replace_time = runner(blob, data)
+            replace_total += replace_time
+        elapsed = (time.perf_counter() - start) / iterations
+
+        results[name] = (count, document_text(output))
+        print(f"   {name:<12} {elapsed * 1000:8.1f} ms/doc total   "
+              f"{replace_total / iterations * 1000:7.2f} ms reemplazo   "
+              f"{count} reemplazos")
+
+    reference_count, reference_text = results['python-docx']
+    for name, (count, text) in results.items():
+        same = count == reference_count and text == reference_text
+        icon = '✓' if same else '✗'
+        print(f"   {icon} {name}: resultado {'idéntico' if same else 'DIFERENTE'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de motores de placeholders')
+    parser.add_argument(
+        'plantillas',
+        nargs='*',
+        help='Plantillas .docx (default: templates/*.docx)'
+    )
+    parser.add_argument(
+        '-n', '--iteraciones',
+        type=int,
+        default=20,
+        help='Documentos generados por motor (default: 20)'
+    )
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    templates = [Path(p) for p in args.plantillas] or sorted(Path('templates').glob('*.docx'))
+    if not templates:
+        print("❌ No se encontraron plantillas")
+        sys.exit(1)
+
+    print('=' * 60)
+    print('BENCHMARK DE MOTORES DE PLACEHOLDERS')
+    print('=' * 60)
+
+    for template_path in templates:
+        benchmark_template(template_path, args.iteraciones)
+
+
+if __name__ == '__main__':
+    main()
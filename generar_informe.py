@@ -7,6 +7,7 @@ Soporta listas dinámicas y tablas con filas variables.
 Uso:
     python generar_informe.py --plantilla templates/plantilla_desempeno.docx --datos datos.json --output output.docx
     python generar_informe.py --plantilla templates/plantilla_diseno.docx --datos ejemplo_datos.json --imagenes test_images/ --output informe_final.docx
+    python generar_informe.py --plantilla templates/plantilla_desempeno.docx --jsonl registros.jsonl --output "informes/{documento}.docx"
 """
 import sys
 sys.path.insert(0, 'src')
@@ -15,15 +16,17 @@ import argparse
 import json
 import re
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from string import Formatter
+from typing import Dict, List, Any, Iterator, Optional, Set, TextIO, Tuple
 from copy import deepcopy
 from docx import Document
 from docx.text.paragraph import Paragraph
-from docx.table import Table
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
-from core.placeholder_engine import PlaceholderEngine
+from core.placeholder_engine import PlaceholderEngine, paragraph_text, replace_in_paragraph
 from core.image_replacer import ImageReplacer
+from core.compiled_template import get_compiled_template
+from core.package_writer import save_document
 import logging
 
 # Configurar logging
@@ -48,6 +51,28 @@ def load_json_data(json_path: str) -> dict:
         return json.load(f)
 
 
+def iter_jsonl_records(stream: TextIO) -> Iterator[Tuple[int, dict]]:
+    """
+    Lee registros JSONL/NDJSON línea a línea, sin cargar el archivo completo.
+    
+    Args:
+        stream: Archivo de texto o sys.stdin con un objeto JSON por línea
+        
+    Yields:
+        Tuplas (número de línea, registro); las líneas vacías se ignoran y las
+        líneas con JSON inválido producen registro None
+    """
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.error(f"Línea {line_number}: JSON inválido ({e})")
+            yield line_number, None
+
+
 def find_images_in_folder(folder_path: str) -> dict:
     """
     Busca imágenes en una carpeta y las mapea para reemplazo.
@@ -87,6 +112,8 @@ class DynamicContentProcessor:
     PLACEHOLDER_PATTERN = r'\{\{([a-zA-Z0-9_]+)\}\}'
     LIST_PLACEHOLDER_PATTERN = r'\{\{(lista_[a-zA-Z0-9_]+)\}\}'
     TABLE_ROW_PATTERN = r'\{\{(fila_[a-zA-Z0-9_]+)\}\}'
+    # {{key}} or {{key.field}} inside a table row
+    ROW_FIELD_PATTERN = re.compile(r'\{\{([a-zA-Z0-9_]+)(?:\.[^{}]+)?\}\}')
     
     def __init__(self, document: Document):
         self.document = document
@@ -96,6 +123,10 @@ class DynamicContentProcessor:
         """
         Expand list placeholders into bullet lists.
         
+        Paragraphs are located with a single placeholder scan; the items of
+        each list are clones of the emptied paragraph chained after it, so
+        expansion is linear in the number of paragraphs and items.
+        
         Args:
             data: Dict where list values are arrays of strings
             
@@ -103,153 +134,132 @@ class DynamicContentProcessor:
             Number of lists expanded
         """
         count = 0
-        paragraphs_to_process = []
-        
-        # Find paragraphs with list placeholders
-        for idx, para in enumerate(self.document.paragraphs):
-            for key, value in data.items():
-                if isinstance(value, list) and f"{{{{{key}}}}}" in para.text:
-                    paragraphs_to_process.append((idx, para, key, value))
-        
-        # Process in reverse to maintain indices
-        for idx, para, key, items in reversed(paragraphs_to_process):
-            if not items:
-                para.text = para.text.replace(f"{{{{{key}}}}}", "")
+        
+        # Placeholder index: paragraphs referencing list keys, in document order
+        list_paragraphs = []
+        for para in self.document.paragraphs:
+            text = para.text
+            if '{{' not in text:
                 continue
-            
-            # Get original formatting
-            original_style = para.style
-            original_format = self._get_paragraph_format(para)
-            
-            # Replace placeholder with first item
-            first_item = str(items[0])
-            para.clear()
-            run = para.add_run(f"• {first_item}")
-            
-            # Add remaining items as new paragraphs
-            parent = para._element.getparent()
-            para_index = list(parent).index(para._element)
-            
-            for item in items[1:]:
-                new_para = self._create_bullet_paragraph(str(item), original_style)
-                parent.insert(para_index + 1, new_para._element)
-                para_index += 1
-            
-            count += 1
-            logger.info(f"Expanded list '{key}' with {len(items)} items")
+            keys = [
+                key for key in dict.fromkeys(self.pattern.findall(text))
+                if isinstance(data.get(key), list)
+            ]
+            if keys:
+                list_paragraphs.append((para, keys))
+        
+        for para, keys in list_paragraphs:
+            for key in keys:
+                items = data[key]
+                if not items:
+                    para.text = para.text.replace(f"{{{{{key}}}}}", "")
+                    continue
+                
+                self._expand_list_paragraph(para, items)
+                count += 1
+                logger.info(f"Expanded list '{key}' with {len(items)} items")
+                # The paragraph now holds the first item
+                break
         
         return count
     
+    def _expand_list_paragraph(self, para: Paragraph, items: List[Any]):
+        """Replace a paragraph with one bullet paragraph per item, keeping its properties."""
+        para.clear()
+        blank_p = deepcopy(para._p)
+        para.add_run(f"• {items[0]}")
+        
+        anchor = para._p
+        for item in items[1:]:
+            new_p = deepcopy(blank_p)
+            Paragraph(new_p, para._parent).add_run(f"• {item}")
+            anchor.addnext(new_p)
+            anchor = new_p
+    
     def expand_dynamic_tables(self, data: Dict[str, Any]) -> int:
         """
         Expand table rows from array data.
         
+        A row is a template for `key` when it references `{{key}}` or
+        `{{key.field}}`. Every template row of every table is expanded, so a
+        table can hold several row groups fed by different arrays.
+        
         Args:
             data: Dict where table values are arrays of dicts
             
         Returns:
             Number of tables expanded
         """
-        count = 0
+        table_keys = {
+            key for key, value in data.items()
+            if isinstance(value, list) and value and isinstance(value[0], dict)
+        }
+        if not table_keys:
+            return 0
         
-        for table in self.document.tables:
-            # Check if table has row template placeholder
-            template_row_idx = None
-            template_row_data = None
-            placeholder_key = None
-            
-            for row_idx, row in enumerate(table.rows):
-                row_text = ''.join(cell.text for cell in row.cells)
-                
-                # Look for array placeholders in row
-                for key, value in data.items():
-                    if isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict):
-                        # Check if any cell references this array's fields
-                        for cell in row.cells:
-                            if f"{{{{{key}}}}}" in cell.text or any(
-                                f"{{{{{key}.{field}}}}}" in cell.text
-                                for field in value[0].keys()
-                            ):
-                                template_row_idx = row_idx
-                                template_row_data = value
-                                placeholder_key = key
-                                break
-                
-                if template_row_idx is not None:
-                    break
-            
-            if template_row_idx is not None and template_row_data:
-                self._expand_table_rows(table, template_row_idx, template_row_data, placeholder_key)
-                count += 1
+        row_index = self._index_template_rows(table_keys)
+        tables = {tr.getparent() for tr, _ in row_index}
+        for template_tr, key in row_index:
+            self._expand_table_rows(template_tr, data[key], key)
         
-        return count
+        return len(tables)
     
-    def _expand_table_rows(self, table: Table, template_row_idx: int,
-                           rows_data: List[Dict], key: str):
-        """Expand a table with multiple rows from data."""
+    def _index_template_rows(self, table_keys: Set[str]) -> List[Tuple[Any, str]]:
+        """
+        Index template rows in a single pass over the document tables.
+        
+        Returns:
+            List of (w:tr element, array key); the first matching key of a
+            row wins
+        """
+        row_index = []
+        for table in self.document.tables:
+            for tr in table._tbl.tr_lst:
+                row_text = ''.join(tr.xpath('.//w:t/text()'))
+                if '{{' not in row_text:
+                    continue
+                for match in self.ROW_FIELD_PATTERN.finditer(row_text):
+                    if match.group(1) in table_keys:
+                        row_index.append((tr, match.group(1)))
+                        break
+        return row_index
+    
+    def _expand_table_rows(self, template_tr, rows_data: List[Dict], key: str):
+        """
+        Expand a table with multiple rows from data.
+        
+        Each record gets a copy of the template row where `{{key.field}}` and
+        `{{field}}` are replaced inside the existing runs, so run formatting
+        and every paragraph of the cells are kept. All rows are spliced into
+        the table in one operation, so the cost is linear in the number of
+        records.
+        """
         if not rows_data:
             return
         
-        template_row = table.rows[template_row_idx]
+        field_pattern = re.compile(r'\{\{(?:' + re.escape(key) + r'\.)?([^{}]+)\}\}')
         
-        # Get cell formats from template
-        cell_formats = []
-        for cell in template_row.cells:
-            cell_formats.append({
-                'text': cell.text,
-                'width': cell.width if hasattr(cell, 'width') else None
-            })
+        # Only paragraphs with placeholders are revisited in each copy
+        template_paragraphs = list(template_tr.iter(qn('w:p')))
+        placeholder_idx = [
+            idx for idx, p in enumerate(template_paragraphs)
+            if '{{' in paragraph_text(p)
+        ]
         
-        # Clear template row and fill with first data item
-        self._fill_row_with_data(template_row, cell_formats, rows_data[0], key)
+        new_rows = []
+        for row_data in rows_data:
+            values = {field: str(value) for field, value in row_data.items()}
+            new_tr = deepcopy(template_tr)
+            paragraphs = list(new_tr.iter(qn('w:p')))
+            for idx in placeholder_idx:
+                replace_in_paragraph(paragraphs[idx], field_pattern, values)
+            new_rows.append(new_tr)
         
-        # Add additional rows
-        for row_data in rows_data[1:]:
-            new_row = self._add_table_row(table, template_row_idx + 1)
-            self._fill_row_with_data(new_row, cell_formats, row_data, key)
+        parent = template_tr.getparent()
+        position = parent.index(template_tr)
+        parent[position:position + 1] = new_rows
         
         logger.info(f"Expanded table with {len(rows_data)} rows for '{key}'")
-    
-    def _fill_row_with_data(self, row, cell_formats: List[Dict],
-                            row_data: Dict, key: str):
-        """Fill a table row with data."""
-        for idx, cell in enumerate(row.cells):
-            if idx < len(cell_formats):
-                template_text = cell_formats[idx]['text']
-                new_text = template_text
-                
-                # Replace field placeholders
-                for field, value in row_data.items():
-                    new_text = new_text.replace(f"{{{{{key}.{field}}}}}", str(value))
-                    new_text = new_text.replace(f"{{{{{field}}}}}", str(value))
-                
-                # Clear and set new text
-                for para in cell.paragraphs:
-                    para.clear()
-                    para.add_run(new_text)
-                    break
-    
-    def _add_table_row(self, table: Table, position: int):
-        """Add a new row to table at position."""
-        tbl = table._tbl
-        tr = tbl.tr_lst[position - 1] if position > 0 else tbl.tr_lst[0]
-        new_tr = deepcopy(tr)
-        tbl.insert(position, new_tr)
-        return table.rows[position]
-    
-    def _get_paragraph_format(self, para: Paragraph) -> Dict:
-        """Extract paragraph formatting."""
-        return {
-            'style': para.style,
-            'alignment': para.alignment
-        }
-    
-    def _create_bullet_paragraph(self, text: str, style) -> Paragraph:
-        """Create a new bullet paragraph."""
-        new_para = self.document.add_paragraph(f"• {text}")
-        if style:
-            new_para.style = style
-        return new_para
 
 
 def generate_report(
@@ -257,7 +267,8 @@ def generate_report(
     output_path: str,
     text_data: dict = None,
     image_folder: str = None,
-    image_replacements: dict = None
+    image_replacements: dict = None,
+    image_max_dpi: int = None
 ) -> bool:
     """
     Genera un informe a partir de una plantilla.
@@ -269,6 +280,8 @@ def generate_report(
                    Soporta arrays para listas dinámicas y tablas
         image_folder: Carpeta con imágenes para reemplazo automático
         image_replacements: Dict explícito con reemplazos de imagen
+        image_max_dpi: Reduce las imágenes nuevas a esta resolución según su
+                       tamaño en el documento (requiere Pillow)
         
     Returns:
         True si se generó correctamente
@@ -278,8 +291,31 @@ def generate_report(
         logger.error(f"Plantilla no encontrada: {template_path}")
         return False
     
-    logger.info(f"Cargando plantilla: {template_path}")
-    doc = Document(template_path)
+    img_replacements = dict(image_replacements or {})
+    if image_folder:
+        img_replacements.update(find_images_in_folder(image_folder))
+    
+    # La plantilla se compila una sola vez por proceso
+    compiled = get_compiled_template(template_path)
+    
+    # Ruta rápida: solo placeholders escalares, sin contenido dinámico ni imágenes
+    has_arrays = bool(text_data) and any(
+        isinstance(value, list) for value in text_data.values()
+    )
+    if not has_arrays and not img_replacements:
+        scalar_data = text_data or {}
+        validation = compiled.validate_data(scalar_data)
+        if validation['missing']:
+            logger.warning(f"Placeholders sin datos: {validation['missing']}")
+        
+        count = compiled.render(scalar_data, output_path)
+        logger.info(f"Reemplazos de texto realizados: {count}")
+        logger.info(f"Documento generado: {output_path}")
+        return True
+    
+    # Clon de la plantilla ya analizada: no se vuelve a descomprimir el paquete
+    logger.info(f"Clonando plantilla: {template_path}")
+    doc = compiled.new_document()
     
     # Process dynamic content first (lists and tables)
     if text_data:
@@ -318,15 +354,9 @@ def generate_report(
             logger.info(f"Reemplazos de texto realizados: {count}")
     
     # Reemplazar imágenes
-    img_replacements = image_replacements or {}
-    
-    if image_folder:
-        folder_images = find_images_in_folder(image_folder)
-        img_replacements.update(folder_images)
-    
     if img_replacements:
         logger.info(f"Reemplazando {len(img_replacements)} imágenes...")
-        replacer = ImageReplacer(doc)
+        replacer = ImageReplacer(doc, max_dpi=image_max_dpi)
         
         # Mostrar resumen de imágenes en plantilla
         summary = replacer.get_summary()
@@ -345,17 +375,90 @@ def generate_report(
             for key, result in results.items():
                 if not result:
                     logger.warning(f"  - Falló: {key}")
+        
+        # Una misma imagen en varias ubicaciones se guarda una sola vez
+        replacer.deduplicate_media()
     
     # Guardar documento
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    doc.save(output_path)
+    # Las partes sin cambios (imágenes, estilos...) se copian sin recomprimir
+    save_document(doc, compiled.package, output_path)
     logger.info(f"Documento generado: {output_path}")
     
     return True
 
 
+def generate_reports_from_stream(
+    template_path: str,
+    records: Iterator[Tuple[int, dict]],
+    output_pattern: str,
+    image_folder: str = None,
+    image_max_dpi: int = None
+) -> Tuple[int, int]:
+    """
+    Genera un informe por registro de un flujo JSONL.
+    
+    La plantilla se compila una sola vez y los registros se procesan de uno
+    en uno, por lo que la memoria no crece con el número de registros. Los
+    registros con listas o imágenes parten de un clon del Document ya
+    analizado, sin volver a descomprimir la plantilla.
+    
+    Args:
+        template_path: Ruta a la plantilla .docx
+        records: Iterador de (número de línea, registro), ver iter_jsonl_records
+        output_pattern: Ruta de salida con campos del registro,
+                        ej: "informes/{documento}.docx" ({n} = número de registro,
+                        tiene prioridad sobre un campo 'n' del registro). Sin
+                        ningún campo se agrega "_{n}" antes de la extensión para
+                        que cada informe tenga su propio archivo
+        image_folder: Carpeta con imágenes, aplicada a todos los informes
+        image_max_dpi: Resolución máxima de las imágenes (ver generate_report)
+        
+    Returns:
+        Tupla (informes generados, registros fallidos)
+    """
+    if not any(field for _, field, _, _ in Formatter().parse(output_pattern)):
+        pattern_path = Path(output_pattern)
+        output_pattern = str(pattern_path.with_name(
+            f"{pattern_path.stem}_{{n}}{pattern_path.suffix}"
+        ))
+        logger.warning(f"La ruta de salida no tiene campos; se usará {output_pattern}")
+    
+    image_replacements = find_images_in_folder(image_folder) if image_folder else None
+    generated = 0
+    failed = 0
+    
+    for line_number, record in records:
+        if not isinstance(record, dict):
+            if record is not None:
+                logger.error(f"Línea {line_number}: se esperaba un objeto JSON")
+            failed += 1
+            continue
+        
+        try:
+            fields = {**record, 'n': generated + failed + 1}
+            output_path = output_pattern.format(**fields)
+            ok = generate_report(
+                template_path=template_path,
+                output_path=output_path,
+                text_data=record,
+                image_replacements=image_replacements,
+                image_max_dpi=image_max_dpi
+            )
+        except Exception as e:
+            logger.error(f"Línea {line_number}: {e}")
+            ok = False
+        
+        if ok:
+            generated += 1
+        else:
+            failed += 1
+    
+    return generated, failed
+
+
 def main():
     """Función principal con argumentos de línea de comandos."""
     parser = argparse.ArgumentParser(
@@ -365,6 +468,7 @@ def main():
 Ejemplos:
   python generar_informe.py --plantilla templates/plantilla_desempeno.docx --datos ejemplo_datos.json --output informe.docx
   python generar_informe.py -p templates/plantilla_diseno.docx -d datos.json -i test_images/ -o output/informe_final.docx
+  cat registros.jsonl | python generar_informe.py -p templates/plantilla_desempeno.docx --jsonl - -o "informes/{documento}.docx"
         """
     )
     
@@ -379,15 +483,29 @@ Ejemplos:
         help='Archivo JSON con datos para reemplazar placeholders'
     )
     
+    parser.add_argument(
+        '--jsonl',
+        help='Archivo JSONL/NDJSON con un registro por línea (\'-\' para stdin); '
+             'genera un informe por registro'
+    )
+    
     parser.add_argument(
         '-i', '--imagenes',
         help='Carpeta con imágenes para reemplazo'
     )
     
+    parser.add_argument(
+        '--dpi-imagenes',
+        type=int,
+        help='Reducir imágenes a esta resolución según su tamaño en el documento '
+             '(ej: 150; requiere Pillow)'
+    )
+    
     parser.add_argument(
         '-o', '--output',
         required=True,
-        help='Ruta para guardar el documento generado'
+        help='Ruta para guardar el documento generado. Con --jsonl admite campos '
+             'del registro, ej: "informes/{documento}.docx"'
     )
     
     parser.add_argument(
@@ -412,6 +530,32 @@ Ejemplos:
         show_template_info(args.plantilla)
         return
     
+    # Modo flujo: un informe por registro JSONL con una sola carga de plantilla
+    if args.jsonl:
+        if not args.verbose:
+            logging.getLogger().setLevel(logging.WARNING)
+        
+        if args.jsonl == '-':
+            generated, failed = generate_reports_from_stream(
+                args.plantilla, iter_jsonl_records(sys.stdin), args.output,
+                args.imagenes, args.dpi_imagenes
+            )
+        else:
+            if not Path(args.jsonl).exists():
+                logger.error(f"Archivo de datos no encontrado: {args.jsonl}")
+                sys.exit(1)
+            with open(args.jsonl, 'r', encoding='utf-8') as f:
+                generated, failed = generate_reports_from_stream(
+                    args.plantilla, iter_jsonl_records(f), args.output,
+                    args.imagenes, args.dpi_imagenes
+                )
+        
+        print(f"\n✅ Informes generados: {generated}")
+        if failed:
+            print(f"❌ Registros fallidos: {failed}")
+            sys.exit(1)
+        return
+    
     # Cargar datos de texto
     text_data = None
     if args.datos:
@@ -426,7 +570,8 @@ Ejemplos:
         template_path=args.plantilla,
         output_path=args.output,
         text_data=text_data,
-        image_folder=args.imagenes
+        image_folder=args.imagenes,
+        image_max_dpi=args.dpi_imagenes
     )
     
     if success:
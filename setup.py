@@ -56,13 +56,19 @@ setup(
         "click>=8.0.0",
         "tqdm>=4.60.0",
         "python-dateutil>=2.8.0",
+        "PyYAML>=6.0",
     ],
     extras_require={
+        # Reducción de imágenes al tamaño mostrado (--dpi-imagenes, max_dpi)
+        "images": [
+            "Pillow>=10.0.0",
+        ],
         "dev": [
             "pytest>=7.0.0",
             "pytest-cov>=4.0.0",
             "black>=23.0.0",
             "flake8>=6.0.0",
+            "Pillow>=10.0.0",
         ],
     },
     entry_points={
@@ -0,0 +1,118 @@
+"""
+Executor acotado para sacar el trabajo CPU-bound del event loop
+Limita las tareas en curso + en cola y rechaza con 503 cuando se satura
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Sequence
+import logging
+
+from utils.exceptions import ProcessingTimeoutError, ServerBusyError
+
+logger = logging.getLogger(__name__)
+
+
+class BoundedExecutor:
+    """
+    ThreadPoolExecutor con capacidad máxima y timeout por tarea.
+
+    La capacidad es max_workers + max_queue_size: cuando todas las plazas
+    están ocupadas, run() falla de inmediato con ServerBusyError en lugar de
+    encolar sin límite, de modo que la latencia de cola queda acotada.
+    Una plaza se libera cuando la tarea termina realmente (aunque el
+    cliente ya haya recibido un timeout).
+    """
+
+    def __init__(self, max_workers: int, max_queue_size: int, timeout_seconds: float):
+        """
+        Args:
+            max_workers: Threads del pool
+            max_queue_size: Tareas que pueden esperar un thread libre
+            timeout_seconds: Espera máxima del resultado de una tarea
+        """
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue_size
+        self.timeout_seconds = timeout_seconds
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="docx-worker"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Tareas en ejecución o en cola"""
+        return self._in_flight
+
+    def _reserve(self, count: int) -> None:
+        with self._lock:
+            if self._in_flight + count > self.capacity:
+                self.rejected += 1
+                raise ServerBusyError(self._in_flight, self.capacity)
+            self._in_flight += count
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _submit(self, fn: Callable, *args, **kwargs) -> asyncio.Future:
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._release)
+        return asyncio.wrap_future(future)
+
+    async def _await(self, awaitable) -> Any:
+        try:
+            return await asyncio.wait_for(awaitable, self.timeout_seconds)
+        except asyncio.TimeoutError:
+            raise ProcessingTimeoutError(self.timeout_seconds)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Ejecuta fn(*args, **kwargs) en el pool sin bloquear el event loop
+
+        Raises:
+            ServerBusyError: Si no hay plazas libres
+            ProcessingTimeoutError: Si la tarea excede timeout_seconds
+        """
+        self._reserve(1)
+        try:
+            future = self._submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        return await self._await(future)
+
+    async def map(self, fn: Callable, items: Sequence) -> List[Any]:
+        """
+        Ejecuta fn(item) para cada elemento; reserva todas las plazas o ninguna
+
+        Raises:
+            ServerBusyError: Si no hay plazas para todos los elementos
+            ProcessingTimeoutError: Si el conjunto excede timeout_seconds
+        """
+        self._reserve(len(items))
+        futures = []
+        try:
+            for item in items:
+                futures.append(self._submit(partial(fn, item)))
+        except BaseException:
+            # Las plazas de los elementos no enviados nunca tendrán callback
+            for _ in range(len(items) - len(futures)):
+                self._release()
+            raise
+        return await self._await(asyncio.gather(*futures))
+
+    def stats(self) -> Dict[str, int]:
+        """Estado actual del pool"""
+        return {
+            "workers": self.max_workers,
+            "capacity": self.capacity,
+            "in_flight": self._in_flight,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,320 @@
+"""
+Cola de trabajos batch persistente (SQLite + spool en disco)
+Los documentos se procesan en segundo plano y el resultado se descarga como ZIP
+"""
+import json
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+import logging
+
+from core.batch_engine import process_document
+from api.uploads import copy_limited
+
+logger = logging.getLogger(__name__)
+
+# Estados de un trabajo
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+FINISHED_STATES = (COMPLETED, FAILED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    operation TEXT NOT NULL,
+    params TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    processed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_files (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    message TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+
+class JobStore:
+    """Persistencia de trabajos y archivos en SQLite"""
+
+    def __init__(self, db_path: Union[str, Path]):
+        self.db_path = str(db_path)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def create(self, job_id: str, operation: str, params: Dict, filenames: List[str]) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, operation, params, total, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, operation, json.dumps(params), len(filenames), now, now)
+            )
+            conn.executemany(
+                "INSERT INTO job_files (job_id, idx, filename) VALUES (?, ?, ?)",
+                [(job_id, idx, name) for idx, name in enumerate(filenames)]
+            )
+
+    def set_status(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+
+    def record_file(self, job_id: str, idx: int, status: str, message: str = '') -> None:
+        """Registra el resultado de un archivo y actualiza el progreso del trabajo"""
+        failed = 1 if status == 'error' else 0
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE job_files SET status = ?, message = ? WHERE job_id = ? AND idx = ?",
+                (status, message, job_id, idx)
+            )
+            conn.execute(
+                "UPDATE jobs SET processed = processed + 1, failed = failed + ?, "
+                "updated_at = ? WHERE id = ?",
+                (failed, time.time(), job_id)
+            )
+
+    def reset_progress(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE job_files SET status = 'pending', message = NULL WHERE job_id = ?",
+                (job_id,)
+            )
+            conn.execute(
+                "UPDATE jobs SET processed = 0, failed = 0 WHERE id = ?", (job_id,)
+            )
+
+    def get(self, job_id: str, include_files: bool = False) -> Optional[Dict]:
+        """Estado del trabajo (None si no existe)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = dict(row)
+            job['params'] = json.loads(job['params'])
+            if include_files:
+                job['files'] = [
+                    dict(r) for r in conn.execute(
+                        "SELECT idx, filename, status, message FROM job_files "
+                        "WHERE job_id = ? ORDER BY idx",
+                        (job_id,)
+                    )
+                ]
+        return job
+
+    def files(self, job_id: str) -> List[Tuple[int, str, str]]:
+        with self._connect() as conn:
+            return [
+                (r['idx'], r['filename'], r['status']) for r in conn.execute(
+                    "SELECT idx, filename, status FROM job_files WHERE job_id = ? ORDER BY idx",
+                    (job_id,)
+                )
+            ]
+
+    def unfinished(self) -> List[str]:
+        with self._connect() as conn:
+            return [
+                r['id'] for r in conn.execute(
+                    "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                    (QUEUED, RUNNING)
+                )
+            ]
+
+    def delete(self, job_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job_files WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+
+class JobQueue:
+    """
+    Cola de trabajos batch con spool en disco.
+
+    Cada trabajo guarda sus documentos en <spool>/<job_id>/input y los
+    resultados en <spool>/<job_id>/output. Un hilo despachador ejecuta los
+    trabajos en orden de llegada y reparte los documentos en un pool de
+    procesos; al terminar empaqueta los resultados en result.zip. Los
+    trabajos pendientes al reiniciar el servidor se reanudan con resume().
+    """
+
+    def __init__(self, spool_dir: Union[str, Path], workers: int = 4):
+        """
+        Args:
+            spool_dir: Directorio de trabajo (base de datos, entradas y salidas)
+            workers: Procesos para procesar documentos
+        """
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.store = JobStore(self.spool_dir / 'jobs.db')
+        self.workers = workers
+        self._dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="docx-jobs")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+
+    def job_dir(self, job_id: str) -> Path:
+        return self.spool_dir / job_id
+
+    def result_path(self, job_id: str) -> Path:
+        return self.job_dir(job_id) / 'result.zip'
+
+    @staticmethod
+    def _input_name(idx: int, filename: str) -> str:
+        return f"{idx:05d}_{Path(filename).name}"
+
+    def submit(
+        self,
+        files: List[Tuple[str, BinaryIO]],
+        operation: str,
+        data: Dict[str, str],
+        preserve_format: bool = True,
+        max_file_size: int = 20 * 1024 * 1024,
+        chunk_size: int = 8192
+    ) -> str:
+        """
+        Guarda los documentos en el spool y encola el trabajo
+
+        Args:
+            files: Lista de (nombre, stream binario)
+            operation: 'footer' (usa data['text']) o 'placeholders'
+            data: Datos de la operación
+            preserve_format: Preservar formato al reemplazar placeholders
+            max_file_size: Máximo de bytes por documento
+            chunk_size: Bloque de copia al spool
+
+        Returns:
+            Identificador del trabajo
+
+        Raises:
+            FileSizeExceededError: Si un documento supera max_file_size
+        """
+        job_id = uuid.uuid4().hex
+        input_dir = self.job_dir(job_id) / 'input'
+        input_dir.mkdir(parents=True)
+
+        filenames = []
+        try:
+            for idx, (filename, stream) in enumerate(files):
+                filename = Path(filename).name
+                with (input_dir / self._input_name(idx, filename)).open('wb') as f:
+                    copy_limited(stream, f, max_file_size, chunk_size)
+                filenames.append(filename)
+        except Exception:
+            shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+            raise
+
+        params = {'data': data, 'preserve_format': preserve_format}
+        self.store.create(job_id, operation, params, filenames)
+        self._dispatcher.submit(self._run_job, job_id)
+        logger.info(f"Trabajo {job_id} encolado: {len(filenames)} documentos")
+        return job_id
+
+    def resume(self) -> int:
+        """Vuelve a encolar los trabajos no terminados; retorna cuántos"""
+        pending = self.store.unfinished()
+        for job_id in pending:
+            self._dispatcher.submit(self._run_job, job_id)
+        return len(pending)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _run_job(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        if job is None:
+            return
+
+        try:
+            self.store.reset_progress(job_id)
+            self.store.set_status(job_id, RUNNING)
+
+            job_dir = self.job_dir(job_id)
+            output_dir = job_dir / 'output'
+            output_dir.mkdir(exist_ok=True)
+            params = job['params']
+            pool = self._get_pool()
+
+            futures = {
+                pool.submit(
+                    process_document,
+                    str(job_dir / 'input' / self._input_name(idx, filename)),
+                    job['operation'],
+                    params['data'],
+                    str(output_dir),
+                    params['preserve_format']
+                ): idx
+                for idx, filename, _ in self.store.files(job_id)
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                message = result.get('error', '')
+                self.store.record_file(job_id, futures[future], result['status'], message)
+
+            self._write_result_zip(job_id)
+            self.store.set_status(job_id, COMPLETED)
+            logger.info(f"Trabajo {job_id} completado")
+        except Exception as e:
+            logger.error(f"Trabajo {job_id} falló: {e}")
+            self.store.set_status(job_id, FAILED, str(e))
+
+    def _write_result_zip(self, job_id: str) -> None:
+        """Empaqueta los documentos procesados con su nombre original"""
+        output_dir = self.job_dir(job_id) / 'output'
+        seen = set()
+        tmp_path = self.result_path(job_id).with_suffix('.tmp')
+
+        # Los .docx ya están comprimidos: se almacenan sin recomprimir
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED) as zf:
+            for idx, filename, status in self.store.files(job_id):
+                if status != 'success':
+                    continue
+                arcname = filename if filename not in seen else f"{idx:05d}_{filename}"
+                seen.add(arcname)
+                zf.write(output_dir / self._input_name(idx, filename), arcname)
+
+        tmp_path.replace(self.result_path(job_id))
+
+    def delete(self, job_id: str) -> bool:
+        """Elimina un trabajo terminado y sus archivos"""
+        job = self.store.get(job_id)
+        if job is None or job['status'] not in FINISHED_STATES:
+            return False
+        self.store.delete(job_id)
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        return True
+
+    def shutdown(self) -> None:
+        self._dispatcher.shutdown(wait=False)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
@@ -2,14 +2,16 @@
 REST API Server - FastAPI con endpoints para procesamiento batch
 Optimizado para concurrencia con pool de workers
 """
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 from typing import Dict, List, Optional
+import asyncio
+import io
+import json
 import tempfile
-import shutil
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import logging
 from datetime import datetime
 
@@ -17,6 +19,13 @@ from datetime import datetime
 from core.document_processor import DocumentProcessor
 from core.footer_editor import FooterEditor
 from core.placeholder_engine import PlaceholderEngine
+from core.compiled_template import CompiledTemplateCache
+from core.image_cache import get_image_cache
+from utils.config import get_setting
+from utils.exceptions import FileSizeExceededError, ProcessingTimeoutError, ServerBusyError
+from api.concurrency import BoundedExecutor
+from api.jobs import FINISHED_STATES, JobQueue
+from api.uploads import MULTIPART_OVERHEAD, UploadLimitMiddleware, read_fingerprinted
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,11 +36,107 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Pool de workers para procesamiento paralelo
-WORKER_POOL = ThreadPoolExecutor(max_workers=4)
+# Pool acotado: el trabajo CPU-bound no se ejecuta en el event loop
+WORKER_POOL = BoundedExecutor(
+    max_workers=get_setting('concurrency.worker_pool_size', 4),
+    max_queue_size=get_setting('concurrency.max_queue_size', 16),
+    timeout_seconds=get_setting('concurrency.timeout_seconds', 300)
+)
+MAX_BATCH_SIZE = get_setting('concurrency.max_batch_size', 10)
+
+# Uploads: se leen por bloques y se rechazan en cuanto exceden el límite
+MAX_FILE_SIZE = get_setting('processing.max_file_size_bytes', DocumentProcessor.MAX_FILE_SIZE)
+UPLOAD_CHUNK_SIZE = get_setting('processing.chunk_size', DocumentProcessor.READ_CHUNK_SIZE)
+
+# Plantillas compiladas por huella SHA-256: un mismo upload no se vuelve a analizar
+TEMPLATE_CACHE = CompiledTemplateCache(
+    max_bytes=get_setting('processing.template_cache_mb', 128) * 1024 * 1024
+)
+
+
+def request_size_limit(path: str) -> int:
+    """Máximo de bytes del cuerpo según el endpoint"""
+    if path == '/batch/process':
+        return MAX_FILE_SIZE * MAX_BATCH_SIZE + MULTIPART_OVERHEAD
+    if path == '/jobs/batch':
+        return min(MAX_FILE_SIZE * MAX_JOB_FILES, MAX_JOB_UPLOAD_SIZE) + MULTIPART_OVERHEAD
+    return MAX_FILE_SIZE + MULTIPART_OVERHEAD
+
+
+app.add_middleware(UploadLimitMiddleware, limit_for_path=request_size_limit)
+
+
+def check_upload(file: UploadFile) -> None:
+    """Valida extensión y tamaño de un archivo subido"""
+    if not file.filename.endswith('.docx'):
+        raise HTTPException(400, "Solo archivos .docx permitidos")
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise HTTPException(
+            413, f"{file.filename} excede límite de {MAX_FILE_SIZE / 1024 / 1024:.0f}MB"
+        )
+
+
+def load_upload(file: UploadFile) -> DocumentProcessor:
+    """Carga un upload leyéndolo por bloques (ejecutar en el pool)"""
+    return DocumentProcessor(file.file, chunk_size=UPLOAD_CHUNK_SIZE).load()
+
+
+# Errores con manejador propio (503, 504, 413) que no deben convertirse en 500
+HANDLED_ERRORS = (ServerBusyError, ProcessingTimeoutError, FileSizeExceededError)
+
 TEMP_DIR = Path(tempfile.gettempdir()) / "docx_editor"
 TEMP_DIR.mkdir(exist_ok=True)
 
+# Cola persistente para batches grandes (submit → poll → descarga ZIP)
+JOB_QUEUE = JobQueue(
+    get_setting('processing.job_spool_dir', str(TEMP_DIR / 'jobs')),
+    workers=get_setting('concurrency.job_workers', 4)
+)
+MAX_JOB_FILES = get_setting('concurrency.max_job_files', 1000)
+MAX_JOB_UPLOAD_SIZE = get_setting('concurrency.max_job_upload_mb', 512) * 1024 * 1024
+
+DOCX_MEDIA_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+
+def docx_response(content: bytes, filename: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Respuesta con el documento generado en memoria"""
+    response_headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if headers:
+        response_headers.update(headers)
+    return Response(content=content, media_type=DOCX_MEDIA_TYPE, headers=response_headers)
+
+
+@app.exception_handler(ServerBusyError)
+async def server_busy_handler(request, exc: ServerBusyError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
+
+
+@app.exception_handler(ProcessingTimeoutError)
+async def processing_timeout_handler(request, exc: ProcessingTimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
+
+@app.exception_handler(FileSizeExceededError)
+async def file_size_exceeded_handler(request, exc: FileSizeExceededError):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
+@app.on_event("startup")
+def resume_jobs():
+    resumed = JOB_QUEUE.resume()
+    if resumed:
+        logger.info(f"Trabajos batch reanudados: {resumed}")
+
+
+@app.on_event("shutdown")
+def shutdown_worker_pool():
+    WORKER_POOL.shutdown()
+    JOB_QUEUE.shutdown()
+
 
 # Pydantic Models
 class FooterUpdateRequest(BaseModel):
@@ -90,7 +195,17 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "workers": WORKER_POOL._max_workers
+        **WORKER_POOL.stats()
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Contadores de caché y del pool de trabajo"""
+    return {
+        "template_cache": TEMPLATE_CACHE.stats(),
+        "image_cache": get_image_cache().stats(),
+        "worker_pool": WORKER_POOL.stats()
     }
 
 
@@ -100,20 +215,14 @@ async def upload_document(file: UploadFile = File(...)):
     """
     Carga un documento DOCX y retorna información básica
     """
-    if not file.filename.endswith('.docx'):
-        raise HTTPException(400, "Solo archivos .docx permitidos")
-    
-    # Guardar temporalmente
-    temp_path = TEMP_DIR / f"upload_{datetime.now().timestamp()}_{file.filename}"
+    check_upload(file)
     
     try:
-        with temp_path.open('wb') as f:
-            content = await file.read()
-            f.write(content)
+        def process() -> Dict:
+            processor = load_upload(file)
+            return processor.get_statistics()
 
-        processor = DocumentProcessor(str(temp_path))
-        processor.load()
-        stats = processor.get_statistics()
+        stats = await WORKER_POOL.run(process)
 
         return DocumentInfo(
             filename=file.filename,
@@ -123,14 +232,11 @@ async def upload_document(file: UploadFile = File(...)):
             tables=stats['tables']
         )
     
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         logger.error(f"Error al cargar documento: {e}")
         raise HTTPException(500, f"Error al procesar documento: {str(e)}")
-    
-    finally:
-        # Cleanup
-        if temp_path.exists():
-            temp_path.unlink()
 
 
 # Footer Operations
@@ -142,46 +248,29 @@ async def update_footer(
     """
     Actualiza el pie de página de un documento
     """
-    if not file.filename.endswith('.docx'):
-        raise HTTPException(400, "Solo archivos .docx permitidos")
-    
-    temp_input = TEMP_DIR / f"input_{datetime.now().timestamp()}_{file.filename}"
-    temp_output = TEMP_DIR / f"output_{datetime.now().timestamp()}_{file.filename}"
+    check_upload(file)
     
     try:
-        # Guardar archivo de entrada
-        with temp_input.open('wb') as f:
-            content = await file.read()
-            f.write(content)
-
-        # Procesar documento
-        processor = DocumentProcessor(str(temp_input))
-        processor.load()
-        processor.create_backup()
-
-        footer_editor = FooterEditor(processor.document)
-        footer_editor.update_footer_text(
-            request.text,
-            section_idx=request.section_idx,
-            preserve_format=request.preserve_format
-        )
-
-        processor.save(str(temp_output))
+        # Procesar documento en memoria
+        def process() -> bytes:
+            processor = load_upload(file)
+
+            footer_editor = FooterEditor(processor.document)
+            footer_editor.update_footer_text(
+                request.text,
+                section_idx=request.section_idx,
+                preserve_format=request.preserve_format
+            )
+            return processor.to_bytes()
 
         # Retornar archivo modificado
-        return FileResponse(
-            temp_output,
-            media_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            filename=f"updated_{file.filename}"
-        )
+        return docx_response(await WORKER_POOL.run(process), f"updated_{file.filename}")
     
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         logger.error(f"Error actualizando footer: {e}")
         raise HTTPException(500, f"Error: {str(e)}")
-    
-    finally:
-        # Cleanup en background
-        pass
 
 
 @app.get("/document/footer/get")
@@ -192,73 +281,80 @@ async def get_footer(
     """
     Obtiene el contenido actual del pie de página
     """
-    if not file.filename.endswith('.docx'):
-        raise HTTPException(400, "Solo archivos .docx permitidos")
-    
-    temp_path = TEMP_DIR / f"read_{datetime.now().timestamp()}_{file.filename}"
+    check_upload(file)
     
     try:
-        with temp_path.open('wb') as f:
-            content = await file.read()
-            f.write(content)
-
-        processor = DocumentProcessor(str(temp_path))
-        processor.load()
+        def process() -> Dict:
+            processor = load_upload(file)
 
-        footer_editor = FooterEditor(processor.document)
-        footer_data = footer_editor.get_footer_with_format(section_idx)
+            footer_editor = FooterEditor(processor.document)
+            return footer_editor.get_footer_with_format(section_idx)
 
-        return {"footer": footer_data}
+        return {"footer": await WORKER_POOL.run(process)}
     
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         logger.error(f"Error leyendo footer: {e}")
         raise HTTPException(500, f"Error: {str(e)}")
-    
-    finally:
-        if temp_path.exists():
-            temp_path.unlink()
 
 
 # Placeholder Operations
 @app.post("/document/placeholders/replace")
 async def replace_placeholders(
     file: UploadFile = File(...),
-    request: PlaceholderReplaceRequest = None
+    data: str = Form(..., description="JSON con placeholders"),
+    strict: bool = Form(False),
+    preserve_format: bool = Form(True)
 ):
     """
     Reemplaza placeholders {{variable}} en el documento
-    """
-    if not file.filename.endswith('.docx'):
-        raise HTTPException(400, "Solo archivos .docx permitidos")
     
-    temp_input = TEMP_DIR / f"input_{datetime.now().timestamp()}_{file.filename}"
-    temp_output = TEMP_DIR / f"output_{datetime.now().timestamp()}_{file.filename}"
+    Con preserve_format (default) la plantilla se compila una vez por
+    contenido y los uploads repetidos se renderizan desde el caché.
+    """
+    check_upload(file)
     
     try:
-        with temp_input.open('wb') as f:
-            content = await file.read()
-            f.write(content)
-
-        processor = DocumentProcessor(str(temp_input))
-        processor.load()
-        processor.create_backup()
-
-        engine = PlaceholderEngine(processor.document)
-        replacements = engine.replace_all(
-            request.data,
-            strict=request.strict,
-            preserve_format=request.preserve_format
+        request = PlaceholderReplaceRequest(
+            data=json.loads(data),
+            strict=strict,
+            preserve_format=preserve_format
         )
-
-        processor.save(str(temp_output))
-
-        return FileResponse(
-            temp_output,
-            media_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            filename=f"processed_{file.filename}",
+    except (json.JSONDecodeError, ValidationError) as e:
+        raise HTTPException(400, f"data debe ser un objeto JSON de placeholders: {e}")
+    
+    try:
+        def process() -> tuple:
+            if request.preserve_format:
+                blob, fingerprint = read_fingerprinted(
+                    file.file, MAX_FILE_SIZE, UPLOAD_CHUNK_SIZE
+                )
+                template = TEMPLATE_CACHE.get(blob, fingerprint)
+                output = io.BytesIO()
+                replacements = template.render(request.data, output, strict=request.strict)
+                return output.getvalue(), replacements
+            
+            processor = load_upload(file)
+
+            engine = PlaceholderEngine(processor.document)
+            replacements = engine.replace_all(
+                request.data,
+                strict=request.strict,
+                preserve_format=request.preserve_format
+            )
+            return processor.to_bytes(), replacements
+
+        output, replacements = await WORKER_POOL.run(process)
+
+        return docx_response(
+            output,
+            f"processed_{file.filename}",
             headers={"X-Replacements-Count": str(replacements)}
         )
     
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         logger.error(f"Error reemplazando placeholders: {e}")
         raise HTTPException(500, f"Error: {str(e)}")
@@ -269,35 +365,25 @@ async def list_placeholders(file: UploadFile = File(...)):
     """
     Lista todos los placeholders encontrados en el documento
     """
-    if not file.filename.endswith('.docx'):
-        raise HTTPException(400, "Solo archivos .docx permitidos")
-    
-    temp_path = TEMP_DIR / f"read_{datetime.now().timestamp()}_{file.filename}"
+    check_upload(file)
     
     try:
-        with temp_path.open('wb') as f:
-            content = await file.read()
-            f.write(content)
-
-        processor = DocumentProcessor(str(temp_path))
-        processor.load()
+        def process() -> Dict:
+            processor = load_upload(file)
 
-        engine = PlaceholderEngine(processor.document)
-        placeholders = engine.find_all_placeholders()
-        report = engine.get_placeholder_report()
+            engine = PlaceholderEngine(processor.document)
+            return {
+                "placeholders": list(engine.find_all_placeholders()),
+                "report": engine.get_placeholder_report()
+            }
 
-        return {
-            "placeholders": list(placeholders),
-            "report": report
-        }
+        return await WORKER_POOL.run(process)
     
+    except HANDLED_ERRORS:
+        raise
     except Exception as e:
         logger.error(f"Error listando placeholders: {e}")
         raise HTTPException(500, f"Error: {str(e)}")
-    
-    finally:
-        if temp_path.exists():
-            temp_path.unlink()
 
 
 # Batch Processing
@@ -310,25 +396,18 @@ async def batch_process(
     """
     Procesa múltiples documentos en paralelo
     """
-    if len(files) > 10:
-        raise HTTPException(400, "Máximo 10 archivos por batch")
-    
-    results = []
+    if len(files) > MAX_BATCH_SIZE:
+        raise HTTPException(400, f"Máximo {MAX_BATCH_SIZE} archivos por batch")
+    for file in files:
+        check_upload(file)
     
-    def process_single(file_data: tuple) -> Dict:
-        """Procesa un solo documento"""
-        filename, content = file_data
-        temp_path = TEMP_DIR / f"batch_{datetime.now().timestamp()}_{filename}"
-        output_path = TEMP_DIR / f"batch_out_{datetime.now().timestamp()}_{filename}"
+    def process_single(file: UploadFile) -> Dict:
+        """Procesa un solo documento en memoria"""
+        filename = file.filename
 
         try:
-            # Guardar
-            with temp_path.open('wb') as f:
-                f.write(content)
-
             # Procesar según operación
-            processor = DocumentProcessor(str(temp_path))
-            processor.load()
+            processor = load_upload(file)
 
             if request and request.operation == 'footer' and request.footer_text:
                 editor = FooterEditor(processor.document)
@@ -337,7 +416,7 @@ async def batch_process(
                 engine = PlaceholderEngine(processor.document)
                 engine.replace_all(request.placeholder_data, preserve_format=request.preserve_format)
 
-            processor.save(str(output_path))
+            processor.to_bytes()
 
             return {
                 "filename": filename,
@@ -351,27 +430,10 @@ async def batch_process(
                 "status": "error",
                 "message": str(e)
             }
-
-        finally:
-            if temp_path.exists():
-                temp_path.unlink()
-            if output_path.exists():
-                output_path.unlink()
-    
-    # Leer contenido de archivos antes del procesamiento paralelo
-    file_data_list = []
-    for file in files:
-        content = file.file.read()
-        file_data_list.append((file.filename, content))
-
-    # Procesamiento paralelo
-    futures = [
-        WORKER_POOL.submit(process_single, file_data)
-        for file_data in file_data_list
-    ]
     
-    for future in as_completed(futures):
-        results.append(future.result())
+    # Cada worker lee su archivo por bloques: solo hay tantos documentos
+    # en memoria como workers activos (todo el batch o 503)
+    results = await WORKER_POOL.map(process_single, files)
     
     return {
         "total": len(files),
@@ -379,12 +441,125 @@ async def batch_process(
     }
 
 
+# Batch Jobs
+def job_status(job_id: str) -> Dict:
+    job = JOB_QUEUE.store.get(job_id, include_files=True)
+    if job is None:
+        raise HTTPException(404, f"Trabajo no encontrado: {job_id}")
+    return job
+
+
+@app.post("/jobs/batch", status_code=202)
+async def submit_batch_job(
+    files: List[UploadFile] = File(...),
+    operation: str = Form(..., description="Operación: 'footer' o 'placeholders'"),
+    footer_text: Optional[str] = Form(None),
+    placeholder_data: Optional[str] = Form(None, description="JSON con placeholders"),
+    preserve_format: bool = Form(True)
+):
+    """
+    Encola un batch de documentos y retorna el id del trabajo
+    """
+    if len(files) > MAX_JOB_FILES:
+        raise HTTPException(400, f"Máximo {MAX_JOB_FILES} archivos por trabajo")
+    for file in files:
+        check_upload(file)
+    
+    if operation == 'footer':
+        if not footer_text:
+            raise HTTPException(400, "footer_text requerido para operation='footer'")
+        data = {'text': footer_text}
+    elif operation == 'placeholders':
+        try:
+            data = json.loads(placeholder_data or '{}')
+        except json.JSONDecodeError:
+            raise HTTPException(400, "placeholder_data debe ser JSON válido")
+    else:
+        raise HTTPException(400, f"Operación no soportada: {operation}")
+    
+    # Copia al spool fuera del event loop
+    job_id = await run_in_threadpool(
+        JOB_QUEUE.submit,
+        [(f.filename, f.file) for f in files],
+        operation,
+        data,
+        preserve_format,
+        MAX_FILE_SIZE,
+        UPLOAD_CHUNK_SIZE
+    )
+    
+    return {
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}",
+        "events_url": f"/jobs/{job_id}/events",
+        "result_url": f"/jobs/{job_id}/result"
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_batch_job(job_id: str):
+    """Estado y progreso de un trabajo"""
+    return await run_in_threadpool(job_status, job_id)
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_batch_job(job_id: str, interval: float = 0.5):
+    """
+    Progreso del trabajo como Server-Sent Events hasta que termina
+    """
+    job = await run_in_threadpool(JOB_QUEUE.store.get, job_id)
+    if job is None:
+        raise HTTPException(404, f"Trabajo no encontrado: {job_id}")
+    
+    async def events():
+        last = None
+        while True:
+            job = await run_in_threadpool(JOB_QUEUE.store.get, job_id)
+            if job is None:
+                return
+            progress = {k: job[k] for k in ('status', 'total', 'processed', 'failed', 'error')}
+            if progress != last:
+                yield f"data: {json.dumps(progress)}\n\n"
+                last = progress
+            if job['status'] in FINISHED_STATES:
+                return
+            await asyncio.sleep(interval)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/jobs/{job_id}/result")
+async def download_batch_job(job_id: str):
+    """Descarga el ZIP con los documentos procesados"""
+    job = await run_in_threadpool(JOB_QUEUE.store.get, job_id)
+    if job is None:
+        raise HTTPException(404, f"Trabajo no encontrado: {job_id}")
+    if job['status'] != 'completed':
+        raise HTTPException(409, f"Trabajo en estado '{job['status']}'")
+    
+    return FileResponse(
+        JOB_QUEUE.result_path(job_id),
+        media_type="application/zip",
+        filename=f"batch_{job_id}.zip"
+    )
+
+
+@app.delete("/jobs/{job_id}")
+async def delete_batch_job(job_id: str):
+    """Elimina un trabajo terminado y sus archivos"""
+    if not await run_in_threadpool(JOB_QUEUE.delete, job_id):
+        raise HTTPException(409, "Trabajo inexistente o en curso")
+    return {"deleted": job_id}
+
+
 # Cleanup endpoint
 @app.post("/admin/cleanup")
 async def cleanup_temp():
     """Limpia archivos temporales"""
     count = 0
     for file in TEMP_DIR.glob("*"):
+        if file.is_dir():
+            continue
         try:
             file.unlink()
             count += 1
@@ -0,0 +1,117 @@
+"""
+Límites de tamaño para uploads aplicados mientras se recibe el cuerpo
+Rechaza con 413 antes de leer (Content-Length) o en cuanto se supera el límite
+"""
+import hashlib
+import io
+import json
+from typing import BinaryIO, Callable, Tuple
+import logging
+
+from fastapi import HTTPException
+
+from core.document_processor import copy_limited
+
+logger = logging.getLogger(__name__)
+
+# Margen para cabeceras multipart y campos de formulario
+MULTIPART_OVERHEAD = 1024 * 1024
+
+
+class UploadLimitMiddleware:
+    """
+    Middleware ASGI que limita el tamaño del cuerpo de las peticiones.
+
+    Si Content-Length excede el límite responde 413 sin leer el cuerpo; si no
+    hay Content-Length (chunked) cuenta los bytes recibidos y corta la
+    lectura en cuanto se supera, sin esperar al final del upload.
+    """
+
+    def __init__(self, app, limit_for_path: Callable[[str], int]):
+        """
+        Args:
+            app: Aplicación ASGI
+            limit_for_path: Retorna el máximo de bytes aceptado para una ruta
+        """
+        self.app = app
+        self.limit_for_path = limit_for_path
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] not in ('POST', 'PUT'):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit_for_path(scope['path'])
+        content_length = dict(scope['headers']).get(b'content-length')
+        if content_length is not None:
+            try:
+                declared = int(content_length)
+            except ValueError:
+                await self._respond(send, 400, "Content-Length inválido")
+                return
+            if declared > limit:
+                logger.warning(f"Upload rechazado por Content-Length: {declared} bytes")
+                await self._reject(send, limit)
+                return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > limit:
+                    raise HTTPException(413, self._detail(limit))
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except HTTPException as e:
+            if e.status_code != 413 or response_started:
+                raise
+            await self._reject(send, limit)
+
+    @staticmethod
+    def _detail(limit: int) -> str:
+        return f"Petición excede límite de {limit / 1024 / 1024:.1f}MB"
+
+    async def _reject(self, send, limit: int) -> None:
+        await self._respond(send, 413, self._detail(limit))
+
+    @staticmethod
+    async def _respond(send, status: int, detail: str) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'content-length', str(len(body)).encode()),
+                (b'connection', b'close'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def read_fingerprinted(source: BinaryIO, max_size: int, chunk_size: int) -> Tuple[bytes, str]:
+    """
+    Lee un stream completo con límite de tamaño calculando su SHA-256 al vuelo
+
+    Returns:
+        Tupla (contenido, huella SHA-256 en hexadecimal)
+
+    Raises:
+        FileSizeExceededError: Si el stream supera `max_size`
+    """
+    digest = hashlib.sha256()
+    buffer = io.BytesIO()
+    copy_limited(source, buffer, max_size, chunk_size, digest)
+    return buffer.getvalue(), digest.hexdigest()
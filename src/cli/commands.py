@@ -4,10 +4,10 @@ Soporta operaciones individuales y batch con progreso visual
 """
 import click
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional
 import json
 import sys
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from tqdm import tqdm
 import logging
 
@@ -15,6 +15,7 @@ import logging
 from core.document_processor import DocumentProcessor, PerformanceMonitor
 from core.footer_editor import FooterEditor
 from core.placeholder_engine import PlaceholderEngine
+from core.batch_engine import BatchEngine, process_document
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
@@ -243,11 +244,25 @@ def batch():
               type=click.Choice(['footer', 'placeholder']),
               required=True)
 @click.option('--data', '-d', help='JSON con datos para procesamiento')
+@click.option('--text', '-t', help='Texto del pie de página (--operation footer)')
 @click.option('--output-dir', '-o', type=click.Path(), help='Directorio de salida')
 @click.option('--workers', '-w', default=4, help='Número de workers paralelos')
-def batch_process(pattern, operation, data, output_dir, workers):
+def batch_process(pattern, operation, data, text, output_dir, workers):
     """Procesa múltiples archivos con patrón glob"""
     try:
+        # Parsear datos si es necesario
+        data_dict = json.loads(data) if data else {}
+        
+        if operation == 'footer':
+            if text is not None:
+                data_dict['text'] = text
+            if not data_dict.get('text'):
+                click.echo(click.style(
+                    "✗ --operation footer requiere --text (o --data '{\"text\": ...}')",
+                    fg='red'
+                ), err=True)
+                sys.exit(1)
+        
         # Encontrar archivos
         files = list(Path('.').glob(pattern))
         
@@ -257,23 +272,16 @@ def batch_process(pattern, operation, data, output_dir, workers):
         
         click.echo(f"Archivos encontrados: {len(files)}")
         
-        # Parsear datos si es necesario
-        data_dict = json.loads(data) if data else {}
-        
         # Crear directorio de salida
         if output_dir:
             Path(output_dir).mkdir(parents=True, exist_ok=True)
         
-        # Procesar con pool de workers
-        def process_file(file_path):
-            try:
-                # Mock processing
-                return {'file': str(file_path), 'status': 'success'}
-            except Exception as e:
-                return {'file': str(file_path), 'status': 'error', 'error': str(e)}
-        
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            futures = [executor.submit(process_file, f) for f in files]
+        # Procesar con pool de procesos (el trabajo es CPU-bound)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(process_document, str(f), operation, data_dict, output_dir)
+                for f in files
+            ]
             
             with tqdm(total=len(files), desc="Procesando") as pbar:
                 for future in as_completed(futures):
@@ -292,6 +300,76 @@ def batch_process(pattern, operation, data, output_dir, workers):
         sys.exit(1)
 
 
+@batch.command('generate')
+@click.argument('template', type=click.Path(exists=True))
+@click.argument('data_file', type=click.Path(exists=True))
+@click.option('--output-dir', '-o', type=click.Path(), default='informes', help='Directorio de salida')
+@click.option('--pattern', '-p', default=BatchEngine.DEFAULT_PATTERN,
+              help='Nombre de cada informe, ej: "{documento}.docx"')
+@click.option('--workers', '-w', type=int, default=None, help='Procesos (default: núcleos)')
+@click.option('--chunksize', default=16, help='Registros por tarea enviada a un worker')
+@click.option('--strict', is_flag=True, help='Fallar si hay placeholders sin datos')
+def batch_generate(template, data_file, output_dir, pattern, workers, chunksize, strict):
+    """Genera un informe por registro (JSON lista o JSONL) desde una plantilla"""
+    try:
+        engine = BatchEngine(
+            template, output_dir,
+            filename_pattern=pattern,
+            workers=workers,
+            chunksize=chunksize,
+            strict=strict
+        )
+        
+        with open(data_file, 'r', encoding='utf-8') as f:
+            # JSONL se consume línea a línea mientras los workers renderizan
+            if data_file.endswith('.jsonl'):
+                records = _iter_jsonl(f)
+                total = None
+            else:
+                records = json.load(f)
+                if isinstance(records, dict):
+                    records = [records]
+                total = len(records)
+            
+            if total is not None:
+                click.echo(f"Registros: {total}  Workers: {engine.workers}")
+            else:
+                click.echo(f"Workers: {engine.workers}")
+            
+            with tqdm(total=total, desc="Generando") as pbar:
+                def on_result(result):
+                    pbar.update(1)
+                    if result['status'] == 'error':
+                        tqdm.write(click.style(f"✗ #{result['index']}: {result['error']}", fg='red'))
+                
+                report = engine.run(records, progress=on_result)
+        
+        click.echo(click.style(
+            f"\n✓ {report['succeeded']}/{report['total']} informes en "
+            f"{report['elapsed_seconds']:.2f}s ({report['docs_per_second']:.1f} docs/s)",
+            fg='green' if not report['failed'] else 'yellow'
+        ))
+        
+        if report['failed']:
+            sys.exit(1)
+        
+    except Exception as e:
+        click.echo(click.style(f"✗ Error: {e}", fg='red'), err=True)
+        sys.exit(1)
+
+
+def _iter_jsonl(stream) -> Iterator[Optional[dict]]:
+    """Registros de un archivo JSONL; las líneas con JSON inválido producen None"""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.error(f"Línea {line_number}: JSON inválido ({e})")
+            yield None
+
+
 # Document Info
 @cli.command('info')
 @click.argument('file', type=click.Path(exists=True))
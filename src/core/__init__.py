@@ -2,10 +2,26 @@
 from .document_processor import DocumentProcessor, PerformanceMonitor
 from .footer_editor import FooterEditor
 from .placeholder_engine import PlaceholderEngine
+from .compiled_template import CompiledTemplate, CompiledTemplateCache, get_compiled_template
+from .xml_engine import XmlPlaceholderEngine
+from .package_writer import PackageZipWriter, SourcePackage, save_document
+from .batch_engine import BatchEngine, process_document
+from .image_cache import ImageBlobCache, get_image_cache
 
 __all__ = [
     'DocumentProcessor',
     'PerformanceMonitor',
     'FooterEditor',
     'PlaceholderEngine',
+    'CompiledTemplate',
+    'CompiledTemplateCache',
+    'get_compiled_template',
+    'XmlPlaceholderEngine',
+    'PackageZipWriter',
+    'SourcePackage',
+    'save_document',
+    'BatchEngine',
+    'process_document',
+    'ImageBlobCache',
+    'get_image_cache',
 ]
@@ -0,0 +1,278 @@
+"""
+Batch Engine - Generación masiva de informes en un pool de procesos
+Cada worker compila la plantilla una sola vez y renderiza lotes de registros
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import logging
+
+from .compiled_template import CompiledTemplate
+from .document_processor import DocumentProcessor
+from .footer_editor import FooterEditor
+from .placeholder_engine import PlaceholderEngine
+
+logger = logging.getLogger(__name__)
+
+# Plantilla compilada del worker (una por proceso)
+_worker_template: Optional[CompiledTemplate] = None
+
+
+def _init_worker(template_path: str) -> None:
+    """Inicializador del pool: compila la plantilla una vez por proceso"""
+    global _worker_template
+    logging.disable(logging.INFO)
+    _worker_template = CompiledTemplate(template_path)
+
+
+def _render_record(
+    template: CompiledTemplate,
+    index: int,
+    data: Dict[str, str],
+    output_path: str,
+    strict: bool
+) -> Dict:
+    """Renderiza un registro y retorna su resultado"""
+    start = time.perf_counter()
+    try:
+        # La plantilla compilada solo sustituye valores escalares; listas y
+        # tablas dinámicas requieren generar_informe.generate_report
+        nested = sorted(k for k, v in data.items() if isinstance(v, (list, dict)))
+        if nested:
+            raise ValueError(f"Valores no escalares no soportados: {nested}")
+        replacements = template.render(data, output_path, strict=strict)
+        return {
+            'index': index,
+            'output': output_path,
+            'status': 'success',
+            'replacements': replacements,
+            'seconds': time.perf_counter() - start,
+        }
+    except Exception as e:
+        return {
+            'index': index,
+            'output': output_path,
+            'status': 'error',
+            'error': str(e),
+            'seconds': time.perf_counter() - start,
+        }
+
+
+def _render_chunk(tasks: List[Tuple[int, Dict[str, str], str]], strict: bool) -> List[Dict]:
+    """Renderiza un lote de registros con la plantilla del worker"""
+    return [
+        _render_record(_worker_template, index, data, output_path, strict)
+        for index, data, output_path in tasks
+    ]
+
+
+class BatchEngine:
+    """
+    Genera un informe por registro de datos a partir de una misma plantilla.
+
+    Los registros se envían a un ProcessPoolExecutor en lotes (chunksize) para
+    amortizar la comunicación entre procesos; cada worker carga la plantilla
+    compilada en su inicializador y la reutiliza para todos sus registros.
+    Con workers=1 se renderiza en el proceso actual, sin pool.
+
+    Uso:
+        engine = BatchEngine("plantilla.docx", "informes", "{documento}.docx")
+        report = engine.run(registros)
+        print(report['docs_per_second'])
+    """
+
+    DEFAULT_PATTERN = 'informe_{index:05d}.docx'
+
+    def __init__(
+        self,
+        template_path: Union[str, Path],
+        output_dir: Union[str, Path],
+        filename_pattern: str = DEFAULT_PATTERN,
+        workers: Optional[int] = None,
+        chunksize: int = 16,
+        strict: bool = False
+    ):
+        """
+        Args:
+            template_path: Ruta a la plantilla .docx
+            output_dir: Directorio donde se escriben los informes
+            filename_pattern: Nombre de cada archivo; admite {index} y los
+                campos del registro (ej: '{documento}.docx')
+            workers: Procesos del pool (default: núcleos disponibles)
+            chunksize: Registros enviados a un worker por tarea
+            strict: Si True, un registro con placeholders sin datos falla
+        """
+        self.template_path = Path(template_path)
+        if not self.template_path.exists():
+            raise FileNotFoundError(f"Plantilla no encontrada: {self.template_path}")
+
+        self.output_dir = Path(output_dir)
+        self.filename_pattern = filename_pattern
+        self.workers = workers or os.cpu_count() or 1
+        self.chunksize = max(1, chunksize)
+        self.strict = strict
+
+    def output_path(self, index: int, data: Dict[str, str]) -> Path:
+        """
+        Ruta de salida del registro `index`
+
+        Raises:
+            TypeError: Si el registro no es un dict o tiene un campo 'index'
+            ValueError: Si la ruta resultante queda fuera de output_dir
+        """
+        if not isinstance(data, dict):
+            raise TypeError(f"se esperaba un objeto, no {type(data).__name__}")
+
+        output_dir = self.output_dir.resolve()
+        path = (output_dir / self.filename_pattern.format(index=index, **data)).resolve()
+        if not path.is_relative_to(output_dir):
+            raise ValueError(f"{path} queda fuera de {output_dir}")
+        return path
+
+    def _iter_tasks(
+        self,
+        records: Iterable[Dict[str, str]],
+        errors: List[Dict]
+    ) -> Iterator[Tuple[int, Dict[str, str], str]]:
+        """Resuelve la salida de cada registro; los nombres inválidos van a `errors`"""
+        for index, data in enumerate(records):
+            try:
+                output_path = self.output_path(index, data)
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                errors.append({
+                    'index': index,
+                    'output': None,
+                    'status': 'error',
+                    'error': f"Nombre de archivo inválido: {e}",
+                    'seconds': 0.0,
+                })
+                continue
+            yield index, data, str(output_path)
+
+    def _iter_chunks(self, tasks: Iterator) -> Iterator[List]:
+        while True:
+            chunk = list(islice(tasks, self.chunksize))
+            if not chunk:
+                return
+            yield chunk
+
+    def run(
+        self,
+        records: Iterable[Dict[str, str]],
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Genera un informe por registro
+
+        Los registros se consumen de forma incremental: `records` puede ser un
+        generador y como máximo 2 lotes por worker están en vuelo a la vez.
+
+        Args:
+            records: Iterable de dicts con los datos de cada informe
+            progress: Callback invocado con el resultado de cada registro
+
+        Returns:
+            Dict con totales, tiempo, throughput (informes generados por
+            segundo) y resultados por registro
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        results: List[Dict] = []
+        errors: List[Dict] = []
+
+        def collect(chunk_results: List[Dict]) -> None:
+            for result in errors + chunk_results:
+                results.append(result)
+                if progress:
+                    progress(result)
+            errors.clear()
+
+        start = time.perf_counter()
+        chunks = self._iter_chunks(self._iter_tasks(records, errors))
+
+        if self.workers == 1:
+            template = CompiledTemplate(self.template_path)
+            for chunk in chunks:
+                collect([
+                    _render_record(template, index, data, output_path, self.strict)
+                    for index, data, output_path in chunk
+                ])
+        else:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(str(self.template_path),)
+            ) as executor:
+                pending = set()
+                for chunk in chunks:
+                    pending.add(executor.submit(_render_chunk, chunk, self.strict))
+                    if len(pending) >= self.workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            collect(future.result())
+                for future in pending:
+                    collect(future.result())
+        collect([])
+
+        elapsed = time.perf_counter() - start
+        results.sort(key=lambda r: r['index'])
+        succeeded = sum(1 for r in results if r['status'] == 'success')
+
+        logger.info(
+            f"Batch completado: {succeeded}/{len(results)} informes en {elapsed:.2f}s "
+            f"({self.workers} workers)"
+        )
+
+        return {
+            'total': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'workers': self.workers,
+            'elapsed_seconds': elapsed,
+            'docs_per_second': succeeded / elapsed if elapsed > 0 else 0.0,
+            'results': results,
+        }
+
+
+def process_document(
+    file_path: str,
+    operation: str,
+    data: Dict[str, str],
+    output_dir: Optional[str] = None,
+    preserve_format: bool = True
+) -> Dict:
+    """
+    Aplica una operación de edición a un documento existente
+
+    Función de nivel de módulo para poder ejecutarse en un pool de procesos.
+
+    Args:
+        file_path: Ruta al documento .docx
+        operation: 'footer' (usa data['text']) o 'placeholder'/'placeholders'
+        data: Datos de la operación
+        output_dir: Directorio de salida (default: sobrescribe el original)
+        preserve_format: Preservar formato al reemplazar placeholders
+
+    Returns:
+        Dict con archivo, estado y error si lo hubo
+    """
+    try:
+        processor = DocumentProcessor(file_path)
+        processor.load()
+
+        if operation == 'footer':
+            FooterEditor(processor.document).apply_to_all_sections(data['text'])
+        elif operation in ('placeholder', 'placeholders'):
+            PlaceholderEngine(processor.document).replace_all(
+                data, preserve_format=preserve_format
+            )
+        else:
+            raise ValueError(f"Operación no soportada: {operation}")
+
+        output = Path(output_dir) / Path(file_path).name if output_dir else None
+        saved = processor.save(output)
+        return {'file': file_path, 'output': str(saved), 'status': 'success'}
+    except Exception as e:
+        return {'file': file_path, 'status': 'error', 'error': str(e)}
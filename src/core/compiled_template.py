@@ -0,0 +1,384 @@
+"""
+Compiled Template - Plantillas DOCX precompiladas para renderizado masivo
+Analiza la plantilla una sola vez y genera cada informe desde un clon del XML
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Set, Tuple, Union
+from functools import lru_cache
+from lxml import etree
+from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn
+import logging
+
+from .package_writer import PackageZipWriter, SourcePackage
+from .placeholder_engine import (
+    PlaceholderEngine, iter_story_paragraphs, paragraph_text, replace_in_paragraph
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CompiledPart:
+    """Parte XML de la plantilla (body, header o footer) con placeholders"""
+
+    def __init__(
+        self,
+        name: str,
+        element: etree._Element,
+        paragraph_ordinals: List[int],
+        placeholders: Set[str],
+        fallback_ordinals: Set[int] = frozenset()
+    ):
+        """
+        Args:
+            name: Nombre de la entrada ZIP (ej: 'word/header1.xml')
+            element: Elemento raíz de la parte en la plantilla
+            paragraph_ordinals: Posición (orden de documento) de cada w:p con placeholders
+            placeholders: Variables presentes en la parte
+            fallback_ordinals: Ordinales dentro de mc:Fallback (no se cuentan)
+        """
+        self.name = name
+        self.element = element
+        self.paragraph_ordinals = paragraph_ordinals
+        self.placeholders = placeholders
+        self.fallback_ordinals = fallback_ordinals
+
+
+class CompiledTemplate:
+    """
+    Plantilla precompilada: se analiza una vez y se renderiza muchas veces.
+
+    Al compilar se recorren una única vez el body y cada parte de header/footer
+    y se registran los párrafos que contienen placeholders. Cada renderizado
+    clona solo esas partes XML, reemplaza en los párrafos registrados y copia
+    el resto del paquete ZIP sin volver a analizarlo.
+
+    Tras compilar solo se conservan el paquete original y las partes con
+    placeholders; el Document usado para analizarla se descarta salvo que se
+    pida keep_document (prototipo de new_document()).
+
+    Uso:
+        template = CompiledTemplate("templates/plantilla_desempeno.docx")
+        for datos in registros:
+            template.render(datos, f"informes/{datos['documento']}.docx")
+    """
+
+    STORY_RELTYPES = (RT.HEADER, RT.FOOTER)
+
+    # Memoria de un árbol lxml respecto a su XML serializado (medido con
+    # plantilla_desempeno.docx: ~6.3 veces)
+    PARSED_XML_FACTOR = 7
+
+    def __init__(self, source: Union[str, Path, bytes], keep_document: bool = False):
+        """
+        Args:
+            source: Ruta a la plantilla .docx o su contenido en bytes
+            keep_document: Conservar el Document analizado para que
+                new_document() lo clone en lugar de volver a descomprimir y
+                analizar el paquete (a costa de mantenerlo en memoria)
+        """
+        if isinstance(source, (bytes, bytearray)):
+            self.source_path = None
+            self._blob = bytes(source)
+        else:
+            self.source_path = Path(source)
+            self._blob = self.source_path.read_bytes()
+
+        self.pattern = re.compile(PlaceholderEngine.PLACEHOLDER_PATTERN)
+        self.package = SourcePackage(self._blob)
+
+        document = Document(io.BytesIO(self._blob))
+        self.parts: List[CompiledPart] = self._compile(document)
+        self._document: Optional[Document] = document if keep_document else None
+        self.placeholders: Set[str] = set()
+        for part in self.parts:
+            self.placeholders.update(part.placeholders)
+
+        logger.info(
+            f"Plantilla compilada: {len(self.parts)} partes, "
+            f"{len(self.placeholders)} placeholders únicos"
+        )
+
+    def _iter_story_parts(self, document: Document) -> List[Tuple[str, etree._Element]]:
+        """Retorna (nombre ZIP, elemento raíz) del body y cada header/footer"""
+        main_part = document.part
+        parts = [(main_part.partname.membername, main_part.element)]
+        seen = {main_part.partname}
+
+        for rel in main_part.rels.values():
+            if rel.is_external or rel.reltype not in self.STORY_RELTYPES:
+                continue
+            part = rel.target_part
+            if part.partname in seen:
+                continue
+            seen.add(part.partname)
+            parts.append((part.partname.membername, part.element))
+
+        return parts
+
+    def _compile(self, document: Document) -> List[CompiledPart]:
+        """Recorre cada parte una vez y registra los párrafos con placeholders"""
+        compiled = []
+        pattern = self.pattern
+
+        for name, element in self._iter_story_parts(document):
+            ordinals = []
+            placeholders = set()
+            fallback_ordinals = set()
+            for ordinal, (p, _, in_fallback) in enumerate(iter_story_paragraphs(element)):
+                matches = pattern.findall(paragraph_text(p))
+                if matches:
+                    ordinals.append(ordinal)
+                    if in_fallback:
+                        fallback_ordinals.add(ordinal)
+                    else:
+                        placeholders.update(matches)
+
+            if ordinals:
+                compiled.append(CompiledPart(
+                    name, element, ordinals, placeholders, fallback_ordinals
+                ))
+
+        return compiled
+
+    def validate_data(self, data: Dict[str, str]) -> Dict[str, List[str]]:
+        """
+        Valida los datos contra los placeholders compilados
+
+        Args:
+            data: Dict con valores para reemplazo
+
+        Returns:
+            Dict con 'missing' (placeholders sin datos) y 'unused' (datos sin uso)
+        """
+        provided_keys = set(data.keys())
+        return {
+            'missing': list(self.placeholders - provided_keys),
+            'unused': list(provided_keys - self.placeholders)
+        }
+
+    def new_document(self) -> Document:
+        """
+        Retorna un Document nuevo e independiente con el contenido de la plantilla
+
+        Con keep_document se clona el Document ya analizado: se copian los
+        árboles XML y los binarios de media se comparten (son inmutables).
+        Sin él, el paquete se descomprime y analiza de nuevo.
+        """
+        if self._document is not None:
+            return deepcopy(self._document)
+        return Document(io.BytesIO(self._blob))
+
+    def _render_parts(self, data: Dict[str, str]) -> Tuple[Dict[str, bytes], int]:
+        """Clona y reemplaza las partes compiladas; retorna XML serializado por parte"""
+        rendered = {}
+        total = 0
+
+        for part in self.parts:
+            clone = deepcopy(part.element)
+            targets = iter(part.paragraph_ordinals)
+            next_target = next(targets, None)
+
+            for ordinal, p in enumerate(clone.iter(qn('w:p'))):
+                if ordinal != next_target:
+                    continue
+                count = replace_in_paragraph(p, self.pattern, data)
+                if ordinal not in part.fallback_ordinals:
+                    total += count
+                next_target = next(targets, None)
+                if next_target is None:
+                    break
+
+            rendered[part.name] = etree.tostring(
+                clone, encoding='UTF-8', standalone=True
+            )
+
+        return rendered, total
+
+    def render(
+        self,
+        data: Dict[str, str],
+        output: Union[str, Path, BinaryIO],
+        strict: bool = False
+    ) -> int:
+        """
+        Genera un documento nuevo con los placeholders reemplazados
+
+        Args:
+            data: Dict con valores de reemplazo
+            output: Ruta de salida o stream binario
+            strict: Si True, falla si hay placeholders sin datos
+
+        Returns:
+            Número total de reemplazos realizados
+
+        Raises:
+            ValueError: Si strict=True y hay placeholders sin datos
+        """
+        if strict:
+            missing = self.placeholders - set(data.keys())
+            if missing:
+                raise ValueError(f"Placeholders sin datos: {sorted(missing)}")
+
+        rendered, total = self._render_parts(data)
+
+        if isinstance(output, (str, Path)):
+            output = Path(output)
+            output.parent.mkdir(parents=True, exist_ok=True)
+
+        # Las entradas sin placeholders se copian sin recomprimir
+        with PackageZipWriter(output, self.package) as writer:
+            for info in self.package.zip.infolist():
+                if info.filename in rendered:
+                    writer.write(info.filename, rendered[info.filename])
+                else:
+                    writer.copy(info.filename)
+
+        logger.debug(f"Plantilla renderizada con {total} reemplazos")
+        return total
+
+    def render_bytes(self, data: Dict[str, str], strict: bool = False) -> bytes:
+        """Igual que render() pero retorna el documento generado como bytes"""
+        buffer = io.BytesIO()
+        self.render(data, buffer, strict=strict)
+        return buffer.getvalue()
+
+    @property
+    def estimated_size(self) -> int:
+        """
+        Memoria aproximada: el .docx original más lo que queda analizado
+
+        Sin keep_document son solo los árboles XML de las partes compiladas;
+        con él, todas las partes XML del paquete y la media descomprimida.
+        """
+        entries = self.package.entries
+        if self._document is None:
+            xml_bytes = sum(entries[part.name].file_size for part in self.parts)
+            return len(self._blob) + xml_bytes * self.PARSED_XML_FACTOR
+
+        xml_bytes = media_bytes = 0
+        for info in entries.values():
+            if info.filename.endswith(('.xml', '.rels')):
+                xml_bytes += info.file_size
+            else:
+                media_bytes += info.file_size
+        return len(self._blob) + media_bytes + xml_bytes * self.PARSED_XML_FACTOR
+
+
+class CompiledTemplateCache:
+    """
+    Caché LRU de plantillas compiladas indexado por huella SHA-256.
+
+    Pensado para plantillas que llegan como bytes (uploads de la API): un
+    mismo contenido se descomprime y analiza una sola vez, y los
+    renderizados siguientes parten de la plantilla ya compilada. Las entradas
+    menos usadas se descartan al superar el presupuesto de memoria.
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Memoria máxima estimada de las plantillas cacheadas
+        """
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, Tuple[CompiledTemplate, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def fingerprint(blob: bytes) -> str:
+        """Huella SHA-256 del contenido de una plantilla"""
+        return hashlib.sha256(blob).hexdigest()
+
+    def get(self, blob: bytes, fingerprint: Optional[str] = None) -> CompiledTemplate:
+        """
+        Retorna la plantilla compilada para `blob`, compilándola si no está cacheada
+
+        Args:
+            blob: Contenido del .docx
+            fingerprint: Huella SHA-256 ya calculada (ej: al leer el upload)
+
+        Returns:
+            CompiledTemplate compartida por todas las peticiones con el mismo contenido
+        """
+        key = fingerprint or self.fingerprint(blob)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Se compila fuera del lock; si dos peticiones compilan a la vez, gana la primera
+        template = CompiledTemplate(blob)
+        nbytes = template.estimated_size
+        if nbytes > self.max_bytes:
+            return template
+
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key][0]
+            self._entries[key] = (template, nbytes)
+            self.current_bytes += nbytes
+            self._evict()
+        return template
+
+    def _evict(self) -> None:
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.current_bytes -= nbytes
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Contadores de uso del caché"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+@lru_cache(maxsize=16)
+def _load_compiled(path: str, mtime_ns: int, size: int) -> CompiledTemplate:
+    return CompiledTemplate(path, keep_document=True)
+
+
+def get_compiled_template(template_path: Union[str, Path]) -> CompiledTemplate:
+    """
+    Obtiene la plantilla compilada desde un caché del proceso
+
+    La entrada se invalida automáticamente si el archivo cambia (mtime/tamaño).
+    Conserva el Document analizado, por lo que new_document() clona la
+    plantilla sin volver a descomprimirla.
+
+    Args:
+        template_path: Ruta a la plantilla .docx
+
+    Returns:
+        CompiledTemplate compartida por todas las llamadas del proceso
+    """
+    path = os.path.abspath(template_path)
+    stat = os.stat(path)
+    return _load_compiled(path, stat.st_mtime_ns, stat.st_size)
@@ -2,11 +2,13 @@
 Core Document Processor - Motor principal para edición OOXML
 Optimizado para archivos hasta 20MB con preservación de formato
 """
+import hashlib
+import io
 import os
 import zipfile
 import shutil
 from pathlib import Path
-from typing import Dict, Optional, List, Union
+from typing import BinaryIO, Dict, Optional, List, Union
 from datetime import datetime
 from lxml import etree
 from docx import Document
@@ -14,9 +16,49 @@ from docx.oxml import parse_xml
 from docx.shared import Pt, RGBColor
 import logging
 
+from utils.exceptions import FileSizeExceededError
+from .package_writer import SourcePackage, save_document
+from .story_parts import VARIANTS, iter_header_footer_parts
+
 logger = logging.getLogger(__name__)
 
 
+def copy_limited(
+    source: BinaryIO,
+    target: BinaryIO,
+    max_size: int,
+    chunk_size: int,
+    digest: Optional['hashlib._Hash'] = None
+) -> int:
+    """
+    Copia un stream por bloques deteniéndose si supera `max_size`
+
+    Args:
+        source: Stream de entrada (ej: UploadFile.file)
+        target: Stream de salida
+        max_size: Máximo de bytes permitido
+        chunk_size: Tamaño de cada bloque leído
+        digest: Hash (ej: hashlib.sha256()) actualizado con cada bloque
+
+    Returns:
+        Bytes copiados
+
+    Raises:
+        FileSizeExceededError: Si el stream supera `max_size`
+    """
+    copied = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return copied
+        copied += len(chunk)
+        if copied > max_size:
+            raise FileSizeExceededError(copied / 1024 / 1024, max_size / 1024 / 1024)
+        if digest is not None:
+            digest.update(chunk)
+        target.write(chunk)
+
+
 class DocumentProcessor:
     """Procesador principal de documentos DOCX con enfoque en rendimiento"""
     
@@ -28,43 +70,89 @@ class DocumentProcessor:
     }
     
     MAX_FILE_SIZE = 20 * 1024 * 1024  # 20MB
+    READ_CHUNK_SIZE = 8192  # Bloque de lectura para streams
     
-    def __init__(self, file_path: Union[str, Path]):
+    def __init__(
+        self,
+        source: Union[str, Path, bytes, BinaryIO],
+        chunk_size: Optional[int] = None
+    ):
         """
         Inicializa el procesador con validación de archivo
         
         Args:
-            file_path: Ruta al archivo .docx
+            source: Ruta al archivo .docx, su contenido en bytes o un stream
+                binario (BytesIO, UploadFile.file...). Con bytes o streams el
+                documento se procesa en memoria, sin pasar por disco
+            chunk_size: Bloque de lectura para streams (default: READ_CHUNK_SIZE)
             
         Raises:
             FileNotFoundError: Si el archivo no existe
+            FileSizeExceededError: Si un stream excede el límite de tamaño
             ValueError: Si el archivo excede límite de tamaño
         """
-        self.file_path = Path(file_path)
+        self._blob = None
+        self._chunk_size = chunk_size or self.READ_CHUNK_SIZE
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._blob = bytes(source)
+        elif hasattr(source, 'read'):
+            self._blob = self._read_stream(source)
+        
+        self.file_path = None if self._blob is not None else Path(source)
         self._validate_file()
         self.document = None
         self._backup_path = None
+        self._source = None
+    
+    def _read_stream(self, stream: BinaryIO) -> bytes:
+        """Lee un stream por bloques; deja de leer en cuanto excede el límite"""
+        buffer = io.BytesIO()
+        copy_limited(stream, buffer, self.MAX_FILE_SIZE, self._chunk_size)
+        return buffer.getvalue()
+    
+    @property
+    def in_memory(self) -> bool:
+        """True si el documento se recibió como bytes o stream"""
+        return self.file_path is None
+    
+    @property
+    def _display_name(self) -> str:
+        return str(self.file_path) if self.file_path else '<memoria>'
         
     def _validate_file(self) -> None:
         """Valida existencia y tamaño del archivo"""
-        if not self.file_path.exists():
-            raise FileNotFoundError(f"Archivo no encontrado: {self.file_path}")
+        if self.in_memory:
+            file_size = len(self._blob)
+        else:
+            if not self.file_path.exists():
+                raise FileNotFoundError(f"Archivo no encontrado: {self.file_path}")
+            file_size = self.file_path.stat().st_size
         
-        file_size = self.file_path.stat().st_size
         if file_size > self.MAX_FILE_SIZE:
             raise ValueError(
                 f"Archivo excede límite de {self.MAX_FILE_SIZE/1024/1024}MB: "
                 f"{file_size/1024/1024:.2f}MB"
             )
         
-        if not zipfile.is_zipfile(self.file_path):
+        if not zipfile.is_zipfile(self._open_source()):
             raise ValueError("Archivo no es un documento .docx válido")
     
+    def _open_source(self) -> Union[Path, io.BytesIO]:
+        """Ruta o stream en memoria del documento original"""
+        if self.in_memory:
+            return io.BytesIO(self._blob)
+        return self.file_path
+    
     def load(self) -> 'DocumentProcessor':
         """Carga el documento en memoria"""
         try:
-            logger.info(f"Cargando documento: {self.file_path}")
-            self.document = Document(self.file_path)
+            logger.info(f"Cargando documento: {self._display_name}")
+            # Se conserva el paquete original para reutilizarlo al guardar
+            if self.in_memory:
+                self._source = SourcePackage(self._blob)
+            else:
+                self._source = SourcePackage.from_path(self.file_path)
+            self.document = Document(io.BytesIO(self._source.blob))
             logger.debug(f"Documento cargado: {len(self.document.paragraphs)} párrafos")
             return self
         except Exception as e:
@@ -76,33 +164,48 @@ class DocumentProcessor:
         Crea backup timestamped del documento original
         
         Args:
-            backup_dir: Directorio para backups (default: mismo directorio)
+            backup_dir: Directorio para backups (default: mismo directorio).
+                Obligatorio si el documento se cargó desde memoria
             
         Returns:
             Path del backup creado
         """
         if backup_dir is None:
+            if self.in_memory:
+                raise RuntimeError("Documento en memoria: indicar backup_dir")
             backup_dir = self.file_path.parent
         else:
             backup_dir = Path(backup_dir)
             backup_dir.mkdir(parents=True, exist_ok=True)
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"{self.file_path.stem}.backup.{timestamp}{self.file_path.suffix}"
-        backup_path = backup_dir / backup_name
+        if self.in_memory:
+            backup_path = backup_dir / f"documento.backup.{timestamp}.docx"
+            backup_path.write_bytes(self._blob)
+        else:
+            backup_name = f"{self.file_path.stem}.backup.{timestamp}{self.file_path.suffix}"
+            backup_path = backup_dir / backup_name
+            shutil.copy2(self.file_path, backup_path)
         
-        shutil.copy2(self.file_path, backup_path)
         self._backup_path = backup_path
         logger.info(f"Backup creado: {backup_path}")
         
         return backup_path
     
-    def save(self, output_path: Optional[Union[str, Path]] = None) -> Path:
+    def save(
+        self,
+        output_path: Optional[Union[str, Path]] = None,
+        reuse_compressed: bool = True
+    ) -> Path:
         """
         Guarda el documento modificado
         
         Args:
-            output_path: Ruta de salida (default: sobrescribe original)
+            output_path: Ruta de salida (default: sobrescribe original).
+                Obligatoria si el documento se cargó desde memoria
+            reuse_compressed: Copiar sin recomprimir las partes que no cambiaron
+                (imágenes, estilos, temas...). Si False, python-docx recomprime
+                todo el paquete
             
         Returns:
             Path del archivo guardado
@@ -111,6 +214,8 @@ class DocumentProcessor:
             raise RuntimeError("Documento no cargado. Ejecutar load() primero")
         
         if output_path is None:
+            if self.in_memory:
+                raise RuntimeError("Documento en memoria: usar to_bytes() o indicar output_path")
             output_path = self.file_path
         else:
             output_path = Path(output_path)
@@ -118,13 +223,44 @@ class DocumentProcessor:
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
         try:
-            self.document.save(output_path)
+            self.write_to(output_path, reuse_compressed=reuse_compressed)
             logger.info(f"Documento guardado: {output_path}")
             return output_path
         except Exception as e:
             logger.error(f"Error al guardar documento: {e}")
             raise
     
+    def write_to(
+        self,
+        stream: Union[str, Path, BinaryIO],
+        reuse_compressed: bool = True
+    ) -> None:
+        """
+        Escribe el documento en una ruta o stream binario sin crear directorios
+        
+        Args:
+            stream: Ruta o stream binario de salida
+            reuse_compressed: Copiar sin recomprimir las partes que no cambiaron
+        """
+        if self.document is None:
+            raise RuntimeError("Documento no cargado. Ejecutar load() primero")
+        
+        if reuse_compressed and self._source is not None:
+            save_document(self.document, self._source, stream)
+        else:
+            self.document.save(stream)
+    
+    def to_bytes(self, reuse_compressed: bool = True) -> bytes:
+        """
+        Serializa el documento modificado en memoria
+        
+        Returns:
+            Contenido .docx como bytes
+        """
+        buffer = io.BytesIO()
+        self.write_to(buffer, reuse_compressed=reuse_compressed)
+        return buffer.getvalue()
+    
     def get_sections(self) -> List:
         """Obtiene todas las secciones del documento"""
         if self.document is None:
@@ -172,7 +308,9 @@ class DocumentProcessor:
             'paragraphs': len(self.document.paragraphs),
             'sections': len(self.document.sections),
             'tables': len(self.document.tables),
-            'file_size_bytes': self.file_path.stat().st_size,
+            'file_size_bytes': (
+                len(self._blob) if self.in_memory else self.file_path.stat().st_size
+            ),
         }
     
     def extract_text(self, include_headers_footers: bool = False) -> str:
@@ -194,17 +332,11 @@ class DocumentProcessor:
         for para in self.document.paragraphs:
             text_parts.append(para.text)
         
-        # Headers y footers
+        # Headers y footers (cada parte una vez, aunque la compartan secciones)
         if include_headers_footers:
-            for section in self.document.sections:
-                # Headers
-                if section.header:
-                    for para in section.header.paragraphs:
-                        text_parts.append(para.text)
-                # Footers
-                if section.footer:
-                    for para in section.footer.paragraphs:
-                        text_parts.append(para.text)
+            for story_part in iter_header_footer_parts(self.document, variants=VARIANTS):
+                for para in story_part.story.paragraphs:
+                    text_parts.append(para.text)
         
         return '\n'.join(text_parts)
     
@@ -224,7 +356,7 @@ class DocumentProcessor:
         
         try:
             # Validar ZIP
-            with zipfile.ZipFile(self.file_path, 'r') as zf:
+            with zipfile.ZipFile(self._open_source(), 'r') as zf:
                 results['is_valid_zip'] = True
                 
                 # Validar estructura
@@ -11,6 +11,9 @@ from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml.ns import qn
 from docx.oxml import OxmlElement
+from .story_parts import (
+    HEADER_FOOTER_ATTRS, VARIANTS, iter_header_footer_parts, resolve_header_footer
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,12 +33,13 @@ class FooterEditor:
         """Retorna el número de secciones en el documento"""
         return len(self.document.sections)
 
-    def get_footer(self, section_idx: int = 0) -> Optional[object]:
+    def get_footer(self, section_idx: int = 0, variant: str = 'default') -> Optional[object]:
         """
         Obtiene el footer de una sección específica
 
         Args:
             section_idx: Índice de la sección (default: 0)
+            variant: 'default', 'first_page' o 'even_page'
 
         Returns:
             Objeto footer o None si no existe
@@ -44,19 +48,38 @@ class FooterEditor:
         if section_idx >= len(sections):
             raise IndexError(f"Sección {section_idx} no existe. Total: {len(sections)}")
 
-        return sections[section_idx].footer
+        return getattr(sections[section_idx], HEADER_FOOTER_ATTRS[('footers', variant)])
 
-    def get_footer_text(self, section_idx: int = 0) -> str:
+    def _find_footer(self, section_idx: int = 0, variant: str = 'default') -> Optional[object]:
+        """
+        Obtiene el footer que usa una sección sin crear partes nuevas
+
+        Args:
+            section_idx: Índice de la sección
+            variant: 'default', 'first_page' o 'even_page'
+
+        Returns:
+            Objeto footer o None si el documento no define ninguno
+        """
+        sections = self.document.sections
+        if section_idx >= len(sections):
+            raise IndexError(f"Sección {section_idx} no existe. Total: {len(sections)}")
+
+        story_part = resolve_header_footer(self.document, section_idx, 'footers', variant)
+        return story_part.story if story_part else None
+
+    def get_footer_text(self, section_idx: int = 0, variant: str = 'default') -> str:
         """
         Obtiene el texto del footer de una sección
 
         Args:
             section_idx: Índice de la sección
+            variant: 'default', 'first_page' o 'even_page'
 
         Returns:
             Texto completo del footer
         """
-        footer = self.get_footer(section_idx)
+        footer = self._find_footer(section_idx, variant)
         if footer is None:
             return ""
 
@@ -76,7 +99,7 @@ class FooterEditor:
         Returns:
             Lista de diccionarios con texto y formato de cada párrafo
         """
-        footer = self.get_footer(section_idx)
+        footer = self._find_footer(section_idx)
         if footer is None:
             return []
 
@@ -118,7 +141,8 @@ class FooterEditor:
         text: str,
         section_idx: int = 0,
         preserve_format: bool = True,
-        alignment: Optional[WD_ALIGN_PARAGRAPH] = None
+        alignment: Optional[WD_ALIGN_PARAGRAPH] = None,
+        variant: str = 'default'
     ) -> None:
         """
         Actualiza el texto del footer preservando formato
@@ -128,9 +152,21 @@ class FooterEditor:
             section_idx: Índice de la sección
             preserve_format: Mantener formato del primer run existente
             alignment: Alineación del párrafo (opcional)
+            variant: 'default', 'first_page' o 'even_page'
         """
-        footer = self.get_footer(section_idx)
+        self._write_footer_text(
+            self.get_footer(section_idx, variant), text, preserve_format, alignment
+        )
+        logger.info(f"Footer actualizado en sección {section_idx}")
 
+    def _write_footer_text(
+        self,
+        footer,
+        text: str,
+        preserve_format: bool = True,
+        alignment: Optional[WD_ALIGN_PARAGRAPH] = None
+    ) -> None:
+        """Reemplaza el contenido de un footer por `text` (ver update_footer_text)"""
         # Guardar formato del primer run si existe
         saved_format = None
         if preserve_format and footer.paragraphs:
@@ -160,8 +196,6 @@ class FooterEditor:
         if alignment:
             paragraph.alignment = alignment
 
-        logger.info(f"Footer actualizado en sección {section_idx}")
-
     def _extract_run_format(self, run: Run) -> Dict:
         """Extrae el formato de un run"""
         return {
@@ -237,6 +271,10 @@ class FooterEditor:
         """
         Aplica el mismo footer a todas las secciones
 
+        Incluye los footers de primera página y de páginas pares que existan.
+        Las secciones vinculadas comparten la parte del footer, por lo que cada
+        parte distinta se reescribe una sola vez.
+
         Args:
             text: Texto para el footer
             preserve_format: Preservar formato existente
@@ -244,12 +282,15 @@ class FooterEditor:
         Returns:
             Número de secciones actualizadas
         """
-        count = 0
-        for idx in range(len(self.document.sections)):
-            self.update_footer_text(text, section_idx=idx, preserve_format=preserve_format)
-            count += 1
-
-        logger.info(f"Footer aplicado a {count} secciones")
+        parts = 0
+        for story_part in iter_header_footer_parts(
+            self.document, ('footers',), VARIANTS, create_missing=True
+        ):
+            self._write_footer_text(story_part.story, text, preserve_format)
+            parts += 1
+
+        count = len(self.document.sections)
+        logger.info(f"Footer aplicado a {count} secciones ({parts} partes)")
         return count
 
     def add_page_number(
@@ -317,14 +358,15 @@ class FooterEditor:
         run._r.append(instr_text)
         run._r.append(fld_char_end)
 
-    def clear_footer(self, section_idx: int = 0) -> None:
+    def clear_footer(self, section_idx: int = 0, variant: str = 'default') -> None:
         """
         Limpia completamente el footer de una sección
 
         Args:
             section_idx: Índice de la sección
+            variant: 'default', 'first_page' o 'even_page'
         """
-        footer = self.get_footer(section_idx)
+        footer = self.get_footer(section_idx, variant)
         for paragraph in footer.paragraphs:
             paragraph.clear()
 
@@ -0,0 +1,269 @@
+"""
+Image Cache - Caché LRU de imágenes leídas desde disco
+Compartida por todo el proceso para reutilizar logos y firmas entre informes
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+import logging
+
+try:
+    from PIL import Image as PILImage
+except ImportError:  # Pillow es opcional: sin él no se redimensiona
+    PILImage = None
+
+logger = logging.getLogger(__name__)
+
+EMU_PER_INCH = 914400
+
+# Formatos que se pueden re-codificar; BMP y TIFF se convierten a PNG
+RESIZABLE_CONTENT_TYPES = {
+    'image/png': ('PNG', 'image/png'),
+    'image/jpeg': ('JPEG', 'image/jpeg'),
+    'image/bmp': ('PNG', 'image/png'),
+    'image/tiff': ('PNG', 'image/png'),
+}
+
+# Firmas de formato (magic bytes) -> content type
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+)
+
+EXTENSION_CONTENT_TYPES = {
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp',
+    '.tiff': 'image/tiff',
+    '.tif': 'image/tiff',
+}
+
+
+def detect_content_type(blob: bytes, path: Optional[Union[str, Path]] = None) -> Optional[str]:
+    """
+    Detecta el content type de una imagen por su firma y, si no, por extensión
+
+    Args:
+        blob: Contenido de la imagen
+        path: Ruta original (para el respaldo por extensión)
+
+    Returns:
+        Content type o None si no se reconoce
+    """
+    for signature, content_type in IMAGE_SIGNATURES:
+        if blob.startswith(signature):
+            return content_type
+    if path is not None:
+        return EXTENSION_CONTENT_TYPES.get(Path(path).suffix.lower())
+    return None
+
+
+class CachedImage(NamedTuple):
+    """Imagen cargada: contenido, content type y hash SHA-256"""
+    blob: bytes
+    content_type: Optional[str]
+    sha256: str
+
+
+def target_pixels(width_emu: int, height_emu: int, dpi: int) -> Tuple[int, int]:
+    """Píxeles necesarios para mostrar un extent (EMUs) a la resolución `dpi`"""
+    return (
+        max(1, round(width_emu / EMU_PER_INCH * dpi)),
+        max(1, round(height_emu / EMU_PER_INCH * dpi)),
+    )
+
+
+def downscale_image(
+    image: CachedImage,
+    max_width: int,
+    max_height: int,
+    jpeg_quality: int = 85
+) -> CachedImage:
+    """
+    Reduce una imagen a como máximo max_width x max_height píxeles y la re-codifica
+
+    Cada eje se limita por separado: Word estira la imagen al extent del
+    drawing, así que la proporción original no se altera visualmente.
+    Retorna la imagen original si Pillow no está instalado, el formato no se
+    puede re-codificar, ya es suficientemente pequeña o el resultado no es
+    más liviano.
+
+    Args:
+        image: Imagen original
+        max_width: Ancho máximo en píxeles
+        max_height: Alto máximo en píxeles
+        jpeg_quality: Calidad de re-codificación JPEG
+
+    Returns:
+        Imagen reducida o la original
+    """
+    if PILImage is None or image.content_type not in RESIZABLE_CONTENT_TYPES:
+        return image
+
+    pil_format, content_type = RESIZABLE_CONTENT_TYPES[image.content_type]
+    with PILImage.open(io.BytesIO(image.blob)) as img:
+        size = (min(img.width, max_width), min(img.height, max_height))
+        if size == (img.width, img.height):
+            return image
+
+        if pil_format == 'JPEG' and img.mode not in ('RGB', 'L', 'CMYK'):
+            img = img.convert('RGB')
+        elif img.mode == 'P':
+            img = img.convert('RGBA')
+
+        resized = img.resize(size, PILImage.LANCZOS)
+        output = io.BytesIO()
+        if pil_format == 'JPEG':
+            resized.save(output, 'JPEG', quality=jpeg_quality, optimize=True)
+        else:
+            resized.save(output, 'PNG', optimize=True)
+
+    blob = output.getvalue()
+    if len(blob) >= len(image.blob):
+        return image
+
+    logger.debug(f"Imagen reducida a {size[0]}x{size[1]}px: {len(image.blob)} -> {len(blob)} bytes")
+    return CachedImage(blob, content_type, hashlib.sha256(blob).hexdigest())
+
+
+class ImageBlobCache:
+    """
+    Caché LRU de imágenes con límite de memoria.
+
+    La clave es (ruta absoluta, mtime_ns, tamaño), por lo que un archivo
+    modificado en disco se vuelve a leer automáticamente.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Memoria máxima ocupada por los blobs cacheados
+        """
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple, Tuple[CachedImage, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _lookup(self, key: Tuple) -> Optional[CachedImage]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _store(self, key: Tuple, image: CachedImage) -> None:
+        nbytes = len(image.blob)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (image, nbytes)
+                self.current_bytes += nbytes
+                self._evict()
+
+    def get(self, path: Union[str, Path]) -> CachedImage:
+        """
+        Retorna la imagen de `path`, leyéndola de disco solo si no está cacheada
+
+        Raises:
+            FileNotFoundError: Si el archivo no existe
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        with open(path, 'rb') as f:
+            blob = f.read()
+        image = CachedImage(
+            blob, detect_content_type(blob, path), hashlib.sha256(blob).hexdigest()
+        )
+        self._store(key, image)
+        return image
+
+    def get_fitted(
+        self,
+        path: Union[str, Path],
+        width_emu: int,
+        height_emu: int,
+        dpi: int,
+        jpeg_quality: int = 85
+    ) -> CachedImage:
+        """
+        Retorna la imagen reducida a la resolución necesaria para un extent
+
+        El resultado se cachea por contenido (SHA-256) y tamaño destino, así
+        que la misma imagen en el mismo hueco se re-codifica una sola vez.
+
+        Args:
+            path: Ruta a la imagen
+            width_emu: Ancho mostrado en EMUs
+            height_emu: Alto mostrado en EMUs
+            dpi: Resolución objetivo
+            jpeg_quality: Calidad de re-codificación JPEG
+        """
+        image = self.get(path)
+        size = target_pixels(width_emu, height_emu, dpi)
+        key = ('fitted', image.sha256, size, jpeg_quality)
+
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        fitted = downscale_image(image, size[0], size[1], jpeg_quality)
+        # Si no se redujo, la entrada comparte el blob original; se cuenta
+        # igual porque lo mantiene en memoria aunque se descarte la original
+        self._store(key, fitted)
+        return fitted
+
+    def _evict(self) -> None:
+        while self.current_bytes > self.max_bytes and self._entries:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self.current_bytes -= nbytes
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Contadores de uso del caché"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+# Caché compartido por todos los ImageReplacer del proceso
+_default_cache = ImageBlobCache()
+
+
+def get_image_cache() -> ImageBlobCache:
+    """Retorna el caché de imágenes del proceso"""
+    return _default_cache
@@ -19,6 +19,11 @@ import os
 import io
 import logging
 
+from .image_cache import (
+    CachedImage, ImageBlobCache, get_image_cache
+)
+from .story_parts import VARIANTS, iter_header_footer_parts, resolve_header_footer
+
 logger = logging.getLogger(__name__)
 
 # Namespaces OOXML para imágenes
@@ -45,7 +50,8 @@ class ImageInfo:
         width_emu: Optional[int] = None,
         height_emu: Optional[int] = None,
         is_inline: bool = True,
-        drawing_element: Optional[etree._Element] = None
+        drawing_element: Optional[etree._Element] = None,
+        variant: str = 'default'
     ):
         self.rel_id = rel_id
         self.target = target
@@ -56,6 +62,7 @@ class ImageInfo:
         self.height_emu = height_emu
         self.is_inline = is_inline  # True for inline, False for anchor
         self.drawing_element = drawing_element
+        self.variant = variant  # 'default', 'first_page', 'even_page'
     
     @property
     def width_inches(self) -> Optional[float]:
@@ -83,7 +90,8 @@ class ImageInfo:
             'height_emu': self.height_emu,
             'width_inches': self.width_inches,
             'height_inches': self.height_inches,
-            'is_inline': self.is_inline
+            'is_inline': self.is_inline,
+            'variant': self.variant
         }
 
 
@@ -100,90 +108,199 @@ class ImageReplacer:
         replacer.replace_body_image_by_index(5, "nueva_imagen.png")
     """
     
-    def __init__(self, document: Document):
+    def __init__(
+        self,
+        document: Document,
+        blob_cache: Optional[ImageBlobCache] = None,
+        max_dpi: Optional[int] = None,
+        jpeg_quality: int = 85
+    ):
         """
         Inicializa el reemplazador de imágenes.
         
         Args:
             document: Documento Word cargado con python-docx
+            blob_cache: Caché de imágenes nuevas (default: caché del proceso)
+            max_dpi: Si se indica, las imágenes nuevas se reducen a la
+                resolución necesaria para su tamaño mostrado (requiere Pillow)
+            jpeg_quality: Calidad al re-codificar imágenes JPEG reducidas
         """
         self.document = document
-        self._image_cache: Dict[str, List[ImageInfo]] = {}
-        self._scan_images()
+        self.blob_cache = blob_cache or get_image_cache()
+        self.max_dpi = max_dpi
+        self.jpeg_quality = jpeg_quality
+        # Partes de imagen reemplazadas: id(parte) -> (parte, sha256)
+        self._replaced_media: Dict[int, Tuple[object, str]] = {}
+        # Imágenes escaneadas bajo demanda: (ubicación, sección, variante) -> lista
+        self._image_cache: Dict[Tuple[str, int, str], List[ImageInfo]] = {}
+        # Índices rel_id -> drawing por elemento raíz de cada parte
+        self._drawings: Dict[etree._Element, Dict[str, Dict]] = {}
     
-    def _scan_images(self) -> None:
-        """Escanea todas las imágenes del documento y las cachea."""
-        self._image_cache = {
-            'headers': [],
-            'footers': [],
-            'body': []
-        }
+    def _images(
+        self,
+        location: str,
+        section_idx: int = 0,
+        variant: str = 'default'
+    ) -> List[ImageInfo]:
+        """
+        Imágenes de una ubicación, escaneando la parte solo la primera vez.
         
-        # Escanear headers y footers
-        for section_idx, section in enumerate(self.document.sections):
-            if section.header:
-                self._scan_part_images(
-                    section.header, 'headers', section_idx
-                )
-            if section.footer:
-                self._scan_part_images(
-                    section.footer, 'footers', section_idx
+        Los reemplazos no alteran rel_ids ni drawings, así que el resultado
+        sigue siendo válido durante todo un batch.
+        
+        Args:
+            location: 'headers', 'footers' o 'body'
+            section_idx: Índice de sección (ignorado para 'body')
+            variant: 'default', 'first_page' o 'even_page' (ignorado para 'body')
+            
+        Returns:
+            Lista de ImageInfo (vacía si la sección no existe)
+        """
+        if location == 'body':
+            section_idx, variant = 0, 'default'
+        key = (location, section_idx, variant)
+        images = self._image_cache.get(key)
+        if images is not None:
+            return images
+        
+        if location == 'body':
+            images = self._scan_body_images()
+        else:
+            story_part = resolve_header_footer(self.document, section_idx, location, variant)
+            if story_part is None:
+                images = []
+            elif story_part.section_idx != section_idx:
+                # Sección vinculada: comparte la parte de una sección anterior
+                images = self._images(location, story_part.section_idx, variant)
+            else:
+                images = self._scan_part_images(
+                    story_part.story, location, section_idx, variant
                 )
         
-        # Escanear cuerpo del documento
-        self._scan_body_images()
+        self._image_cache[key] = images
+        return images
     
     def _scan_part_images(
         self,
         part,
         location: str,
-        section_idx: int
-    ) -> None:
+        section_idx: int,
+        variant: str = 'default'
+    ) -> List[ImageInfo]:
         """Escanea imágenes en una parte del documento (header/footer)."""
-        index = 0
+        drawings = self._drawing_index(part._element)
+        images = []
         for rel_id, rel in part.part.rels.items():
             if 'image' in rel.reltype:
-                # Buscar el elemento drawing correspondiente
-                drawing_info = self._find_drawing_by_rel_id(
-                    part._element, rel_id
-                )
-                
-                info = ImageInfo(
-                    rel_id=rel_id,
-                    target=rel.target_ref,
-                    location=location,
-                    section_idx=section_idx,
-                    index=index,
-                    width_emu=drawing_info.get('width'),
-                    height_emu=drawing_info.get('height'),
-                    is_inline=drawing_info.get('is_inline', True),
-                    drawing_element=drawing_info.get('element')
-                )
-                self._image_cache[location].append(info)
-                index += 1
+                images.append(self._build_image_info(
+                    rel_id, rel, drawings, location, section_idx, len(images), variant
+                ))
+        return images
     
-    def _scan_body_images(self) -> None:
-        """Escanea imágenes en el cuerpo del documento."""
-        index = 0
-        for rel_id, rel in self.document.part.rels.items():
-            if 'image' in rel.reltype:
-                # Buscar el elemento drawing correspondiente
-                drawing_info = self._find_drawing_by_rel_id(
-                    self.document.element, rel_id
-                )
-                
-                info = ImageInfo(
-                    rel_id=rel_id,
-                    target=rel.target_ref,
-                    location='body',
-                    index=index,
-                    width_emu=drawing_info.get('width'),
-                    height_emu=drawing_info.get('height'),
-                    is_inline=drawing_info.get('is_inline', True),
-                    drawing_element=drawing_info.get('element')
-                )
-                self._image_cache['body'].append(info)
-                index += 1
+    def _scan_body_images(self) -> List[ImageInfo]:
+        """
+        Escanea imágenes en el cuerpo del documento.
+        
+        Se ordenan por su primera aparición en el documento; las imágenes
+        sin drawing (ej: solo referenciadas desde VML) van al final.
+        """
+        drawings = self._drawing_index(self.document.element)
+        position = {rel_id: pos for pos, rel_id in enumerate(drawings)}
+        image_rels = sorted(
+            (
+                (rel_id, rel) for rel_id, rel in self.document.part.rels.items()
+                if 'image' in rel.reltype
+            ),
+            key=lambda item: position.get(item[0], len(position))
+        )
+        return [
+            self._build_image_info(rel_id, rel, drawings, 'body', 0, index)
+            for index, (rel_id, rel) in enumerate(image_rels)
+        ]
+    
+    @staticmethod
+    def _build_image_info(
+        rel_id: str,
+        rel,
+        drawings: Dict[str, Dict],
+        location: str,
+        section_idx: int,
+        index: int,
+        variant: str = 'default'
+    ) -> ImageInfo:
+        drawing_info = drawings.get(rel_id, {})
+        return ImageInfo(
+            rel_id=rel_id,
+            target=rel.target_ref,
+            location=location,
+            section_idx=section_idx,
+            index=index,
+            width_emu=drawing_info.get('width'),
+            height_emu=drawing_info.get('height'),
+            is_inline=drawing_info.get('is_inline', True),
+            drawing_element=drawing_info.get('element'),
+            variant=variant
+        )
+    
+    def _drawing_index(self, root_element: etree._Element) -> Dict[str, Dict]:
+        """
+        Mapa rel_id -> información del drawing, construido en una sola pasada.
+        
+        El mapa se cachea por elemento raíz y conserva el orden del documento;
+        si un rel_id aparece en varios drawings, gana el primero.
+        
+        Args:
+            root_element: Elemento raíz XML de la parte
+            
+        Returns:
+            Dict rel_id -> {width, height, is_inline, element}
+        """
+        index = self._drawings.get(root_element)
+        if index is not None:
+            return index
+        
+        index = {}
+        for drawing in root_element.iter(qn('w:drawing')):
+            info = None
+            for blip in drawing.iter(qn('a:blip')):
+                embed = blip.get(qn('r:embed'))
+                if not embed or embed in index:
+                    continue
+                if info is None:
+                    info = self._drawing_info(drawing)
+                index[embed] = info
+        
+        self._drawings[root_element] = index
+        return index
+    
+    @staticmethod
+    def _drawing_info(drawing: etree._Element) -> Dict:
+        """Extrae extent y tipo (inline/anchor) de un elemento w:drawing."""
+        result = {
+            'width': None,
+            'height': None,
+            'is_inline': True,
+            'element': drawing
+        }
+        
+        # Determinar si es inline o anchor
+        inline = drawing.find('.//wp:inline', NAMESPACES)
+        anchor = drawing.find('.//wp:anchor', NAMESPACES)
+        
+        extent_parent = inline if inline is not None else anchor
+        result['is_inline'] = inline is not None
+        
+        if extent_parent is not None:
+            extent = extent_parent.find('wp:extent', NAMESPACES)
+            if extent is not None:
+                cx = extent.get('cx')
+                cy = extent.get('cy')
+                if cx:
+                    result['width'] = int(cx)
+                if cy:
+                    result['height'] = int(cy)
+        
+        return result
     
     def _find_drawing_by_rel_id(
         self,
@@ -200,71 +317,45 @@ class ImageReplacer:
         Returns:
             Dict con información del drawing (width, height, is_inline, element)
         """
-        result = {
-            'width': None,
-            'height': None,
-            'is_inline': True,
-            'element': None
-        }
-        
-        # Buscar en elementos inline
-        for drawing in root_element.iter(qn('w:drawing')):
-            # Buscar blip con el rel_id
-            for blip in drawing.iter(qn('a:blip')):
-                embed = blip.get(qn('r:embed'))
-                if embed == rel_id:
-                    result['element'] = drawing
-                    
-                    # Determinar si es inline o anchor
-                    inline = drawing.find('.//wp:inline', NAMESPACES)
-                    anchor = drawing.find('.//wp:anchor', NAMESPACES)
-                    
-                    extent_parent = inline if inline is not None else anchor
-                    result['is_inline'] = inline is not None
-                    
-                    if extent_parent is not None:
-                        extent = extent_parent.find('wp:extent', NAMESPACES)
-                        if extent is not None:
-                            cx = extent.get('cx')
-                            cy = extent.get('cy')
-                            if cx:
-                                result['width'] = int(cx)
-                            if cy:
-                                result['height'] = int(cy)
-                    
-                    return result
-        
-        return result
+        info = self._drawing_index(root_element).get(rel_id)
+        if info is None:
+            return {'width': None, 'height': None, 'is_inline': True, 'element': None}
+        # Releer el extent: set_image_dimensions pudo modificarlo
+        return self._drawing_info(info['element'])
     
-    def get_header_images_info(self, section_idx: int = 0) -> List[ImageInfo]:
+    def get_header_images_info(
+        self,
+        section_idx: int = 0,
+        variant: str = 'default'
+    ) -> List[ImageInfo]:
         """
         Obtiene información sobre las imágenes en el header de una sección.
         
         Args:
             section_idx: Índice de la sección (por defecto 0)
+            variant: 'default', 'first_page' o 'even_page'
             
         Returns:
             Lista de ImageInfo con información de cada imagen
         """
-        return [
-            img for img in self._image_cache['headers']
-            if img.section_idx == section_idx
-        ]
+        return list(self._images('headers', section_idx, variant))
     
-    def get_footer_images_info(self, section_idx: int = 0) -> List[ImageInfo]:
+    def get_footer_images_info(
+        self,
+        section_idx: int = 0,
+        variant: str = 'default'
+    ) -> List[ImageInfo]:
         """
         Obtiene información sobre las imágenes en el footer de una sección.
         
         Args:
             section_idx: Índice de la sección (por defecto 0)
+            variant: 'default', 'first_page' o 'even_page'
             
         Returns:
             Lista de ImageInfo con información de cada imagen
         """
-        return [
-            img for img in self._image_cache['footers']
-            if img.section_idx == section_idx
-        ]
+        return list(self._images('footers', section_idx, variant))
     
     def get_body_images_info(self) -> List[ImageInfo]:
         """
@@ -273,7 +364,7 @@ class ImageReplacer:
         Returns:
             Lista de ImageInfo con información de cada imagen
         """
-        return self._image_cache['body']
+        return self._images('body')
     
     def get_all_images_info(self) -> Dict[str, List[Dict]]:
         """
@@ -282,18 +373,25 @@ class ImageReplacer:
         Returns:
             Diccionario con imágenes organizadas por ubicación
         """
-        return {
-            'headers': [img.to_dict() for img in self._image_cache['headers']],
-            'footers': [img.to_dict() for img in self._image_cache['footers']],
-            'body': [img.to_dict() for img in self._image_cache['body']]
-        }
+        # Cada parte distinta una sola vez (incluidas primera página y pares):
+        # las secciones vinculadas no se repiten
+        info = {'headers': [], 'footers': []}
+        for story_part in iter_header_footer_parts(self.document, variants=VARIANTS):
+            info[story_part.location].extend(
+                img.to_dict() for img in self._images(
+                    story_part.location, story_part.section_idx, story_part.variant
+                )
+            )
+        info['body'] = [img.to_dict() for img in self._images('body')]
+        return info
     
     def replace_header_image(
         self,
         section_idx: int,
         new_image_path: str,
         image_index: int = 0,
-        preserve_dimensions: bool = True
+        preserve_dimensions: bool = True,
+        variant: str = 'default'
     ) -> bool:
         """
         Reemplaza una imagen en el header de una sección.
@@ -305,6 +403,7 @@ class ImageReplacer:
             new_image_path: Ruta a la nueva imagen
             image_index: Índice de la imagen en el header (si hay varias)
             preserve_dimensions: Si True, mantiene dimensiones originales
+            variant: 'default', 'first_page' o 'even_page'
             
         Returns:
             True si se reemplazó correctamente
@@ -318,12 +417,11 @@ class ImageReplacer:
             logger.error(f"Imagen no encontrada: {new_image_path}")
             return False
         
-        section = self.document.sections[section_idx]
-        header = section.header
-        
-        if not header:
+        story_part = resolve_header_footer(self.document, section_idx, 'headers', variant)
+        if story_part is None:
             logger.error(f"La sección {section_idx} no tiene header")
             return False
+        header = story_part.story
         
         # Encontrar la imagen a reemplazar
         image_rels = []
@@ -337,16 +435,8 @@ class ImageReplacer:
         
         rel_id, old_rel = image_rels[image_index]
         
-        # Leer nueva imagen
-        with open(new_image_path, 'rb') as f:
-            image_data = f.read()
-        
-        # Reemplazar el contenido de la imagen
-        image_part = old_rel.target_part
-        image_part._blob = image_data
-        
-        # Actualizar content type si es necesario
-        self._update_content_type(image_part, new_image_path)
+        # Reemplazar el contenido de la imagen (leída desde el caché)
+        self._set_image(old_rel.target_part, new_image_path, header._element, rel_id)
         
         logger.info(f"Imagen del header reemplazada: {new_image_path}")
         return True
@@ -356,7 +446,8 @@ class ImageReplacer:
         section_idx: int,
         new_image_path: str,
         image_index: int = 0,
-        preserve_dimensions: bool = True
+        preserve_dimensions: bool = True,
+        variant: str = 'default'
     ) -> bool:
         """
         Reemplaza una imagen en el footer de una sección.
@@ -366,6 +457,7 @@ class ImageReplacer:
             new_image_path: Ruta a la nueva imagen
             image_index: Índice de la imagen en el footer
             preserve_dimensions: Si True, mantiene dimensiones originales
+            variant: 'default', 'first_page' o 'even_page'
             
         Returns:
             True si se reemplazó correctamente
@@ -379,12 +471,11 @@ class ImageReplacer:
             logger.error(f"Imagen no encontrada: {new_image_path}")
             return False
         
-        section = self.document.sections[section_idx]
-        footer = section.footer
-        
-        if not footer:
+        story_part = resolve_header_footer(self.document, section_idx, 'footers', variant)
+        if story_part is None:
             logger.error(f"La sección {section_idx} no tiene footer")
             return False
+        footer = story_part.story
         
         image_rels = []
         for rel_id, rel in footer.part.rels.items():
@@ -397,13 +488,7 @@ class ImageReplacer:
         
         rel_id, old_rel = image_rels[image_index]
         
-        with open(new_image_path, 'rb') as f:
-            image_data = f.read()
-        
-        image_part = old_rel.target_part
-        image_part._blob = image_data
-        
-        self._update_content_type(image_part, new_image_path)
+        self._set_image(old_rel.target_part, new_image_path, footer._element, rel_id)
         
         logger.info(f"Imagen del footer reemplazada: {new_image_path}")
         return True
@@ -430,24 +515,16 @@ class ImageReplacer:
             logger.error(f"Imagen no encontrada: {new_image_path}")
             return False
         
-        image_rels = []
-        for rel_id, rel in self.document.part.rels.items():
-            if 'image' in rel.reltype:
-                image_rels.append((rel_id, rel))
-        
-        if image_index >= len(image_rels):
+        # Mismo orden que get_body_images_info (posición en el documento)
+        body_images = self._images('body')
+        if image_index >= len(body_images):
             logger.error(f"No hay imagen en el índice {image_index}")
             return False
         
-        rel_id, old_rel = image_rels[image_index]
-        
-        with open(new_image_path, 'rb') as f:
-            image_data = f.read()
+        rel_id = body_images[image_index].rel_id
+        old_rel = self.document.part.rels[rel_id]
         
-        image_part = old_rel.target_part
-        image_part._blob = image_data
-        
-        self._update_content_type(image_part, new_image_path)
+        self._set_image(old_rel.target_part, new_image_path, self.document.element, rel_id)
         
         logger.info(f"Imagen {image_index} del cuerpo reemplazada")
         return True
@@ -481,38 +558,88 @@ class ImageReplacer:
             logger.error(f"Relación {rel_id} no es una imagen")
             return False
         
-        with open(new_image_path, 'rb') as f:
-            image_data = f.read()
-        
-        image_part = rel.target_part
-        image_part._blob = image_data
-        
-        self._update_content_type(image_part, new_image_path)
+        self._set_image(rel.target_part, new_image_path, self.document.element, rel_id)
         
         logger.info(f"Imagen {rel_id} reemplazada")
         return True
     
-    def _update_content_type(self, image_part, new_image_path: Path) -> None:
+    def _set_image(
+        self,
+        image_part,
+        new_image_path: Path,
+        root_element: Optional[etree._Element] = None,
+        rel_id: Optional[str] = None
+    ) -> CachedImage:
         """
-        Actualiza el content type de la imagen si es necesario.
+        Sustituye el contenido de una parte de imagen usando el caché de blobs.
+        
+        Con max_dpi, la imagen se reduce al extent del drawing que la muestra.
         
         Args:
             image_part: Parte de imagen del documento
             new_image_path: Ruta a la nueva imagen
+            root_element: Elemento XML de la parte que contiene el drawing
+            rel_id: ID de relación de la imagen en esa parte
+            
+        Returns:
+            Imagen cargada desde el caché
         """
-        extension = new_image_path.suffix.lower()
-        content_types = {
-            '.png': 'image/png',
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.gif': 'image/gif',
-            '.bmp': 'image/bmp',
-            '.tiff': 'image/tiff',
-            '.tif': 'image/tiff',
-        }
+        image = None
+        if self.max_dpi and root_element is not None:
+            drawing = self._find_drawing_by_rel_id(root_element, rel_id)
+            if drawing['width'] and drawing['height']:
+                image = self.blob_cache.get_fitted(
+                    new_image_path, drawing['width'], drawing['height'],
+                    self.max_dpi, self.jpeg_quality
+                )
+        if image is None:
+            image = self.blob_cache.get(new_image_path)
+        image_part._blob = image.blob
+        if image.content_type:
+            # Part.content_type es de solo lectura en python-docx
+            image_part._content_type = image.content_type
+        self._replaced_media[id(image_part)] = (image_part, image.sha256)
+        return image
+    
+    def deduplicate_media(self) -> int:
+        """
+        Unifica las partes de imagen reemplazadas que quedaron con el mismo contenido.
+        
+        Todas las relaciones del paquete que apuntan a una copia se redirigen a
+        una única parte; las copias quedan sin referencias y no se escriben al
+        guardar el documento.
         
-        if extension in content_types:
-            image_part.content_type = content_types[extension]
+        Llamar justo antes de guardar: desde ese momento las ubicaciones
+        unificadas comparten la parte, y reemplazar una de ellas cambiaría
+        todas.
+        
+        Returns:
+            Número de relaciones redirigidas
+        """
+        canonical = {}
+        duplicates = {}
+        for part, digest in self._replaced_media.values():
+            shared = canonical.setdefault(digest, part)
+            if shared is not part:
+                duplicates[id(part)] = shared
+        
+        if not duplicates:
+            return 0
+        
+        redirected = 0
+        for rel in self.document.part.package.iter_rels():
+            if rel.is_external:
+                continue
+            shared = duplicates.get(id(rel.target_part))
+            if shared is not None:
+                rel._target = shared
+                redirected += 1
+        
+        for part_id in duplicates:
+            del self._replaced_media[part_id]
+        
+        logger.info(f"Imágenes duplicadas unificadas: {len(duplicates)} partes")
+        return redirected
     
     def replace_images_batch(
         self,
@@ -526,6 +653,7 @@ class ImageReplacer:
                 {
                     "header_0_0": "ruta/logo_cliente.png",
                     "header_0_1": "ruta/logo_empresa.png",
+                    "first_page_header_0_0": "ruta/portada.png",
                     "body_5": "ruta/grafico1.png",
                     "footer_0_0": "ruta/firma.png"
                 }
@@ -537,21 +665,27 @@ class ImageReplacer:
         
         for key, new_path in replacements.items():
             try:
-                parts = key.split('_')
+                # Prefijo opcional de variante: first_page_header_0_0, even_page_footer_1_0
+                variant, name = 'default', key
+                for prefix in ('first_page_', 'even_page_'):
+                    if key.startswith(prefix):
+                        variant, name = prefix[:-1], key[len(prefix):]
+                        break
+                parts = name.split('_')
                 location = parts[0]
                 
                 if location == 'header':
                     section_idx = int(parts[1])
                     img_idx = int(parts[2]) if len(parts) > 2 else 0
                     results[key] = self.replace_header_image(
-                        section_idx, new_path, img_idx
+                        section_idx, new_path, img_idx, variant=variant
                     )
                 
                 elif location == 'footer':
                     section_idx = int(parts[1])
                     img_idx = int(parts[2]) if len(parts) > 2 else 0
                     results[key] = self.replace_footer_image(
-                        section_idx, new_path, img_idx
+                        section_idx, new_path, img_idx, variant=variant
                     )
                 
                 elif location == 'body':
@@ -603,13 +737,12 @@ class ImageReplacer:
         Returns:
             Tupla (width_emu, height_emu) o None si no se encuentra
         """
-        images = self._image_cache.get(location + 's' if location != 'body' else location, [])
+        images = self._images(location + 's' if location != 'body' else location, section_idx)
         
         for img in images:
             if img.index == index:
-                if location == 'body' or img.section_idx == section_idx:
-                    if img.width_emu and img.height_emu:
-                        return (img.width_emu, img.height_emu)
+                if img.width_emu and img.height_emu:
+                    return (img.width_emu, img.height_emu)
         
         return None
     
@@ -634,33 +767,34 @@ class ImageReplacer:
         Returns:
             True si se actualizó correctamente
         """
-        cache_key = location + 's' if location != 'body' else location
-        images = self._image_cache.get(cache_key, [])
+        images = self._images(location + 's' if location != 'body' else location, section_idx)
         
         for img in images:
-            if img.index == index:
-                if location == 'body' or img.section_idx == section_idx:
-                    if img.drawing_element is not None:
-                        # Actualizar extent en inline o anchor
-                        inline = img.drawing_element.find('.//wp:inline', NAMESPACES)
-                        anchor = img.drawing_element.find('.//wp:anchor', NAMESPACES)
+            if img.index == index and img.drawing_element is not None:
+                # Actualizar extent en inline o anchor
+                inline = img.drawing_element.find('.//wp:inline', NAMESPACES)
+                anchor = img.drawing_element.find('.//wp:anchor', NAMESPACES)
+                
+                extent_parent = inline if inline is not None else anchor
+                if extent_parent is not None:
+                    extent = extent_parent.find('wp:extent', NAMESPACES)
+                    if extent is not None:
+                        extent.set('cx', str(width_emu))
+                        extent.set('cy', str(height_emu))
+                        
+                        # También actualizar en a:ext si existe
+                        for ext in img.drawing_element.iter(qn('a:ext')):
+                            ext.set('cx', str(width_emu))
+                            ext.set('cy', str(height_emu))
+                        
+                        # Mantener vigente la información cacheada
+                        img.width_emu = width_emu
+                        img.height_emu = height_emu
                         
-                        extent_parent = inline if inline is not None else anchor
-                        if extent_parent is not None:
-                            extent = extent_parent.find('wp:extent', NAMESPACES)
-                            if extent is not None:
-                                extent.set('cx', str(width_emu))
-                                extent.set('cy', str(height_emu))
-                                
-                                # También actualizar en a:ext si existe
-                                for ext in img.drawing_element.iter(qn('a:ext')):
-                                    ext.set('cx', str(width_emu))
-                                    ext.set('cy', str(height_emu))
-                                
-                                logger.info(
-                                    f"Dimensiones actualizadas: {width_emu}x{height_emu} EMUs"
-                                )
-                                return True
+                        logger.info(
+                            f"Dimensiones actualizadas: {width_emu}x{height_emu} EMUs"
+                        )
+                        return True
         
         logger.error(f"No se encontró la imagen en {location}[{index}]")
         return False
@@ -669,7 +803,8 @@ class ImageReplacer:
 def replace_images_in_document(
     doc_path: Union[str, Path],
     output_path: Union[str, Path],
-    image_replacements: Dict[str, str]
+    image_replacements: Dict[str, str],
+    max_dpi: Optional[int] = None
 ) -> bool:
     """
     Función de conveniencia para reemplazar imágenes en un documento.
@@ -678,16 +813,19 @@ def replace_images_in_document(
         doc_path: Ruta al documento original
         output_path: Ruta para guardar el documento modificado
         image_replacements: Dict con reemplazos (ver replace_images_batch)
+        max_dpi: Resolución máxima de las imágenes insertadas (ver ImageReplacer)
         
     Returns:
         True si todos los reemplazos fueron exitosos
     """
     try:
         doc = Document(doc_path)
-        replacer = ImageReplacer(doc)
+        replacer = ImageReplacer(doc, max_dpi=max_dpi)
         
         results = replacer.replace_images_batch(image_replacements)
         
+        # Una misma imagen en varias ubicaciones se guarda una sola vez
+        replacer.deduplicate_media()
         doc.save(output_path)
         
         return all(results.values())
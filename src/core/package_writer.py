@@ -0,0 +1,189 @@
+"""
+Package Writer - Escritura de paquetes DOCX reutilizando bytes comprimidos
+Las entradas ZIP que no cambiaron se copian byte a byte desde el original;
+solo se comprimen de nuevo las partes XML y media modificadas
+"""
+import io
+import struct
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Union
+from docx import Document
+from docx.opc.pkgwriter import PackageWriter
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Cabecera local ZIP: 30 bytes fijos + nombre + campo extra
+LOCAL_HEADER_SIZE = 30
+LOCAL_HEADER_LENGTHS = struct.Struct('<HH')
+
+# Flags ZIP: 0x01 cifrado, 0x08 CRC/tamaños en data descriptor
+FLAG_ENCRYPTED = 0x01
+FLAG_DATA_DESCRIPTOR = 0x08
+
+
+class SourcePackage:
+    """Paquete ZIP original en memoria con acceso a sus datos comprimidos"""
+
+    def __init__(self, blob: bytes):
+        """
+        Args:
+            blob: Contenido completo del archivo .docx original
+        """
+        self.blob = blob
+        self.zip = zipfile.ZipFile(io.BytesIO(blob))
+        self.entries: Dict[str, zipfile.ZipInfo] = {
+            info.filename: info for info in self.zip.infolist()
+        }
+        self._data_offsets: Dict[str, int] = {}
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path]) -> 'SourcePackage':
+        return cls(Path(path).read_bytes())
+
+    def read(self, name: str) -> bytes:
+        """Retorna el contenido descomprimido de una entrada"""
+        return self.zip.read(name)
+
+    def raw_data(self, info: zipfile.ZipInfo) -> memoryview:
+        """Retorna los bytes comprimidos de una entrada tal como están en el ZIP"""
+        offset = self._data_offsets.get(info.filename)
+        if offset is None:
+            start = info.header_offset + LOCAL_HEADER_SIZE
+            name_len, extra_len = LOCAL_HEADER_LENGTHS.unpack_from(self.blob, start - 4)
+            offset = start + name_len + extra_len
+            self._data_offsets[info.filename] = offset
+
+        return memoryview(self.blob)[offset:offset + info.compress_size]
+
+    def unchanged_entry(self, name: str, blob: bytes) -> Optional[zipfile.ZipInfo]:
+        """
+        Retorna la entrada original si `blob` coincide con su contenido
+
+        La comparación usa tamaño y CRC32 del directorio central, sin
+        descomprimir la entrada original.
+        """
+        info = self.entries.get(name)
+        if info is None or info.flag_bits & FLAG_ENCRYPTED:
+            return None
+        if info.file_size != len(blob) or info.CRC != zipfile.crc32(blob):
+            return None
+        return info
+
+
+class PackageZipWriter:
+    """
+    Escritor ZIP que copia sin recomprimir las entradas sin cambios.
+
+    Implementa la interfaz write(pack_uri, blob)/close() del escritor físico
+    de python-docx, por lo que puede usarse con su PackageWriter.
+    """
+
+    def __init__(self, output: Union[str, Path, BinaryIO], source: SourcePackage):
+        """
+        Args:
+            output: Ruta de salida o stream binario
+            source: Paquete original del que se copian entradas
+        """
+        self.source = source
+        self._zip = zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED)
+        self.copied = 0
+        self.compressed = 0
+
+    def __enter__(self) -> 'PackageZipWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, pack_uri, blob: bytes) -> None:
+        """
+        Escribe una entrada; si no cambió respecto al original la copia en crudo
+
+        Args:
+            pack_uri: PackURI de python-docx o nombre de la entrada ZIP
+            blob: Contenido descomprimido de la entrada
+        """
+        name = getattr(pack_uri, 'membername', pack_uri)
+        info = self.source.unchanged_entry(name, blob)
+        if info is not None:
+            self._write_raw(info)
+            return
+
+        self._zip.writestr(name, blob)
+        self.compressed += 1
+
+    def copy(self, name: str) -> None:
+        """Copia una entrada del paquete original sin descomprimirla"""
+        self._write_raw(self.source.entries[name])
+
+    def _write_raw(self, info: zipfile.ZipInfo) -> None:
+        """Escribe cabecera local y datos comprimidos originales de una entrada"""
+        target = zipfile.ZipInfo(info.filename, info.date_time)
+        target.compress_type = info.compress_type
+        target.external_attr = info.external_attr
+        target.create_system = info.create_system
+        # Sin data descriptor: CRC y tamaños van en la cabecera local
+        target.flag_bits = info.flag_bits & ~FLAG_DATA_DESCRIPTOR
+        target.CRC = info.CRC
+        target.compress_size = info.compress_size
+        target.file_size = info.file_size
+
+        zout = self._zip
+        with zout._lock:
+            if zout._seekable:
+                zout.fp.seek(zout.start_dir)
+            target.header_offset = zout.fp.tell()
+            zout._writecheck(target)
+            zout._didModify = True
+
+            zip64 = target.file_size > zipfile.ZIP64_LIMIT or \
+                target.compress_size > zipfile.ZIP64_LIMIT
+            zout.fp.write(target.FileHeader(zip64))
+            zout.fp.write(self.source.raw_data(info))
+
+            zout.filelist.append(target)
+            zout.NameToInfo[target.filename] = target
+            zout.start_dir = zout.fp.tell()
+
+        self.copied += 1
+
+    def close(self) -> None:
+        self._zip.close()
+
+
+def save_document(
+    document: Document,
+    source: SourcePackage,
+    output: Union[str, Path, BinaryIO]
+) -> Dict[str, int]:
+    """
+    Guarda un Document de python-docx reutilizando las entradas sin cambios
+
+    Equivalente a document.save(), pero las partes cuyo contenido coincide con
+    el paquete original (imágenes, estilos, temas...) se copian con sus bytes
+    comprimidos originales en lugar de comprimirse de nuevo.
+
+    Args:
+        document: Documento cargado desde `source`
+        source: Paquete original
+        output: Ruta de salida o stream binario
+
+    Returns:
+        Dict con 'copied' (entradas copiadas) y 'compressed' (recomprimidas)
+    """
+    package = document.part.package
+    for part in package.parts:
+        part.before_marshal()
+
+    with PackageZipWriter(output, source) as writer:
+        PackageWriter._write_content_types_stream(writer, package.parts)
+        PackageWriter._write_pkg_rels(writer, package.rels)
+        PackageWriter._write_parts(writer, package.parts)
+
+    logger.debug(
+        f"Paquete guardado: {writer.copied} entradas copiadas, "
+        f"{writer.compressed} recomprimidas"
+    )
+    return {'copied': writer.copied, 'compressed': writer.compressed}
@@ -3,14 +3,197 @@ Placeholder Engine - Motor para procesamiento de variables {{key}}
 Soporta reemplazo en body, headers, footers y tablas
 """
 import re
-from typing import Dict, List, Optional, Set, Callable
+from bisect import bisect_right
+from itertools import accumulate
+from typing import (
+    Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Pattern, Set,
+    Callable, Tuple
+)
+from lxml import etree
 from docx import Document
-from docx.table import Table
+from docx.oxml.ns import qn
 from docx.text.paragraph import Paragraph
 import logging
 
+from .story_parts import VARIANTS, iter_header_footer_parts
+
 logger = logging.getLogger(__name__)
 
+W_P = qn('w:p')
+W_T = qn('w:t')
+W_TBL = qn('w:tbl')
+MC_FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+# Ubicación de los párrafos de compatibilidad (mc:Fallback): se reemplazan
+# igual que su versión principal pero no se indexan ni se cuentan
+FALLBACK_LOCATION = 'fallback'
+
+
+def paragraph_text_nodes(p: etree._Element) -> List[etree._Element]:
+    """
+    Retorna los w:t de un párrafo en orden de documento
+
+    Incluye runs dentro de hyperlinks, controles de contenido y revisiones,
+    pero no los párrafos anidados (por ejemplo, cuadros de texto).
+    """
+    return [
+        t for t in p.iter(W_T)
+        if next(t.iterancestors(W_P), None) is p
+    ]
+
+
+def paragraph_text(p: etree._Element) -> str:
+    """Texto de un párrafo, incluidos runs en hyperlinks y controles de contenido"""
+    return ''.join(t.text or '' for t in paragraph_text_nodes(p))
+
+
+def iter_story_paragraphs(
+    root: etree._Element
+) -> Iterator[Tuple[etree._Element, bool, bool]]:
+    """
+    Recorre todos los w:p de una parte en orden de documento
+
+    Llega a tablas anidadas, cuadros de texto (w:txbxContent) y controles de
+    contenido (w:sdt), que document.paragraphs y document.tables no exponen.
+
+    Yields:
+        Tupla (w:p, dentro de una tabla, dentro de un mc:Fallback)
+    """
+    in_table = set()
+    for tbl in root.iter(W_TBL):
+        in_table.update(tbl.iter(W_P))
+    in_fallback = set()
+    for fallback in root.iter(MC_FALLBACK):
+        in_fallback.update(fallback.iter(W_P))
+
+    for p in root.iter(W_P):
+        yield p, p in in_table, p in in_fallback
+
+
+def set_text_node(t: etree._Element, text: str) -> None:
+    """
+    Asigna texto a un w:t conservando el run y su formato
+
+    Tabulaciones y saltos de línea se convierten en w:tab y w:br, igual que
+    hace python-docx al asignar run.text.
+    """
+    pieces = re.split(r'(\t|\r\n|\n|\r)', text)
+    t.text = pieces[0]
+    _preserve_space(t)
+
+    anchor = t
+    for idx in range(1, len(pieces), 2):
+        tag = qn('w:tab') if pieces[idx] == '\t' else qn('w:br')
+        separator = t.makeelement(tag, {})
+        anchor.addnext(separator)
+        anchor = separator
+        if pieces[idx + 1]:
+            new_t = t.makeelement(W_T, {})
+            new_t.text = pieces[idx + 1]
+            _preserve_space(new_t)
+            anchor.addnext(new_t)
+            anchor = new_t
+
+
+def _preserve_space(t: etree._Element) -> None:
+    text = t.text or ''
+    if text and (text[0].isspace() or text[-1].isspace()):
+        t.set(XML_SPACE, 'preserve')
+
+
+def replace_in_segments(
+    segments: List[str],
+    pattern: Pattern,
+    data: Mapping[str, Any]
+) -> Tuple[List[str], int]:
+    """
+    Reemplaza placeholders que pueden estar repartidos entre varios segmentos
+
+    Busca el patrón sobre el texto concatenado de los segmentos (los w:t o runs
+    de un párrafo) y proyecta cada coincidencia sobre los límites originales en
+    una sola pasada lineal: el valor se escribe en el segmento donde empieza el
+    placeholder y el resto del placeholder se elimina de los segmentos
+    siguientes. Los segmentos no afectados quedan idénticos.
+
+    Args:
+        segments: Textos de los segmentos en orden
+        pattern: Patrón compilado con la clave en el grupo 1
+        data: Dict con valores de reemplazo
+
+    Returns:
+        Tupla (nuevos textos por segmento, número de reemplazos). Cada variable
+        cuenta una vez por segmento en que empieza, igual que el reemplazo por run.
+    """
+    full = ''.join(segments)
+    if '{{' not in full:
+        return segments, 0
+
+    ends = list(accumulate(len(text) for text in segments))
+    pieces: List[List[str]] = [[] for _ in segments]
+    replaced = set()
+    seg = 0
+    pos = 0
+
+    def emit(start: int, stop: int) -> None:
+        nonlocal seg
+        while start < stop:
+            while ends[seg] <= start:
+                seg += 1
+            cut = min(stop, ends[seg])
+            pieces[seg].append(full[start:cut])
+            start = cut
+
+    for match in pattern.finditer(full):
+        key = match.group(1)
+        if key not in data:
+            continue
+
+        emit(pos, match.start())
+        while ends[seg] <= match.start():
+            seg += 1
+        pieces[seg].append(str(data[key]))
+        replaced.add((seg, key))
+        pos = match.end()
+
+    if not replaced:
+        return segments, 0
+
+    emit(pos, len(full))
+    return [''.join(chunks) for chunks in pieces], len(replaced)
+
+
+def replace_in_paragraph(p: etree._Element, pattern: Pattern, data: Mapping[str, Any]) -> int:
+    """
+    Reemplaza placeholders en los w:t de un párrafo preservando sus runs
+
+    Solo se reescriben los w:t cuyo texto cambia (ver replace_in_segments).
+
+    Returns:
+        Número de reemplazos realizados
+    """
+    nodes = paragraph_text_nodes(p)
+    texts = [t.text or '' for t in nodes]
+
+    new_texts, count = replace_in_segments(texts, pattern, data)
+    if count:
+        for node, old_text, new_text in zip(nodes, texts, new_texts):
+            if new_text != old_text:
+                set_text_node(node, new_text)
+
+    return count
+
+
+class PlaceholderLocation(NamedTuple):
+    """Ubicación de una ocurrencia de placeholder dentro del documento"""
+    key: str
+    location: str            # 'body', 'tables', 'headers', 'footers'
+    part: str                # Nombre de la parte OOXML (ej: '/word/header1.xml')
+    paragraph: Paragraph
+    start: int               # Offset inicial en el texto del párrafo
+    end: int                 # Offset final en el texto del párrafo
+    runs: Tuple[int, ...]    # Índices de runs que contienen el placeholder
+
 
 class PlaceholderEngine:
     """Motor de procesamiento de placeholders con validación"""
@@ -25,7 +208,128 @@ class PlaceholderEngine:
         """
         self.document = document
         self.pattern = re.compile(self.PLACEHOLDER_PATTERN)
+        self._index: Optional[Dict[str, List[PlaceholderLocation]]] = None
+        self._indexed_paragraphs: List[Tuple[str, Paragraph, str]] = []
+        self._fallback_paragraphs: List[Paragraph] = []
+    
+    def _iter_paragraphs(self) -> Iterator[Tuple[str, str, Paragraph]]:
+        """
+        Recorre cada w:p de body, headers y footers: (ubicación, parte, párrafo)
+        
+        Un único recorrido XML por parte alcanza tablas (también anidadas o
+        dentro de headers/footers), cuadros de texto y controles de contenido.
+        Los párrafos de tablas del body se reportan como 'tables'; las copias
+        de compatibilidad de cuadros de texto como FALLBACK_LOCATION.
+        """
+        stories = [('body', self.document)]
+        # Cada parte de header/footer (incluidas primera página y pares) una
+        # sola vez, aunque la compartan varias secciones
+        stories.extend(
+            (story_part.location, story_part.story)
+            for story_part in iter_header_footer_parts(self.document, variants=VARIANTS)
+        )
+        
+        for location, story in stories:
+            part = str(story.part.partname)
+            for p, in_table, in_fallback in iter_story_paragraphs(story.part.element):
+                if in_fallback:
+                    p_location = FALLBACK_LOCATION
+                elif in_table and location == 'body':
+                    p_location = 'tables'
+                else:
+                    p_location = location
+                yield p_location, part, Paragraph(p, story)
+    
+    def _locate_runs(
+        self,
+        para: Paragraph,
+        text: str,
+        spans: List[Tuple[int, int]]
+    ) -> List[Tuple[int, ...]]:
+        """Mapea offsets del texto del párrafo a los índices de runs que los cubren"""
+        run_texts = [run.text for run in para.runs]
+        if ''.join(run_texts) != text:
+            # Texto fuera de runs directos (ej: hyperlinks): sin mapeo a runs
+            return [() for _ in spans]
+        
+        starts = []
+        offset = 0
+        for run_text in run_texts:
+            starts.append(offset)
+            offset += len(run_text)
+        
+        located = []
+        for start, end in spans:
+            first = bisect_right(starts, start) - 1
+            last = bisect_right(starts, end - 1) - 1
+            located.append(tuple(range(first, last + 1)))
+        return located
+    
+    def build_index(self) -> Dict[str, List[PlaceholderLocation]]:
+        """
+        Construye el índice placeholder -> ubicaciones en un único recorrido
         
+        El índice es compartido por validación, reporte, vista previa y
+        reemplazo. Se reconstruye solo tras llamar a invalidate().
+        
+        Returns:
+            Dict con nombre de variable y lista de PlaceholderLocation
+        """
+        index: Dict[str, List[PlaceholderLocation]] = {}
+        indexed_paragraphs = []
+        
+        fallback_paragraphs = []
+        
+        for location, part, para in self._iter_paragraphs():
+            text = paragraph_text(para._p)
+            if '{{' not in text:
+                continue
+            if location == FALLBACK_LOCATION:
+                fallback_paragraphs.append(para)
+                continue
+            matches = list(self.pattern.finditer(text))
+            if not matches:
+                continue
+            
+            indexed_paragraphs.append((location, para, text))
+            spans = [match.span() for match in matches]
+            for match, runs in zip(matches, self._locate_runs(para, text, spans)):
+                index.setdefault(match.group(1), []).append(PlaceholderLocation(
+                    key=match.group(1),
+                    location=location,
+                    part=part,
+                    paragraph=para,
+                    start=match.start(),
+                    end=match.end(),
+                    runs=runs
+                ))
+        
+        self._index = index
+        self._indexed_paragraphs = indexed_paragraphs
+        self._fallback_paragraphs = fallback_paragraphs
+        logger.debug(
+            f"Índice construido: {len(index)} placeholders en "
+            f"{len(indexed_paragraphs)} párrafos"
+        )
+        return index
+    
+    def get_index(self) -> Dict[str, List[PlaceholderLocation]]:
+        """Retorna el índice vigente, construyéndolo si es necesario"""
+        if self._index is None:
+            self.build_index()
+        return self._index
+    
+    def invalidate(self) -> None:
+        """
+        Descarta el índice de placeholders
+        
+        Debe llamarse si el documento se modifica fuera del motor
+        (otros editores, contenido dinámico, etc.).
+        """
+        self._index = None
+        self._indexed_paragraphs = []
+        self._fallback_paragraphs = []
+    
     def find_all_placeholders(self) -> Set[str]:
         """
         Encuentra todos los placeholders únicos en el documento
@@ -33,32 +337,7 @@ class PlaceholderEngine:
         Returns:
             Set de nombres de variables encontradas
         """
-        placeholders = set()
-        
-        # Body paragraphs
-        for para in self.document.paragraphs:
-            matches = self.pattern.findall(para.text)
-            placeholders.update(matches)
-        
-        # Tables
-        for table in self.document.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for para in cell.paragraphs:
-                        matches = self.pattern.findall(para.text)
-                        placeholders.update(matches)
-        
-        # Headers & Footers
-        for section in self.document.sections:
-            if section.header:
-                for para in section.header.paragraphs:
-                    matches = self.pattern.findall(para.text)
-                    placeholders.update(matches)
-            
-            if section.footer:
-                for para in section.footer.paragraphs:
-                    matches = self.pattern.findall(para.text)
-                    placeholders.update(matches)
+        placeholders = set(self.get_index())
         
         logger.info(f"Encontrados {len(placeholders)} placeholders únicos")
         return placeholders
@@ -116,100 +395,80 @@ class PlaceholderEngine:
             )
         
         total_replacements = 0
+        seen = set()
         
-        # Body
-        total_replacements += self._replace_in_paragraphs(
-            self.document.paragraphs, data, preserve_format
-        )
-        
-        # Tables
-        for table in self.document.tables:
-            total_replacements += self._replace_in_table(
-                table, data, preserve_format
+        for _, para, _ in self._indexed_paragraphs:
+            # Headers/footers vinculados y celdas combinadas repiten párrafos
+            if para._p in seen:
+                continue
+            seen.add(para._p)
+            total_replacements += self._replace_in_paragraph(
+                para, data, preserve_format
             )
         
-        # Headers & Footers
-        for section in self.document.sections:
-            if section.header:
-                total_replacements += self._replace_in_paragraphs(
-                    section.header.paragraphs, data, preserve_format
-                )
-            
-            if section.footer:
-                total_replacements += self._replace_in_paragraphs(
-                    section.footer.paragraphs, data, preserve_format
-                )
+        # Las copias de compatibilidad repiten el contenido: no se cuentan
+        for para in self._fallback_paragraphs:
+            self._replace_in_paragraph(para, data, preserve_format)
+        
+        self.invalidate()
         
         logger.info(f"Total de reemplazos: {total_replacements}")
         return total_replacements
     
-    def _replace_in_paragraphs(
+    def _replace_in_paragraph(
         self,
-        paragraphs: List[Paragraph],
+        para: Paragraph,
         data: Dict[str, str],
         preserve_format: bool
     ) -> int:
-        """Reemplaza placeholders en lista de párrafos"""
-        count = 0
+        """Reemplaza placeholders en un párrafo que ya se sabe que los contiene"""
+        if preserve_format:
+            # Reemplazo preservando formato de runs
+            return self._replace_in_runs(para, data)
         
-        for para in paragraphs:
-            # Buscar placeholders en el texto completo del párrafo
-            if not self.pattern.search(para.text):
-                continue
-            
-            if preserve_format:
-                # Reemplazo preservando formato de runs
-                count += self._replace_in_runs(para, data)
-            else:
-                # Reemplazo simple del texto completo
-                new_text = para.text
-                for key, value in data.items():
-                    placeholder = f"{{{{{key}}}}}"
-                    if placeholder in new_text:
-                        new_text = new_text.replace(placeholder, str(value))
-                        count += 1
-                
-                # Actualizar texto
-                para.text = new_text
+        # Reemplazo simple del texto completo
+        new_text, count = self._substitute(para.text, data)
         
+        # Actualizar texto
+        if count:
+            para.text = new_text
         return count
     
-    def _replace_in_runs(self, para: Paragraph, data: Dict[str, str]) -> int:
-        """Reemplaza placeholders preservando formato de runs individuales"""
-        count = 0
+    def _substitute(self, text: str, data: Dict[str, str]) -> Tuple[str, int]:
+        """
+        Sustituye placeholders de un texto en una sola pasada del patrón
         
-        # Reconstruir el párrafo run por run
-        for run in para.runs:
-            if not self.pattern.search(run.text):
-                continue
-            
-            new_text = run.text
-            for key, value in data.items():
-                placeholder = f"{{{{{key}}}}}"
-                if placeholder in new_text:
-                    new_text = new_text.replace(placeholder, str(value))
-                    count += 1
+        Cada coincidencia se resuelve con una búsqueda en el dict, por lo que el
+        costo no depende del número de claves en data. Como en el reemplazo
+        clásico, cada variable cuenta una vez por texto aunque aparezca varias.
+        
+        Args:
+            text: Texto con placeholders
+            data: Dict con valores de reemplazo
             
-            run.text = new_text
+        Returns:
+            Tupla (texto reemplazado, número de variables reemplazadas)
+        """
+        replaced_keys = set()
         
-        return count
-    
-    def _replace_in_table(
-        self,
-        table: Table,
-        data: Dict[str, str],
-        preserve_format: bool
-    ) -> int:
-        """Reemplaza placeholders en una tabla"""
-        count = 0
+        def lookup(match):
+            key = match.group(1)
+            if key not in data:
+                return match.group(0)
+            replaced_keys.add(key)
+            return str(data[key])
         
-        for row in table.rows:
-            for cell in row.cells:
-                count += self._replace_in_paragraphs(
-                    cell.paragraphs, data, preserve_format
-                )
+        new_text = self.pattern.sub(lookup, text)
+        return new_text, len(replaced_keys)
+    
+    def _replace_in_runs(self, para: Paragraph, data: Dict[str, str]) -> int:
+        """
+        Reemplaza placeholders preservando formato de runs individuales
         
-        return count
+        Soporta placeholders partidos entre varios runs (revisión ortográfica,
+        marcas de revisión): solo se reescriben los w:t afectados.
+        """
+        return replace_in_paragraph(para._p, self.pattern, data)
     
     def replace_with_function(
         self,
@@ -252,45 +511,13 @@ class PlaceholderEngine:
             }
         }
         
-        all_placeholders = self.find_all_placeholders()
-        report['total_unique'] = len(all_placeholders)
-        
-        # Inicializar contadores
-        for ph in all_placeholders:
-            report['placeholders'][ph] = 0
-        
-        # Contar en body
-        for para in self.document.paragraphs:
-            for match in self.pattern.finditer(para.text):
-                var_name = match.group(1)
-                report['placeholders'][var_name] += 1
-                report['locations']['body'] += 1
-        
-        # Contar en tablas
-        for table in self.document.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for para in cell.paragraphs:
-                        for match in self.pattern.finditer(para.text):
-                            var_name = match.group(1)
-                            report['placeholders'][var_name] += 1
-                            report['locations']['tables'] += 1
-        
-        # Contar en headers/footers
-        for section in self.document.sections:
-            if section.header:
-                for para in section.header.paragraphs:
-                    for match in self.pattern.finditer(para.text):
-                        var_name = match.group(1)
-                        report['placeholders'][var_name] += 1
-                        report['locations']['headers'] += 1
-            
-            if section.footer:
-                for para in section.footer.paragraphs:
-                    for match in self.pattern.finditer(para.text):
-                        var_name = match.group(1)
-                        report['placeholders'][var_name] += 1
-                        report['locations']['footers'] += 1
+        index = self.get_index()
+        report['total_unique'] = len(index)
+        
+        for var_name, locations in index.items():
+            report['placeholders'][var_name] = len(locations)
+            for loc in locations:
+                report['locations'][loc.location] += 1
         
         return report
     
@@ -310,25 +537,18 @@ class PlaceholderEngine:
             Lista de dicts con 'original' y 'replaced'
         """
         examples = []
-        count = 0
+        self.get_index()
         
-        for para in self.document.paragraphs:
-            if count >= max_examples:
+        for _, _, original in self._indexed_paragraphs:
+            if len(examples) >= max_examples:
                 break
             
-            if self.pattern.search(para.text):
-                original = para.text
-                replaced = original
-                
-                for key, value in data.items():
-                    placeholder = f"{{{{{key}}}}}"
-                    replaced = replaced.replace(placeholder, str(value))
-                
-                if original != replaced:
-                    examples.append({
-                        'original': original,
-                        'replaced': replaced
-                    })
-                    count += 1
-        
-        return examples
\ No newline at end of file
+            replaced, _ = self._substitute(original, data)
+            
+            if original != replaced:
+                examples.append({
+                    'original': original,
+                    'replaced': replaced
+                })
+        
+        return examples
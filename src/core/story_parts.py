@@ -0,0 +1,102 @@
+"""
+Story Parts - Recorrido de las partes de header/footer de un documento
+Cada parte distinta se visita una sola vez aunque varias secciones la compartan
+"""
+from typing import Iterator, NamedTuple, Optional, Sequence
+from docx import Document
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Variantes de header/footer de una sección
+VARIANTS = ('default', 'first_page', 'even_page')
+
+# (ubicación, variante) -> atributo de docx.section.Section
+HEADER_FOOTER_ATTRS = {
+    ('headers', 'default'): 'header',
+    ('headers', 'first_page'): 'first_page_header',
+    ('headers', 'even_page'): 'even_page_header',
+    ('footers', 'default'): 'footer',
+    ('footers', 'first_page'): 'first_page_footer',
+    ('footers', 'even_page'): 'even_page_footer',
+}
+
+
+class StoryPart(NamedTuple):
+    """Header o footer con definición propia dentro del documento"""
+    location: str            # 'headers' o 'footers'
+    variant: str             # 'default', 'first_page' o 'even_page'
+    section_idx: int         # Primera sección que define la parte
+    story: object            # docx.section._Header / _Footer
+
+
+def iter_header_footer_parts(
+    document: Document,
+    locations: Sequence[str] = ('headers', 'footers'),
+    variants: Sequence[str] = ('default',),
+    create_missing: bool = False
+) -> Iterator[StoryPart]:
+    """
+    Recorre cada parte distinta de header/footer una sola vez
+
+    Las secciones vinculadas a la anterior (is_linked_to_previous) no tienen
+    parte propia: la comparten con la sección que la define, que ya fue
+    visitada. Consultar un header inexistente no crea partes vacías.
+
+    Args:
+        document: Documento python-docx
+        locations: Ubicaciones a recorrer ('headers', 'footers')
+        variants: Variantes a recorrer (ver VARIANTS)
+        create_missing: Si True, crea el header/footer principal de la
+            primera sección cuando el documento no tiene ninguno (para
+            escribir en él). Las variantes de primera página y páginas pares
+            solo se recorren si existen.
+
+    Yields:
+        StoryPart por cada parte distinta, en orden de sección
+    """
+    seen = set()
+    for section_idx, section in enumerate(document.sections):
+        for location in locations:
+            for variant in variants:
+                story = getattr(section, HEADER_FOOTER_ATTRS[(location, variant)])
+                if story.is_linked_to_previous and not (
+                    create_missing and section_idx == 0 and variant == 'default'
+                ):
+                    continue
+
+                part = story.part
+                if part in seen:
+                    continue
+                seen.add(part)
+                yield StoryPart(location, variant, section_idx, story)
+
+
+def resolve_header_footer(
+    document: Document,
+    section_idx: int,
+    location: str,
+    variant: str = 'default'
+) -> Optional[StoryPart]:
+    """
+    Retorna la parte de header/footer que usa una sección sin crear ninguna
+
+    Args:
+        document: Documento python-docx
+        section_idx: Índice de la sección
+        location: 'headers' o 'footers'
+        variant: 'default', 'first_page' o 'even_page'
+
+    Returns:
+        StoryPart de la sección que define la parte, o None si no hay ninguna
+    """
+    sections = document.sections
+    if not 0 <= section_idx < len(sections):
+        return None
+
+    attr = HEADER_FOOTER_ATTRS[(location, variant)]
+    for idx in range(section_idx, -1, -1):
+        story = getattr(sections[idx], attr)
+        if not story.is_linked_to_previous:
+            return StoryPart(location, variant, idx, story)
+    return None
@@ -0,0 +1,175 @@
+"""
+XML Placeholder Engine - Motor de placeholders {{key}} sobre lxml directo
+Trabaja sobre word/document.xml, header*.xml y footer*.xml sin los proxies
+de python-docx (Paragraph, Run, _Cell), que se reconstruyen en cada acceso
+"""
+import io
+import re
+import posixpath
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Set, Tuple, Union
+from lxml import etree
+import logging
+
+from .package_writer import PackageZipWriter, SourcePackage
+from .placeholder_engine import (
+    PlaceholderEngine, iter_story_paragraphs, paragraph_text_nodes,
+    replace_in_segments, set_text_node
+)
+
+logger = logging.getLogger(__name__)
+
+MAIN_DOCUMENT = 'word/document.xml'
+REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+STORY_REL_SUFFIXES = ('/header', '/footer')
+
+
+class XmlPlaceholderEngine:
+    """
+    Motor de placeholders que opera directamente sobre el XML del paquete.
+
+    Usa la misma sintaxis {{key}} y la misma semántica de reemplazo y conteo
+    que PlaceholderEngine (incluidos placeholders partidos entre runs), pero
+    recorre los w:t con lxml iter() en lugar de document.paragraphs,
+    row.cells y para.runs.
+
+    Uso:
+        engine = XmlPlaceholderEngine("plantilla.docx")
+        engine.replace_all({"nombre": "Juan"})
+        engine.save("salida.docx")
+    """
+
+    PLACEHOLDER_PATTERN = PlaceholderEngine.PLACEHOLDER_PATTERN
+
+    def __init__(self, source: Union[str, Path, bytes]):
+        """
+        Args:
+            source: Ruta al archivo .docx o su contenido en bytes
+        """
+        if isinstance(source, (bytes, bytearray)):
+            self.package = SourcePackage(bytes(source))
+        else:
+            self.package = SourcePackage.from_path(source)
+        self._zip = self.package.zip
+        self.pattern = re.compile(self.PLACEHOLDER_PATTERN)
+        self.parts: Dict[str, etree._Element] = {
+            name: etree.fromstring(self._zip.read(name))
+            for name in self._story_part_names()
+        }
+        self._modified: Set[str] = set()
+
+    def _story_part_names(self) -> List[str]:
+        """Body más las partes header/footer referenciadas por el documento"""
+        names = [MAIN_DOCUMENT]
+        rels_name = 'word/_rels/document.xml.rels'
+        if rels_name not in self._zip.namelist():
+            return names
+
+        rels = etree.fromstring(self._zip.read(rels_name))
+        for rel in rels.iter(f'{REL_NS}Relationship'):
+            if rel.get('TargetMode') == 'External':
+                continue
+            if rel.get('Type', '').endswith(STORY_REL_SUFFIXES):
+                target = rel.get('Target')
+                # Absoluto: desde la raíz del paquete; relativo: desde word/
+                if target.startswith('/'):
+                    target = target.lstrip('/')
+                else:
+                    target = posixpath.join('word', target)
+                target = posixpath.normpath(target)
+                if target not in names:
+                    names.append(target)
+
+        return names
+
+    def _iter_paragraphs(
+        self
+    ) -> Iterator[Tuple[str, etree._Element, List[etree._Element], bool]]:
+        """
+        Agrupa los w:t de cada parte por párrafo: (parte, w:p, nodos w:t, contado)
+
+        Los párrafos dentro de mc:Fallback no se cuentan, igual que en
+        PlaceholderEngine.
+        """
+        for name, root in self.parts.items():
+            for p, _, in_fallback in iter_story_paragraphs(root):
+                nodes = paragraph_text_nodes(p)
+                if nodes:
+                    yield name, p, nodes, not in_fallback
+
+    def find_all_placeholders(self) -> Set[str]:
+        """
+        Encuentra todos los placeholders únicos en el documento
+
+        Returns:
+            Set de nombres de variables encontradas
+        """
+        placeholders = set()
+        for _, _, nodes, _ in self._iter_paragraphs():
+            text = ''.join(t.text or '' for t in nodes)
+            if '{{' in text:
+                placeholders.update(self.pattern.findall(text))
+        return placeholders
+
+    def replace_all(self, data: Dict[str, str], strict: bool = False) -> int:
+        """
+        Reemplaza todos los placeholders en body, headers y footers
+
+        Args:
+            data: Dict con valores de reemplazo
+            strict: Si True, falla si hay placeholders sin datos
+
+        Returns:
+            Número total de reemplazos realizados
+
+        Raises:
+            ValueError: Si strict=True y hay placeholders sin datos
+        """
+        if strict:
+            missing = self.find_all_placeholders() - set(data.keys())
+            if missing:
+                raise ValueError(f"Placeholders sin datos: {list(missing)}")
+
+        total = 0
+        for name, _, nodes, counted in self._iter_paragraphs():
+            texts = [t.text or '' for t in nodes]
+            new_texts, count = replace_in_segments(texts, self.pattern, data)
+            if not count:
+                continue
+
+            for node, old_text, new_text in zip(nodes, texts, new_texts):
+                if new_text != old_text:
+                    set_text_node(node, new_text)
+            self._modified.add(name)
+            if counted:
+                total += count
+
+        logger.info(f"Total de reemplazos: {total}")
+        return total
+
+    def save(self, output: Union[str, Path, BinaryIO]) -> None:
+        """
+        Escribe el paquete con las partes modificadas
+
+        Args:
+            output: Ruta de salida o stream binario
+        """
+        if isinstance(output, (str, Path)):
+            output = Path(output)
+            output.parent.mkdir(parents=True, exist_ok=True)
+
+        # Solo las partes modificadas se comprimen de nuevo
+        with PackageZipWriter(output, self.package) as writer:
+            for info in self._zip.infolist():
+                if info.filename in self._modified:
+                    writer.write(info.filename, etree.tostring(
+                        self.parts[info.filename], encoding='UTF-8', standalone=True
+                    ))
+                else:
+                    writer.copy(info.filename)
+
+    def to_bytes(self) -> bytes:
+        """Retorna el documento resultante como bytes"""
+        buffer = io.BytesIO()
+        self.save(buffer)
+        return buffer.getvalue()
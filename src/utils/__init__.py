@@ -1,8 +1,11 @@
 # Utilities
 from .exceptions import *
 from .logger import setup_logger, get_logger
+from .config import load_settings, get_setting
 
 __all__ = [
     'setup_logger',
     'get_logger',
+    'load_settings',
+    'get_setting',
 ]
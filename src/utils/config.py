@@ -0,0 +1,71 @@
+"""
+config.py - Carga de config/settings.yaml
+"""
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+import logging
+
+try:
+    import yaml
+except ImportError:  # pragma: no cover - PyYAML es dependencia declarada
+    yaml = None
+
+logger = logging.getLogger(__name__)
+
+# Ruta por defecto; se puede sobrescribir con DOCX_EDITOR_CONFIG
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parents[2] / "config" / "settings.yaml"
+CONFIG_ENV_VAR = "DOCX_EDITOR_CONFIG"
+
+
+@lru_cache(maxsize=4)
+def _load(path: str) -> Dict[str, Any]:
+    config_path = Path(path)
+    if not config_path.exists():
+        logger.warning(f"Configuración no encontrada: {config_path}, usando valores por defecto")
+        return {}
+    if yaml is None:
+        logger.warning("PyYAML no instalado, usando valores por defecto")
+        return {}
+
+    with config_path.open('r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_settings(config_path: Optional[Union[str, Path]] = None) -> Dict[str, Any]:
+    """
+    Carga la configuración del sistema (cacheada por ruta)
+
+    Args:
+        config_path: Ruta al YAML (default: $DOCX_EDITOR_CONFIG o config/settings.yaml)
+
+    Returns:
+        Dict con la configuración; vacío si el archivo no existe
+    """
+    path = config_path or os.environ.get(CONFIG_ENV_VAR) or DEFAULT_CONFIG_PATH
+    return _load(str(path))
+
+
+def get_setting(
+    key: str,
+    default: Any = None,
+    config_path: Optional[Union[str, Path]] = None
+) -> Any:
+    """
+    Obtiene un valor por clave con puntos, ej: 'concurrency.worker_pool_size'
+
+    Args:
+        key: Clave jerárquica separada por puntos
+        default: Valor si la clave no existe
+        config_path: Ruta al YAML (ver load_settings)
+
+    Returns:
+        Valor configurado o `default`
+    """
+    value: Any = load_settings(config_path)
+    for part in key.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
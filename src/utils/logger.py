@@ -0,0 +1,144 @@
+"""
+logger.py - Sistema de logging centralizado
+"""
+import logging
+import sys
+from pathlib import Path
+from logging.handlers import RotatingFileHandler
+from datetime import datetime
+from typing import Optional
+
+
+class ColoredFormatter(logging.Formatter):
+    """Formatter con colores para terminal"""
+    
+    COLORS = {
+        'DEBUG': '\033[36m',    # Cyan
+        'INFO': '\033[32m',     # Verde
+        'WARNING': '\033[33m',  # Amarillo
+        'ERROR': '\033[31m',    # Rojo
+        'CRITICAL': '\033[35m', # Magenta
+        'RESET': '\033[0m'
+    }
+    
+    def format(self, record):
+        log_color = self.COLORS.get(record.levelname, self.COLORS['RESET'])
+        record.levelname = f"{log_color}{record.levelname}{self.COLORS['RESET']}"
+        return super().format(record)
+
+
+def setup_logger(
+    name: str = "docx_editor",
+    level: str = "INFO",
+    log_file: Optional[Path] = None,
+    max_bytes: int = 10 * 1024 * 1024,  # 10MB
+    backup_count: int = 5,
+    use_colors: bool = True
+) -> logging.Logger:
+    """
+    Configura y retorna un logger
+    
+    Args:
+        name: Nombre del logger
+        level: Nivel de logging (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        log_file: Path para archivo de log (opcional)
+        max_bytes: Tamaño máximo del archivo de log
+        backup_count: Número de backups a mantener
+        use_colors: Usar colores en salida de consola
+        
+    Returns:
+        Logger configurado
+    """
+    logger = logging.getLogger(name)
+    logger.setLevel(getattr(logging, level.upper()))
+    
+    # Evitar duplicación de handlers
+    if logger.handlers:
+        return logger
+    
+    # Formato
+    log_format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    date_format = '%Y-%m-%d %H:%M:%S'
+    
+    # Console Handler
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(logging.DEBUG)
+    
+    if use_colors:
+        console_formatter = ColoredFormatter(log_format, date_format)
+    else:
+        console_formatter = logging.Formatter(log_format, date_format)
+    
+    console_handler.setFormatter(console_formatter)
+    logger.addHandler(console_handler)
+    
+    # File Handler (si se especifica)
+    if log_file:
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding='utf-8'
+        )
+        file_handler.setLevel(logging.DEBUG)
+        file_formatter = logging.Formatter(log_format, date_format)
+        file_handler.setFormatter(file_formatter)
+        logger.addHandler(file_handler)
+    
+    return logger
+
+
+def get_logger(name: str = "docx_editor") -> logging.Logger:
+    """
+    Obtiene un logger existente o crea uno nuevo
+    
+    Args:
+        name: Nombre del logger
+        
+    Returns:
+        Logger
+    """
+    logger = logging.getLogger(name)
+    
+    if not logger.handlers:
+        # Configurar con valores por defecto
+        log_dir = Path("logs")
+        log_file = log_dir / f"{name}_{datetime.now().strftime('%Y%m%d')}.log"
+        setup_logger(name, log_file=log_file)
+    
+    return logger
+
+
+class LogContext:
+    """Context manager para logging temporal"""
+    
+    def __init__(self, logger: logging.Logger, level: str = "INFO"):
+        self.logger = logger
+        self.level = getattr(logging, level.upper())
+        self.original_level = logger.level
+    
+    def __enter__(self):
+        self.logger.setLevel(self.level)
+        return self.logger
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.logger.setLevel(self.original_level)
+
+
+# Ejemplo de uso
+if __name__ == '__main__':
+    # Setup básico
+    logger = setup_logger("test_logger", level="DEBUG")
+    
+    logger.debug("Mensaje de debug")
+    logger.info("Mensaje informativo")
+    logger.warning("Advertencia")
+    logger.error("Error")
+    logger.critical("Crítico")
+    
+    # Context manager
+    with LogContext(logger, "WARNING"):
+        logger.debug("Esto no se verá")
+        logger.warning("Esto sí se verá")
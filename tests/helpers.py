@@ -0,0 +1,18 @@
+"""
+Utilidades compartidas por los tests
+"""
+import struct
+import zlib
+
+
+def make_png(color=(255, 0, 0), width=2, height=2):
+    """PNG RGB mínimo generado sin dependencias"""
+    def chunk(kind, data):
+        return (struct.pack('>I', len(data)) + kind + data +
+                struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff))
+
+    row = b'\x00' + bytes(color) * width
+    return (b'\x89PNG\r\n\x1a\n' +
+            chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(row * height)) +
+            chunk(b'IEND', b''))
@@ -0,0 +1,113 @@
+"""
+Tests para la generación masiva de informes en pool de procesos
+"""
+import sys
+import os
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from docx import Document
+from core.batch_engine import BatchEngine, process_document
+
+
+@pytest.fixture
+def template(tmp_path):
+    """Plantilla con placeholders en body y footer"""
+    doc = Document()
+    doc.add_paragraph('Informe de {{nombre}}')
+    doc.sections[0].footer.add_paragraph('Documento {{documento}}')
+    path = tmp_path / 'plantilla.docx'
+    doc.save(path)
+    return path
+
+
+@pytest.fixture
+def records():
+    return [{'nombre': f'Persona {i}', 'documento': f'D{i:03d}'} for i in range(6)]
+
+
+class TestBatchEngine:
+    """Tests para BatchEngine"""
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_generates_one_report_per_record(self, template, records, tmp_path, workers):
+        engine = BatchEngine(
+            template, tmp_path / 'out', '{documento}.docx', workers=workers, chunksize=2
+        )
+        report = engine.run(iter(records))
+
+        assert report['total'] == len(records)
+        assert report['succeeded'] == len(records)
+        assert report['docs_per_second'] > 0
+        assert [r['index'] for r in report['results']] == list(range(len(records)))
+
+        doc = Document(tmp_path / 'out' / 'D004.docx')
+        assert doc.paragraphs[0].text == 'Informe de Persona 4'
+        assert doc.sections[0].footer.paragraphs[-1].text == 'Documento D004'
+
+    def test_record_errors_do_not_stop_batch(self, template, records, tmp_path):
+        records[2] = {'nombre': 'Sin documento'}
+        progress = []
+        engine = BatchEngine(template, tmp_path / 'out', '{documento}.docx', workers=1)
+        report = engine.run(records, progress=progress.append)
+
+        assert report['failed'] == 1
+        assert report['results'][2]['status'] == 'error'
+        assert len(progress) == len(records)
+
+    def test_invalid_records_do_not_stop_batch(self, template, records, tmp_path):
+        records[1] = {'index': 7, 'documento': 'X', 'nombre': 'Con index'}
+        records[3] = ['no', 'es', 'objeto']
+        records[4] = None
+        engine = BatchEngine(template, tmp_path / 'out', '{documento}.docx', workers=1)
+        report = engine.run(iter(records))
+
+        assert report['total'] == len(records)
+        assert [r['index'] for r in report['results'] if r['status'] == 'error'] == [1, 3, 4]
+        assert (tmp_path / 'out' / 'D005.docx').exists()
+
+    def test_rejects_non_scalar_values(self, template, records, tmp_path):
+        records[0]['nombre'] = ['Ana', 'Luis']
+        records[1]['documento'] = {'tipo': 'CC'}
+        engine = BatchEngine(template, tmp_path / 'out', 'informe_{index}.docx', workers=1)
+        report = engine.run(records)
+
+        assert [r['status'] for r in report['results'][:3]] == ['error', 'error', 'success']
+        assert 'nombre' in report['results'][0]['error']
+        assert not (tmp_path / 'out' / 'informe_0.docx').exists()
+        assert report['docs_per_second'] == pytest.approx(
+            report['succeeded'] / report['elapsed_seconds']
+        )
+
+    def test_rejects_paths_outside_output_dir(self, template, tmp_path):
+        engine = BatchEngine(template, tmp_path / 'out', '{documento}.docx', workers=1)
+        report = engine.run([
+            {'nombre': 'Ana', 'documento': '../../escape'},
+            {'nombre': 'Luis', 'documento': 'sub/L001'},
+        ])
+
+        assert report['results'][0]['status'] == 'error'
+        assert 'fuera de' in report['results'][0]['error']
+        assert not (tmp_path.parent / 'escape.docx').exists()
+        assert report['results'][1]['status'] == 'success'
+        assert (tmp_path / 'out' / 'sub' / 'L001.docx').exists()
+
+    def test_strict_mode(self, template, tmp_path):
+        engine = BatchEngine(template, tmp_path / 'out', workers=1, strict=True)
+        report = engine.run([{'nombre': 'Ana'}])
+        assert report['failed'] == 1
+        assert 'documento' in report['results'][0]['error']
+
+    def test_missing_template(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            BatchEngine(tmp_path / 'no_existe.docx', tmp_path)
+
+
+def test_process_document_placeholder(template, tmp_path):
+    result = process_document(
+        str(template), 'placeholder', {'nombre': 'Ana'}, str(tmp_path / 'out')
+    )
+    assert result['status'] == 'success'
+    assert Document(result['output']).paragraphs[0].text == 'Informe de Ana'
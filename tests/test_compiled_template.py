@@ -0,0 +1,171 @@
+"""
+Tests para CompiledTemplate
+"""
+import sys
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from docx import Document
+from core import compiled_template
+from core.compiled_template import (
+    CompiledTemplate, CompiledTemplateCache, get_compiled_template
+)
+from core.placeholder_engine import PlaceholderEngine
+
+
+@pytest.fixture
+def temp_dir():
+    """Crea directorio temporal para tests"""
+    temp = Path(tempfile.mkdtemp())
+    yield temp
+    shutil.rmtree(temp)
+
+
+@pytest.fixture
+def template_docx(temp_dir):
+    """Plantilla con placeholders en body, tabla, header y footer"""
+    doc_path = temp_dir / "plantilla.docx"
+    doc = Document()
+    doc.add_paragraph('Nombre: {{nombre}}')
+    doc.add_paragraph('Sin variables')
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 1).text = "Monto: {{monto}}"
+    doc.sections[0].header.add_paragraph('Cliente {{cliente}}')
+    doc.sections[0].footer.add_paragraph('© {{empresa}}')
+    doc.save(doc_path)
+    return doc_path
+
+
+DATA = {
+    'nombre': 'Juan',
+    'monto': '$100',
+    'cliente': 'Acme',
+    'empresa': 'TechCorp',
+}
+
+
+def _all_text(doc_path):
+    doc = Document(doc_path)
+    section = doc.sections[0]
+    parts = [p.text for p in doc.paragraphs]
+    parts += [cell.text for row in doc.tables[0].rows for cell in row.cells]
+    parts += [p.text for p in section.header.paragraphs]
+    parts += [p.text for p in section.footer.paragraphs]
+    return '\n'.join(parts)
+
+
+class TestCompiledTemplate:
+    """Tests para CompiledTemplate"""
+
+    def test_compile_finds_placeholders(self, template_docx):
+        template = CompiledTemplate(template_docx)
+        assert template.placeholders == set(DATA)
+
+    def test_render_replaces_all_parts(self, template_docx, temp_dir):
+        template = CompiledTemplate(template_docx)
+        output = temp_dir / "salida.docx"
+
+        count = template.render(DATA, output)
+
+        assert count == 4
+        text = _all_text(output)
+        for value in DATA.values():
+            assert value in text
+        assert '{{' not in text
+
+    def test_render_matches_engine(self, template_docx, temp_dir):
+        template = CompiledTemplate(template_docx)
+        output = temp_dir / "salida.docx"
+        template.render(DATA, output)
+
+        doc = Document(template_docx)
+        expected = PlaceholderEngine(doc).replace_all(DATA)
+        reference = temp_dir / "referencia.docx"
+        doc.save(reference)
+
+        assert template.render(DATA, temp_dir / "otra.docx") == expected
+        assert _all_text(output) == _all_text(reference)
+
+    def test_render_does_not_modify_template(self, template_docx, temp_dir):
+        template = CompiledTemplate(template_docx)
+        template.render(DATA, temp_dir / "a.docx")
+        template.render({'nombre': 'Ana'}, temp_dir / "b.docx")
+
+        assert 'Ana' in _all_text(temp_dir / "b.docx")
+        assert '{{monto}}' in _all_text(temp_dir / "b.docx")
+        assert 'Juan' not in _all_text(temp_dir / "b.docx")
+
+    def test_render_strict_missing(self, template_docx):
+        template = CompiledTemplate(template_docx)
+        with pytest.raises(ValueError, match="sin datos"):
+            template.render_bytes({'nombre': 'Juan'}, strict=True)
+
+    def test_render_bytes_from_bytes(self, template_docx):
+        template = CompiledTemplate(template_docx.read_bytes())
+        blob = template.render_bytes(DATA)
+        assert blob[:2] == b'PK'
+
+    def test_get_compiled_template_cached(self, template_docx):
+        first = get_compiled_template(template_docx)
+        assert get_compiled_template(str(template_docx)) is first
+
+    def test_new_document_clones_kept_document(self, template_docx, monkeypatch):
+        template = CompiledTemplate(template_docx, keep_document=True)
+        monkeypatch.setattr(compiled_template, 'Document', None)
+
+        first = template.new_document()
+        first.paragraphs[0].text = 'Modificado'
+        second = template.new_document()
+
+        assert second.paragraphs[0].text == 'Nombre: {{nombre}}'
+        assert second.sections[0].header.paragraphs[-1].text == 'Cliente {{cliente}}'
+
+
+class TestCompiledTemplateCache:
+    """Tests para el caché de plantillas por huella"""
+
+    def test_same_content_compiled_once(self, template_docx):
+        cache = CompiledTemplateCache()
+        blob = template_docx.read_bytes()
+
+        first = cache.get(blob)
+        assert cache.get(bytes(blob), CompiledTemplateCache.fingerprint(blob)) is first
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+        assert cache.stats()['hit_rate'] == 0.5
+
+    def test_estimated_size_counts_compiled_parts(self, temp_dir):
+        path = temp_dir / 'sin_variables.docx'
+        doc = Document()
+        doc.add_paragraph('Texto fijo')
+        doc.save(path)
+        blob = path.read_bytes()
+        assert CompiledTemplate(blob).estimated_size == len(blob)
+
+        doc.add_paragraph('Hola {{nombre}}')
+        doc.save(path)
+        blob = path.read_bytes()
+        assert CompiledTemplate(blob).estimated_size > len(blob)
+
+    def test_evicts_over_budget(self, template_docx, temp_dir):
+        blob = template_docx.read_bytes()
+        other = Document(template_docx)
+        other.add_paragraph('Otra plantilla {{extra}}')
+        other_path = Path(temp_dir) / 'otra.docx'
+        other.save(other_path)
+
+        size = CompiledTemplate(blob).estimated_size
+        cache = CompiledTemplateCache(max_bytes=int(size * 1.5))
+        cache.get(blob)
+        cache.get(other_path.read_bytes())
+
+        assert cache.stats()['entries'] == 1
+        assert cache.stats()['evictions'] == 1
+        cache.get(blob)
+        assert cache.stats()['misses'] == 3
@@ -0,0 +1,85 @@
+"""
+Tests para el executor acotado del servidor REST y la carga de configuración
+"""
+import sys
+import os
+import asyncio
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from api.concurrency import BoundedExecutor
+from utils.config import get_setting
+from utils.exceptions import ProcessingTimeoutError, ServerBusyError
+
+
+class TestBoundedExecutor:
+    """Tests para BoundedExecutor"""
+
+    def test_run_returns_result(self):
+        executor = BoundedExecutor(max_workers=2, max_queue_size=0, timeout_seconds=5)
+        assert asyncio.run(executor.run(sum, [1, 2, 3])) == 6
+        assert executor.in_flight == 0
+
+    def test_rejects_when_saturated(self):
+        executor = BoundedExecutor(max_workers=1, max_queue_size=1, timeout_seconds=5)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(executor.run(release.wait))
+            second = asyncio.ensure_future(executor.run(release.wait))
+            await asyncio.sleep(0)
+            with pytest.raises(ServerBusyError):
+                await executor.run(release.wait)
+            release.set()
+            await asyncio.gather(first, second)
+
+        asyncio.run(scenario())
+        assert executor.rejected == 1
+        assert executor.in_flight == 0
+
+    def test_map_reserves_all_or_nothing(self):
+        executor = BoundedExecutor(max_workers=1, max_queue_size=1, timeout_seconds=5)
+        with pytest.raises(ServerBusyError):
+            asyncio.run(executor.map(abs, [-1, -2, -3]))
+        assert asyncio.run(executor.map(abs, [-1, -2])) == [1, 2]
+
+    def test_map_releases_unsubmitted_on_error(self, monkeypatch):
+        executor = BoundedExecutor(max_workers=1, max_queue_size=2, timeout_seconds=5)
+        submit = executor._executor.submit
+        calls = []
+
+        def failing_submit(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("pool cerrado")
+            return submit(*args, **kwargs)
+
+        monkeypatch.setattr(executor._executor, 'submit', failing_submit)
+        with pytest.raises(RuntimeError):
+            asyncio.run(executor.map(abs, [-1, -2, -3]))
+        executor._executor.shutdown(wait=True)
+        assert executor.in_flight == 0
+
+    def test_timeout(self):
+        executor = BoundedExecutor(max_workers=1, max_queue_size=0, timeout_seconds=0.05)
+        release = threading.Event()
+        with pytest.raises(ProcessingTimeoutError):
+            asyncio.run(executor.run(release.wait))
+        release.set()
+
+
+class TestConfig:
+    """Tests para la lectura de config/settings.yaml"""
+
+    def test_get_nested_setting(self):
+        assert get_setting('concurrency.worker_pool_size') == 4
+
+    def test_default_for_missing_key(self):
+        assert get_setting('concurrency.no_existe', 7) == 7
+        assert get_setting('app.name.extra', 'x') == 'x'
+
+    def test_missing_file_uses_defaults(self, tmp_path):
+        assert get_setting('app.name', 'def', config_path=tmp_path / 'no.yaml') == 'def'
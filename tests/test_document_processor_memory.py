@@ -0,0 +1,64 @@
+"""
+Tests para DocumentProcessor con documentos en memoria (bytes y streams)
+"""
+import sys
+import os
+import io
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from docx import Document
+from core.document_processor import DocumentProcessor
+from core.placeholder_engine import PlaceholderEngine
+
+
+@pytest.fixture
+def docx_bytes():
+    """Contenido .docx con un placeholder en el body"""
+    doc = Document()
+    doc.add_paragraph('Hola {{nombre}}')
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+class TestInMemoryProcessor:
+    """Tests para DocumentProcessor sin archivos en disco"""
+
+    def test_load_from_bytes(self, docx_bytes):
+        processor = DocumentProcessor(docx_bytes).load()
+        assert processor.in_memory
+        assert processor.file_path is None
+        assert processor.get_statistics()['file_size_bytes'] == len(docx_bytes)
+
+    def test_load_from_stream(self, docx_bytes):
+        processor = DocumentProcessor(io.BytesIO(docx_bytes)).load()
+        assert processor.document.paragraphs[0].text == 'Hola {{nombre}}'
+
+    def test_to_bytes_roundtrip(self, docx_bytes):
+        processor = DocumentProcessor(docx_bytes).load()
+        PlaceholderEngine(processor.document).replace_all({'nombre': 'Ana'})
+
+        result = Document(io.BytesIO(processor.to_bytes()))
+        assert result.paragraphs[0].text == 'Hola Ana'
+
+    def test_write_to_stream(self, docx_bytes):
+        processor = DocumentProcessor(docx_bytes).load()
+        output = io.BytesIO()
+        processor.write_to(output)
+        assert Document(io.BytesIO(output.getvalue())).paragraphs[0].text == 'Hola {{nombre}}'
+
+    def test_save_requires_path(self, docx_bytes):
+        processor = DocumentProcessor(docx_bytes).load()
+        with pytest.raises(RuntimeError):
+            processor.save()
+
+    def test_invalid_bytes(self):
+        with pytest.raises(ValueError):
+            DocumentProcessor(b'no es un docx')
+
+    def test_validate_integrity(self, docx_bytes):
+        results = DocumentProcessor(docx_bytes).validate_integrity()
+        assert all(results.values())
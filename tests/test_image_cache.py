@@ -0,0 +1,205 @@
+"""
+Tests para el caché de imágenes y su uso desde ImageReplacer
+"""
+import sys
+import os
+import io
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from docx import Document
+from docx.shared import Inches
+from core import image_cache
+from core.image_cache import ImageBlobCache, detect_content_type, target_pixels
+from core.image_replacer import ImageReplacer
+
+from tests.helpers import make_png
+
+
+@pytest.fixture
+def logo(tmp_path):
+    path = tmp_path / 'logo.png'
+    path.write_bytes(make_png(color=(0, 0, 255)))
+    return path
+
+
+class TestImageBlobCache:
+    """Tests para ImageBlobCache"""
+
+    def test_hits_and_misses(self, logo):
+        cache = ImageBlobCache()
+        first = cache.get(logo)
+        second = cache.get(str(logo))
+
+        assert first is second
+        assert first.content_type == 'image/png'
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_modified_file_is_reloaded(self, logo):
+        cache = ImageBlobCache()
+        cache.get(logo)
+        logo.write_bytes(make_png(width=3))
+        assert cache.get(logo).blob == make_png(width=3)
+        assert cache.stats()['misses'] == 2
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        blob = make_png()
+        cache = ImageBlobCache(max_bytes=len(blob) * 2)
+        paths = []
+        for i in range(3):
+            path = tmp_path / f'img{i}.png'
+            path.write_bytes(blob)
+            paths.append(path)
+
+        cache.get(paths[0])
+        cache.get(paths[1])
+        cache.get(paths[0])
+        cache.get(paths[2])
+
+        stats = cache.stats()
+        assert stats['entries'] == 2
+        assert stats['evictions'] == 1
+        cache.get(paths[0])
+        assert cache.stats()['hits'] == 2
+
+    def test_detect_content_type(self):
+        assert detect_content_type(b'\xff\xd8\xff\xe0rest') == 'image/jpeg'
+        assert detect_content_type(b'GIF89a...') == 'image/gif'
+        assert detect_content_type(b'????', 'foto.JPG') == 'image/jpeg'
+        assert detect_content_type(b'????') is None
+
+
+def test_replacer_uses_shared_cache(tmp_path, logo):
+    template = io.BytesIO()
+    doc = Document()
+    doc.sections[0].header.paragraphs[0].add_run().add_picture(
+        io.BytesIO(make_png()), width=Inches(1)
+    )
+    doc.save(template)
+
+    cache = ImageBlobCache()
+    for _ in range(3):
+        doc = Document(io.BytesIO(template.getvalue()))
+        results = ImageReplacer(doc, blob_cache=cache).replace_images_batch(
+            {'header_0_0': str(logo)}
+        )
+        assert results == {'header_0_0': True}
+
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['hits'] == 2
+
+    image_rel = next(
+        rel for rel in doc.sections[0].header.part.rels.values() if 'image' in rel.reltype
+    )
+    assert image_rel.target_part.blob == logo.read_bytes()
+
+
+def test_same_image_in_several_locations_is_stored_once(tmp_path, logo):
+    doc = Document()
+    doc.add_section()
+    doc.sections[1].header.is_linked_to_previous = False
+    for i, story in enumerate([doc.sections[0].header, doc.sections[1].header,
+                               doc.sections[0].footer]):
+        story.paragraphs[0].add_run().add_picture(
+            io.BytesIO(make_png(color=(i, i, i))), width=Inches(1)
+        )
+    template = io.BytesIO()
+    doc.save(template)
+
+    doc = Document(io.BytesIO(template.getvalue()))
+    replacer = ImageReplacer(doc, blob_cache=ImageBlobCache())
+    results = replacer.replace_images_batch({
+        'header_0_0': str(logo), 'header_1_0': str(logo), 'footer_0_0': str(logo)
+    })
+    assert all(results.values())
+
+    replacer.deduplicate_media()
+    output = io.BytesIO()
+    doc.save(output)
+    media = [n for n in zipfile.ZipFile(output).namelist() if n.startswith('word/media/')]
+    assert len(media) == 1
+
+    result = Document(io.BytesIO(output.getvalue()))
+    for story in (result.sections[0].header, result.sections[1].header,
+                  result.sections[0].footer):
+        rel = next(r for r in story.part.rels.values() if 'image' in r.reltype)
+        assert rel.target_part.blob == logo.read_bytes()
+
+
+def test_location_can_be_replaced_again_after_batch(tmp_path, logo):
+    doc = Document()
+    doc.add_section()
+    doc.sections[1].header.is_linked_to_previous = False
+    for i, section in enumerate(doc.sections):
+        section.header.paragraphs[0].add_run().add_picture(
+            io.BytesIO(make_png(color=(i, i, i))), width=Inches(1)
+        )
+    other = tmp_path / 'otro.png'
+    other.write_bytes(make_png(color=(0, 255, 0)))
+
+    replacer = ImageReplacer(doc, blob_cache=ImageBlobCache())
+    replacer.replace_images_batch({'header_0_0': str(logo), 'header_1_0': str(logo)})
+    assert replacer.replace_images_batch({'header_1_0': str(other)}) == {'header_1_0': True}
+
+    blobs = [
+        next(r for r in s.header.part.rels.values() if 'image' in r.reltype).target_part.blob
+        for s in doc.sections
+    ]
+    assert blobs == [logo.read_bytes(), other.read_bytes()]
+
+
+class TestDownscale:
+    """Tests para la reducción de imágenes al tamaño mostrado"""
+
+    def test_target_pixels(self):
+        assert target_pixels(914400, 457200, 150) == (150, 75)
+        assert target_pixels(10, 10, 96) == (1, 1)
+
+    def test_without_pillow_keeps_original(self, logo, monkeypatch):
+        monkeypatch.setattr(image_cache, 'PILImage', None)
+        cache = ImageBlobCache()
+        fitted = cache.get_fitted(logo, 9144, 9144, 96)
+        assert fitted.blob == logo.read_bytes()
+        # La entrada ajustada mantiene vivo el blob original: cuenta su tamaño
+        assert cache.stats()['bytes'] == 2 * len(fitted.blob)
+
+    def test_downscales_large_image(self, tmp_path):
+        PIL = pytest.importorskip('PIL.Image')
+        path = tmp_path / 'grande.png'
+        PIL.new('RGB', (1200, 600), (10, 20, 30)).save(path)
+
+        cache = ImageBlobCache()
+        fitted = cache.get_fitted(path, 914400, 457200, 100)
+        with PIL.open(io.BytesIO(fitted.blob)) as img:
+            assert img.size == (100, 50)
+
+        assert cache.get_fitted(path, 914400, 457200, 100) is fitted
+
+    def test_downscales_jpeg_with_quality(self, tmp_path):
+        PIL = pytest.importorskip('PIL.Image')
+        path = tmp_path / 'foto.jpg'
+        PIL.new('RGB', (1600, 1600), (200, 120, 40)).save(path, quality=95)
+
+        fitted = ImageBlobCache().get_fitted(path, 914400, 914400, 150, jpeg_quality=70)
+        assert fitted.content_type == 'image/jpeg'
+        assert len(fitted.blob) < path.stat().st_size
+        with PIL.open(io.BytesIO(fitted.blob)) as img:
+            assert (img.format, img.size) == ('JPEG', (150, 150))
+
+    def test_replacer_fits_image_to_drawing(self, tmp_path):
+        PIL = pytest.importorskip('PIL.Image')
+        doc = Document()
+        doc.add_paragraph().add_run().add_picture(io.BytesIO(make_png()), width=Inches(1))
+        path = tmp_path / 'grande.png'
+        PIL.new('RGB', (2000, 2000), (0, 128, 255)).save(path)
+
+        replacer = ImageReplacer(doc, blob_cache=ImageBlobCache(), max_dpi=96)
+        assert replacer.replace_body_image_by_index(0, str(path))
+
+        rel = next(r for r in doc.part.rels.values() if 'image' in r.reltype)
+        with PIL.open(io.BytesIO(rel.target_part.blob)) as img:
+            assert img.size == (96, 96)
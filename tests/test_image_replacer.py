@@ -3,6 +3,7 @@ Tests para el módulo ImageReplacer.
 """
 import sys
 import os
+import io
 import tempfile
 import shutil
 from pathlib import Path
@@ -12,8 +13,11 @@ from unittest.mock import Mock, patch, MagicMock
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from docx import Document
+from docx.shared import Inches
 from core.image_replacer import ImageReplacer, ImageInfo, replace_images_in_document
 
+from tests.helpers import make_png
+
 
 class TestImageInfo(TestCase):
     """Tests para la clase ImageInfo."""
@@ -222,6 +226,74 @@ class TestImageReplacer(TestCase):
         
         self.assertIsNone(dims)
 
+    def test_body_images_ordered_by_position(self):
+        """Test imágenes del cuerpo ordenadas por posición en el documento."""
+        doc = Document()
+        first = doc.add_paragraph()
+        second = doc.add_paragraph()
+        # La primera imagen agregada (rId menor) queda en el segundo párrafo
+        second.add_run().add_picture(io.BytesIO(make_png((1, 1, 1))), width=Inches(2))
+        first.add_run().add_picture(io.BytesIO(make_png((2, 2, 2))), width=Inches(1))
+        
+        replacer = ImageReplacer(doc)
+        body = replacer.get_body_images_info()
+        
+        self.assertEqual([img.width_emu for img in body], [Inches(1), Inches(2)])
+        self.assertEqual([img.index for img in body], [0, 1])
+        self.assertIsNotNone(body[0].drawing_element)
+        
+        new_image = os.path.join(self.test_dir, 'nueva.png')
+        with open(new_image, 'wb') as f:
+            f.write(make_png((9, 9, 9)))
+        self.assertTrue(replacer.replace_body_image_by_index(0, new_image))
+        
+        rel = doc.part.rels[body[0].rel_id]
+        self.assertEqual(rel.target_part.blob, make_png((9, 9, 9)))
+
+    def test_scanning_is_lazy_per_location(self):
+        """Test solo se escanean las ubicaciones consultadas."""
+        doc = Document()
+        doc.sections[0].header.paragraphs[0].add_run().add_picture(
+            io.BytesIO(make_png((1, 1, 1))), width=Inches(1)
+        )
+        doc.add_paragraph().add_run().add_picture(
+            io.BytesIO(make_png((2, 2, 2))), width=Inches(2)
+        )
+        
+        replacer = ImageReplacer(doc)
+        self.assertEqual(replacer._image_cache, {})
+        
+        header_images = replacer.get_header_images_info(0)
+        self.assertEqual(len(header_images), 1)
+        self.assertEqual(list(replacer._image_cache), [('headers', 0, 'default')])
+        
+        self.assertEqual(replacer.get_summary()['total'], 2)
+        self.assertIs(replacer.get_header_images_info(0)[0], header_images[0])
+
+    def test_first_page_header_image(self):
+        """Test imágenes en el header de primera página."""
+        doc = Document()
+        doc.sections[0].different_first_page_header_footer = True
+        doc.sections[0].first_page_header.paragraphs[0].add_run().add_picture(
+            io.BytesIO(make_png((1, 1, 1))), width=Inches(1)
+        )
+        
+        replacer = ImageReplacer(doc)
+        self.assertEqual(replacer.get_summary()['total_headers'], 1)
+        self.assertEqual(
+            replacer.get_all_images_info()['headers'][0]['variant'], 'first_page'
+        )
+        
+        new_image = os.path.join(self.test_dir, 'portada.png')
+        with open(new_image, 'wb') as f:
+            f.write(make_png((9, 9, 9)))
+        results = replacer.replace_images_batch({'first_page_header_0_0': new_image})
+        self.assertEqual(results, {'first_page_header_0_0': True})
+        
+        image = replacer.get_header_images_info(0, 'first_page')[0]
+        rel = doc.sections[0].first_page_header.part.rels[image.rel_id]
+        self.assertEqual(rel.target_part.blob, make_png((9, 9, 9)))
+
 
 class TestReplaceImagesInDocument(TestCase):
     """Tests para la función de conveniencia."""
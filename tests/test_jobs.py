@@ -0,0 +1,92 @@
+"""
+Tests para la cola persistente de trabajos batch
+"""
+import sys
+import os
+import io
+import time
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from docx import Document
+from api.jobs import COMPLETED, FINISHED_STATES, JobQueue, JobStore
+
+
+def docx_stream(text):
+    doc = Document()
+    doc.add_paragraph(text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def wait_finished(queue, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.store.get(job_id)
+        if job['status'] in FINISHED_STATES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError("El trabajo no terminó")
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(tmp_path / 'spool', workers=1)
+    yield queue
+    queue.shutdown()
+
+
+class TestJobQueue:
+    """Tests para JobQueue"""
+
+    def test_job_produces_zip_with_results(self, queue):
+        files = [
+            ('a.docx', docx_stream('Hola {{nombre}}')),
+            ('a.docx', docx_stream('Adiós {{nombre}}')),
+            ('roto.docx', io.BytesIO(b'no es docx')),
+        ]
+        job_id = queue.submit(files, 'placeholders', {'nombre': 'Ana'})
+        job = wait_finished(queue, job_id)
+
+        assert job['status'] == COMPLETED
+        assert (job['total'], job['processed'], job['failed']) == (3, 3, 1)
+
+        with zipfile.ZipFile(queue.result_path(job_id)) as zf:
+            assert zf.namelist() == ['a.docx', '00001_a.docx']
+            doc = Document(io.BytesIO(zf.read('00001_a.docx')))
+            assert doc.paragraphs[0].text == 'Adiós Ana'
+
+        files = queue.store.get(job_id, include_files=True)['files']
+        assert [f['status'] for f in files] == ['success', 'success', 'error']
+
+    def test_resume_unfinished_jobs(self, tmp_path):
+        spool = tmp_path / 'spool'
+        first = JobQueue(spool, workers=1)
+        first._dispatcher.shutdown(wait=True)  # simula caída antes de procesar
+        with pytest.raises(RuntimeError):
+            first.submit([('a.docx', docx_stream('{{x}}'))], 'placeholders', {'x': '1'})
+
+        second = JobQueue(spool, workers=1)
+        try:
+            pending = second.store.unfinished()
+            assert len(pending) == 1
+            assert second.resume() == 1
+            assert wait_finished(second, pending[0])['status'] == COMPLETED
+        finally:
+            second.shutdown()
+
+    def test_delete_finished_job(self, queue):
+        job_id = queue.submit([('a.docx', docx_stream('x'))], 'footer', {'text': 'Pie'})
+        wait_finished(queue, job_id)
+        assert queue.delete(job_id)
+        assert queue.store.get(job_id) is None
+        assert not queue.job_dir(job_id).exists()
+
+
+def test_store_unknown_job(tmp_path):
+    assert JobStore(tmp_path / 'jobs.db').get('no-existe') is None
@@ -0,0 +1,69 @@
+"""
+Tests para el escritor de paquetes con copia de entradas sin cambios
+"""
+import sys
+import os
+import io
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from docx import Document
+from core.package_writer import PackageZipWriter, SourcePackage, save_document
+
+
+@pytest.fixture
+def source():
+    """Paquete .docx con body y footer"""
+    doc = Document()
+    doc.add_paragraph('Hola {{nombre}}')
+    doc.sections[0].footer.add_paragraph('Pie')
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return SourcePackage(buffer.getvalue())
+
+
+class TestPackageZipWriter:
+    """Tests para PackageZipWriter"""
+
+    def test_copy_keeps_compressed_bytes(self, source):
+        output = io.BytesIO()
+        with PackageZipWriter(output, source) as writer:
+            for name in source.entries:
+                writer.copy(name)
+
+        result = zipfile.ZipFile(output)
+        assert result.testzip() is None
+        for name, info in source.entries.items():
+            copied = result.getinfo(name)
+            assert copied.compress_size == info.compress_size
+            assert result.read(name) == source.read(name)
+        assert writer.copied == len(source.entries)
+
+    def test_write_detects_unchanged_blob(self, source):
+        output = io.BytesIO()
+        with PackageZipWriter(output, source) as writer:
+            writer.write('word/styles.xml', source.read('word/styles.xml'))
+            writer.write('word/document.xml', b'<nuevo/>')
+
+        assert (writer.copied, writer.compressed) == (1, 1)
+        assert zipfile.ZipFile(output).read('word/document.xml') == b'<nuevo/>'
+
+
+class TestSaveDocument:
+    """Tests para save_document"""
+
+    def test_save_document_roundtrip(self, source):
+        doc = Document(io.BytesIO(source.blob))
+        doc.paragraphs[0].text = 'Hola Ana'
+
+        output = io.BytesIO()
+        stats = save_document(doc, source, output)
+
+        reloaded = Document(io.BytesIO(output.getvalue()))
+        assert reloaded.paragraphs[0].text == 'Hola Ana'
+        assert reloaded.sections[0].footer.paragraphs[-1].text == 'Pie'
+        assert stats['copied'] > 0
+        assert stats['compressed'] > 0
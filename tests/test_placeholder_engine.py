@@ -0,0 +1,266 @@
+"""
+Tests para PlaceholderEngine
+"""
+import sys
+import os
+import io
+import re
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from docx import Document
+from docx.oxml import parse_xml
+from docx.shared import Inches
+from core.compiled_template import CompiledTemplate
+from core.placeholder_engine import PlaceholderEngine, replace_in_segments
+from core.xml_engine import XmlPlaceholderEngine
+
+
+@pytest.fixture
+def document():
+    """Documento con placeholders en body, tabla, header y footer"""
+    doc = Document()
+    doc.add_paragraph('Hola {{nombre}}, fecha {{fecha}}')
+    doc.add_paragraph('Sin variables')
+    doc.add_paragraph('Otra vez {{nombre}}')
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "Cliente: {{cliente}}"
+    doc.sections[0].header.add_paragraph('Encabezado {{empresa}}')
+    doc.sections[0].footer.add_paragraph('© {{empresa}}')
+    return doc
+
+
+class TestPlaceholderIndex:
+    """Tests para el índice de placeholders"""
+
+    def test_index_locations(self, document):
+        engine = PlaceholderEngine(document)
+        index = engine.get_index()
+
+        assert set(index) == {'nombre', 'fecha', 'cliente', 'empresa'}
+        assert [loc.location for loc in index['nombre']] == ['body', 'body']
+        assert index['cliente'][0].location == 'tables'
+        assert {loc.location for loc in index['empresa']} == {'headers', 'footers'}
+
+        first = index['nombre'][0]
+        assert first.paragraph.text[first.start:first.end] == '{{nombre}}'
+        assert first.runs == (0,)
+        assert first.part == '/word/document.xml'
+
+    def test_index_built_once(self, document, monkeypatch):
+        engine = PlaceholderEngine(document)
+        calls = []
+        original = engine._iter_paragraphs
+
+        def counting_iter():
+            calls.append(1)
+            return original()
+
+        monkeypatch.setattr(engine, '_iter_paragraphs', counting_iter)
+
+        engine.find_all_placeholders()
+        engine.validate_data({'nombre': 'x'})
+        engine.get_placeholder_report()
+        engine.preview_replacements({'nombre': 'x'})
+        assert len(calls) == 1
+
+        engine.replace_all({'nombre': 'x'})
+        assert len(calls) == 1
+
+        engine.find_all_placeholders()
+        assert len(calls) == 2
+
+    def test_invalidate_after_external_change(self, document):
+        engine = PlaceholderEngine(document)
+        assert 'nuevo' not in engine.find_all_placeholders()
+
+        document.add_paragraph('{{nuevo}}')
+        assert 'nuevo' not in engine.find_all_placeholders()
+
+        engine.invalidate()
+        assert 'nuevo' in engine.find_all_placeholders()
+
+    def test_report_counts(self, document):
+        report = PlaceholderEngine(document).get_placeholder_report()
+
+        assert report['total_unique'] == 4
+        assert report['placeholders']['nombre'] == 2
+        assert report['locations'] == {
+            'body': 3, 'tables': 1, 'headers': 1, 'footers': 1
+        }
+
+    def test_preview(self, document):
+        examples = PlaceholderEngine(document).preview_replacements(
+            {'nombre': 'Ana'}, max_examples=1
+        )
+        assert examples == [{
+            'original': 'Hola {{nombre}}, fecha {{fecha}}',
+            'replaced': 'Hola Ana, fecha {{fecha}}'
+        }]
+
+
+class TestReplaceAll:
+    """Tests para el reemplazo de placeholders"""
+
+    def test_replace_all(self, document):
+        engine = PlaceholderEngine(document)
+        count = engine.replace_all({
+            'nombre': 'Ana', 'fecha': 'hoy', 'cliente': 'Acme', 'empresa': 'TC'
+        })
+
+        assert count == 6
+        assert document.paragraphs[0].text == 'Hola Ana, fecha hoy'
+        assert document.tables[0].cell(0, 0).text == 'Cliente: Acme'
+        assert document.sections[0].footer.paragraphs[-1].text == '© TC'
+        assert engine.find_all_placeholders() == set()
+
+    def test_replace_strict_missing(self, document):
+        engine = PlaceholderEngine(document)
+        with pytest.raises(ValueError, match="sin datos"):
+            engine.replace_all({'nombre': 'Ana'}, strict=True)
+
+    def test_replace_without_format(self, document):
+        engine = PlaceholderEngine(document)
+        engine.replace_all({'nombre': 'Ana'}, preserve_format=False)
+        assert document.paragraphs[2].text == 'Otra vez Ana'
+
+
+class TestSubstitute:
+    """Tests para la sustitución en una sola pasada"""
+
+    def test_counts_each_key_once_per_text(self, document):
+        engine = PlaceholderEngine(document)
+        text, count = engine._substitute(
+            '{{a}} y {{a}} con {{b}} sin {{c}}', {'a': 1, 'b': 'B', 'z': 'Z'}
+        )
+        assert text == '1 y 1 con B sin {{c}}'
+        assert count == 2
+
+    def test_values_are_not_rescanned(self, document):
+        engine = PlaceholderEngine(document)
+        text, count = engine._substitute('{{a}}', {'a': '{{b}}', 'b': 'B'})
+        assert text == '{{b}}'
+        assert count == 1
+
+
+class TestRunSpanningReplacement:
+    """Tests para placeholders partidos entre varios runs"""
+
+    def _split_paragraph(self):
+        doc = Document()
+        para = doc.add_paragraph()
+        para.add_run('Hola {{nom')
+        bold = para.add_run('bre}} y ')
+        bold.bold = True
+        para.add_run('{{fecha}}')
+        return doc, para
+
+    def test_replace_split_placeholder(self):
+        doc, para = self._split_paragraph()
+        count = PlaceholderEngine(doc).replace_all({'nombre': 'Ana', 'fecha': 'hoy'})
+
+        assert count == 2
+        assert para.text == 'Hola Ana y hoy'
+        assert [run.text for run in para.runs] == ['Hola Ana', ' y ', 'hoy']
+        assert para.runs[1].bold is True
+
+    def test_missing_key_left_untouched(self):
+        doc, para = self._split_paragraph()
+        PlaceholderEngine(doc).replace_all({'fecha': 'hoy'})
+        assert [run.text for run in para.runs] == ['Hola {{nom', 'bre}} y ', 'hoy']
+
+    def test_multiline_value(self):
+        doc = Document()
+        para = doc.add_paragraph('Dirección: {{dir}}')
+        PlaceholderEngine(doc).replace_all({'dir': 'Calle 1\nBogotá'})
+        assert para.text == 'Dirección: Calle 1\nBogotá'
+
+    def test_replace_in_segments(self):
+        pattern = re.compile(PlaceholderEngine.PLACEHOLDER_PATTERN)
+        texts, count = replace_in_segments(
+            ['a{', '{x}', '}b', '', '{{y}}'], pattern, {'x': 'X', 'y': ''}
+        )
+        assert texts == ['aX', '', 'b', '', '']
+        assert count == 2
+
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+MC_NS = 'http://schemas.openxmlformats.org/markup-compatibility/2006'
+WPS_NS = 'http://schemas.microsoft.com/office/word/2010/wordprocessingShape'
+
+
+def _text_box(text):
+    """Cuadro de texto con versión principal (wps) y copia VML (mc:Fallback)"""
+    return parse_xml(
+        f'<w:r xmlns:w="{W_NS}" xmlns:mc="{MC_NS}" xmlns:wps="{WPS_NS}">'
+        f'<mc:AlternateContent>'
+        f'<mc:Choice Requires="wps"><wps:txbx><w:txbxContent>'
+        f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>'
+        f'</w:txbxContent></wps:txbx></mc:Choice>'
+        f'<mc:Fallback><w:pict><w:txbxContent>'
+        f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>'
+        f'</w:txbxContent></w:pict></mc:Fallback>'
+        f'</mc:AlternateContent></w:r>'
+    )
+
+
+@pytest.fixture
+def nested_document():
+    """Placeholders en tabla anidada, cuadro de texto, control de contenido y tabla de header"""
+    doc = Document()
+    outer = doc.add_table(rows=1, cols=1)
+    outer.cell(0, 0).add_table(rows=1, cols=1).cell(0, 0).text = 'Nota {{nota}}'
+    doc.add_paragraph()._p.append(_text_box('Caja {{caja}}'))
+    doc.add_paragraph()._p.addprevious(parse_xml(
+        f'<w:sdt xmlns:w="{W_NS}"><w:sdtContent>'
+        f'<w:p><w:r><w:t>Control {{{{control}}}}</w:t></w:r></w:p>'
+        f'</w:sdtContent></w:sdt>'
+    ))
+    inline = doc.add_paragraph('Inline ')
+    inline._p.append(parse_xml(
+        f'<w:sdt xmlns:w="{W_NS}"><w:sdtContent>'
+        f'<w:r><w:t>{{{{inline}}}}</w:t></w:r>'
+        f'</w:sdtContent></w:sdt>'
+    ))
+    header = doc.sections[0].header
+    header.add_table(rows=1, cols=1, width=Inches(2)).cell(0, 0).text = '{{encabezado}}'
+    return doc
+
+
+class TestStoryCoverage:
+    """Tests para el recorrido XML de todas las partes"""
+
+    DATA = {
+        'nota': '4.5', 'caja': 'A', 'control': 'B', 'inline': 'C', 'encabezado': 'D'
+    }
+
+    def test_finds_every_placeholder(self, nested_document):
+        engine = PlaceholderEngine(nested_document)
+        index = engine.get_index()
+
+        assert set(index) == set(self.DATA)
+        # La copia mc:Fallback del cuadro de texto no se cuenta dos veces
+        assert len(index['caja']) == 1
+        assert index['nota'][0].location == 'tables'
+        assert index['encabezado'][0].location == 'headers'
+
+    def test_replaces_every_placeholder(self, nested_document):
+        count = PlaceholderEngine(nested_document).replace_all(self.DATA)
+        assert count == 5
+
+        xml = nested_document.element.xml + nested_document.sections[0].header._element.xml
+        assert '{{' not in xml
+        assert xml.count('Caja A') == 2
+
+    def test_compiled_and_xml_engines_agree(self, nested_document, tmp_path):
+        path = tmp_path / 'anidado.docx'
+        nested_document.save(path)
+
+        xml_engine = XmlPlaceholderEngine(path)
+        assert xml_engine.replace_all(self.DATA) == 5
+
+        compiled = CompiledTemplate(path)
+        assert compiled.placeholders == set(self.DATA)
+        assert compiled.render(self.DATA, io.BytesIO()) == 5
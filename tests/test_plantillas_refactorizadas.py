@@ -12,7 +12,12 @@ import tempfile
 from pathlib import Path
 from docx import Document
 
-from generar_informe import generate_report, DynamicContentProcessor
+import io
+
+from generar_informe import (
+    generate_report, generate_reports_from_stream, iter_jsonl_records,
+    DynamicContentProcessor
+)
 
 
 class TestJSONStructureValidation:
@@ -75,6 +80,25 @@ class TestDynamicLists:
         assert data["dispositivos"][0] == "First"
         assert data["dispositivos"][2] == "Third"
 
+    def test_expand_list_in_place(self):
+        """Test list items are inserted after the placeholder, in order."""
+        doc = Document()
+        doc.add_paragraph("Antes")
+        para = doc.add_paragraph("{{dispositivos}}")
+        para.alignment = 1
+        doc.add_paragraph("Después {{vacia}}")
+        
+        processor = DynamicContentProcessor(doc)
+        count = processor.expand_dynamic_lists(
+            {"dispositivos": ["First", "Second", "Third"], "vacia": []}
+        )
+        
+        assert count == 1
+        assert [p.text for p in doc.paragraphs] == [
+            "Antes", "• First", "• Second", "• Third", "Después "
+        ]
+        assert all(p.alignment == 1 for p in doc.paragraphs[1:4])
+
 
 class TestDynamicTables:
     """Tests for dynamic table row expansion."""
@@ -114,6 +138,70 @@ class TestDynamicTables:
         }
         assert data["responsables"][0]["telefono"] == ""
 
+    def test_expand_table_rows_in_order(self):
+        """Test bulk expansion keeps record order and row formatting."""
+        doc = Document()
+        table = doc.add_table(rows=2, cols=2)
+        table.rows[0].cells[0].text = "Nombre"
+        table.rows[1].cells[0].text = "{{responsables.nombre}}"
+        table.rows[1].cells[1].text = "{{telefono}} / {{desconocido}}"
+        table.rows[1].cells[1].paragraphs[0].alignment = 1
+        
+        rows = [{"nombre": f"Person {i}", "telefono": str(i)} for i in range(50)]
+        processor = DynamicContentProcessor(doc)
+        assert processor.expand_dynamic_tables({"responsables": rows}) == 1
+        
+        assert len(table.rows) == 51
+        assert [r.cells[0].text for r in table.rows[1:]] == [f"Person {i}" for i in range(50)]
+        assert table.rows[3].cells[1].text == "2 / {{desconocido}}"
+        assert table.rows[3].cells[1].paragraphs[0].alignment == 1
+
+    def test_expand_table_rows_preserves_runs(self):
+        """Test row placeholders are replaced inside the formatted runs."""
+        doc = Document()
+        table = doc.add_table(rows=1, cols=1)
+        cell = table.rows[0].cells[0]
+        para = cell.paragraphs[0]
+        para.add_run("{{notas.")
+        para.add_run("estudiante}}").bold = True
+        para.add_run(": ")
+        para.add_run("{{nota}}").italic = True
+        cell.add_paragraph("Periodo {{notas.periodo}}")
+        
+        rows = [{"estudiante": "Ana", "nota": "4.5", "periodo": "1"},
+                {"estudiante": "Luis", "nota": "3.8", "periodo": "2"}]
+        DynamicContentProcessor(doc).expand_dynamic_tables({"notas": rows})
+        
+        assert len(table.rows) == 2
+        second = table.rows[1].cells[0]
+        runs = second.paragraphs[0].runs
+        assert [r.text for r in runs] == ["Luis", "", ": ", "3.8"]
+        assert runs[3].italic
+        assert second.paragraphs[1].text == "Periodo 2"
+
+    def test_expand_several_row_groups_per_table(self):
+        """Test every templated row of a table is expanded."""
+        doc = Document()
+        table = doc.add_table(rows=4, cols=1)
+        table.rows[0].cells[0].text = "Responsables"
+        table.rows[1].cells[0].text = "{{responsables.nombre}}"
+        table.rows[2].cells[0].text = "Dispositivos"
+        table.rows[3].cells[0].text = "{{equipos.serial}}"
+        other = doc.add_table(rows=1, cols=1)
+        other.rows[0].cells[0].text = "{{equipos.serial}}"
+        
+        data = {
+            "responsables": [{"nombre": "Ana"}, {"nombre": "Luis"}],
+            "equipos": [{"serial": "A1"}, {"serial": "B2"}, {"serial": "C3"}],
+            "titulo": "Informe",
+        }
+        assert DynamicContentProcessor(doc).expand_dynamic_tables(data) == 2
+        
+        assert [r.cells[0].text for r in table.rows] == [
+            "Responsables", "Ana", "Luis", "Dispositivos", "A1", "B2", "C3"
+        ]
+        assert [r.cells[0].text for r in other.rows] == ["A1", "B2", "C3"]
+
 
 class TestReportGeneration:
     """Tests for report generation with dynamic content."""
@@ -177,6 +265,46 @@ class TestReportGeneration:
         assert result is True
 
 
+class TestJSONLStreaming:
+    """Tests for JSONL streaming generation."""
+    
+    def test_iter_jsonl_skips_blank_and_flags_invalid(self):
+        """Invalid lines yield None without stopping the stream."""
+        stream = io.StringIO('{"a": 1}\n\n{malo\n{"a": 2}\n')
+        records = list(iter_jsonl_records(stream))
+        assert records == [(1, {"a": 1}), (3, None), (4, {"a": 2})]
+    
+    def test_generate_one_report_per_record(self, tmp_path):
+        """Each record is rendered to its own output path."""
+        template = Path('templates/plantilla_desempeno.docx')
+        if not template.exists():
+            pytest.skip("Template not found")
+        
+        lines = [json.dumps({"documento": f"D{i}", "nombre_establecimiento": f"H{i}"})
+                 for i in range(3)]
+        stream = io.StringIO('\n'.join(lines + ['[1]']))
+        generated, failed = generate_reports_from_stream(
+            str(template), iter_jsonl_records(stream), str(tmp_path / '{documento}.docx')
+        )
+        
+        assert (generated, failed) == (3, 1)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['D0.docx', 'D1.docx', 'D2.docx']
+    
+    def test_pattern_without_fields_numbers_outputs(self, tmp_path):
+        """A fixed output path gets the record number; a record 'n' cannot override it."""
+        template = Path('templates/plantilla_desempeno.docx')
+        if not template.exists():
+            pytest.skip("Template not found")
+        
+        stream = io.StringIO('{"n": 9}\n{"n": 9}\n')
+        generated, failed = generate_reports_from_stream(
+            str(template), iter_jsonl_records(stream), str(tmp_path / 'out.docx')
+        )
+        
+        assert (generated, failed) == (2, 0)
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['out_1.docx', 'out_2.docx']
+
+
 class TestBackwardCompatibility:
     """Tests for backward compatibility with existing placeholders."""
     
@@ -0,0 +1,116 @@
+"""
+Tests para los endpoints de la API REST
+"""
+import sys
+import os
+import io
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from docx import Document
+from fastapi.testclient import TestClient
+
+from core.compiled_template import CompiledTemplateCache
+from core.document_processor import DocumentProcessor
+from utils.config import CONFIG_ENV_VAR
+
+
+@pytest.fixture(scope='module')
+def rest_server(tmp_path_factory):
+    """Importa el servidor con el spool de trabajos en un directorio temporal"""
+    base = tmp_path_factory.mktemp('api')
+    config_path = base / 'settings.yaml'
+    config_path.write_text(
+        f"processing:\n  job_spool_dir: '{(base / 'jobs').as_posix()}'\n",
+        encoding='utf-8'
+    )
+    previous = os.environ.get(CONFIG_ENV_VAR)
+    os.environ[CONFIG_ENV_VAR] = str(config_path)
+    try:
+        from api import rest_server
+    finally:
+        if previous is None:
+            os.environ.pop(CONFIG_ENV_VAR, None)
+        else:
+            os.environ[CONFIG_ENV_VAR] = previous
+    return rest_server
+
+
+@pytest.fixture
+def client(rest_server, monkeypatch):
+    monkeypatch.setattr(rest_server, 'TEMPLATE_CACHE', CompiledTemplateCache())
+    return TestClient(rest_server.app)
+
+
+@pytest.fixture
+def template_bytes():
+    doc = Document()
+    doc.add_paragraph('Nombre: {{nombre}}')
+    doc.sections[0].footer.paragraphs[0].text = '© {{empresa}}'
+    output = io.BytesIO()
+    doc.save(output)
+    return output.getvalue()
+
+
+def replace(client, blob, data, **fields):
+    return client.post(
+        "/document/placeholders/replace",
+        files={"file": ("plantilla.docx", blob)},
+        data={"data": json.dumps(data), **fields}
+    )
+
+
+class TestReplacePlaceholders:
+    """Tests para /document/placeholders/replace"""
+
+    def test_replaces_placeholders(self, client, template_bytes):
+        response = replace(client, template_bytes, {'nombre': 'Ana', 'empresa': 'Acme'})
+
+        assert response.status_code == 200
+        assert response.headers['X-Replacements-Count'] == '2'
+        doc = Document(io.BytesIO(response.content))
+        assert doc.paragraphs[0].text == 'Nombre: Ana'
+        assert doc.sections[0].footer.paragraphs[0].text == '© Acme'
+
+    def test_repeated_template_hits_cache(self, client, template_bytes):
+        replace(client, template_bytes, {'nombre': 'Ana'})
+        response = replace(client, template_bytes, {'nombre': 'Luis'})
+
+        assert Document(io.BytesIO(response.content)).paragraphs[0].text == 'Nombre: Luis'
+        stats = client.get("/metrics").json()['template_cache']
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_without_preserve_format(self, client, template_bytes):
+        response = replace(client, template_bytes, {'nombre': 'Ana'}, preserve_format='false')
+
+        assert response.status_code == 200
+        assert Document(io.BytesIO(response.content)).paragraphs[0].text == 'Nombre: Ana'
+        assert client.get("/metrics").json()['template_cache']['misses'] == 0
+
+    def test_invalid_data(self, client, template_bytes):
+        response = client.post(
+            "/document/placeholders/replace",
+            files={"file": ("plantilla.docx", template_bytes)},
+            data={"data": "no es json"}
+        )
+        assert response.status_code == 400
+
+
+class TestUploadLimits:
+    """Tests para los límites de tamaño en los endpoints"""
+
+    def test_oversize_stream_returns_413(self, client, template_bytes, monkeypatch):
+        monkeypatch.setattr(DocumentProcessor, 'MAX_FILE_SIZE', len(template_bytes) // 2)
+        response = client.post(
+            "/document/upload", files={"file": ("plantilla.docx", template_bytes)}
+        )
+        assert response.status_code == 413
+
+    def test_job_upload_has_its_own_limit(self, rest_server, monkeypatch):
+        monkeypatch.setattr(rest_server, 'MAX_JOB_UPLOAD_SIZE', 1024 * 1024)
+        limit = rest_server.request_size_limit('/jobs/batch')
+        assert limit == 1024 * 1024 + rest_server.MULTIPART_OVERHEAD
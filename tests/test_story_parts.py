@@ -0,0 +1,116 @@
+"""
+Tests para el recorrido de partes de header/footer
+"""
+import sys
+import os
+import io
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from docx import Document
+
+from core.footer_editor import FooterEditor
+from core.placeholder_engine import PlaceholderEngine
+from core.story_parts import iter_header_footer_parts, resolve_header_footer
+
+
+@pytest.fixture
+def linked_document():
+    """Documento de 5 secciones: la 0 y la 3 definen footer, el resto vincula"""
+    doc = Document()
+    for _ in range(4):
+        doc.add_section()
+    doc.sections[0].footer.paragraphs[0].text = "Pie {{curso}}"
+    doc.sections[3].footer.is_linked_to_previous = False
+    doc.sections[3].footer.paragraphs[0].text = "Anexo {{curso}}"
+    return doc
+
+
+def test_each_part_visited_once(linked_document):
+    parts = list(iter_header_footer_parts(linked_document))
+    assert [(p.location, p.section_idx) for p in parts] == [('footers', 0), ('footers', 3)]
+
+
+def test_reading_does_not_create_headers(linked_document):
+    list(iter_header_footer_parts(linked_document))
+    assert all(s.header.is_linked_to_previous for s in linked_document.sections)
+
+
+def test_resolve_linked_section(linked_document):
+    assert resolve_header_footer(linked_document, 2, 'footers').section_idx == 0
+    assert resolve_header_footer(linked_document, 4, 'footers').section_idx == 3
+    assert resolve_header_footer(linked_document, 4, 'headers') is None
+
+
+def test_apply_footer_rewrites_each_part_once(linked_document, monkeypatch):
+    editor = FooterEditor(linked_document)
+    calls = []
+    original = editor._write_footer_text
+
+    def record(footer, *args):
+        calls.append(footer)
+        original(footer, *args)
+
+    monkeypatch.setattr(editor, '_write_footer_text', record)
+
+    assert editor.apply_to_all_sections("Nuevo pie") == 5
+    assert len(calls) == 2
+    assert all(s.footer.paragraphs[0].text == "Nuevo pie" for s in linked_document.sections)
+
+
+def test_apply_footer_creates_missing_footer():
+    doc = Document()
+    FooterEditor(doc).apply_to_all_sections("Pie")
+
+    output = io.BytesIO()
+    doc.save(output)
+    assert Document(output).sections[0].footer.paragraphs[0].text == "Pie"
+
+
+def test_placeholders_in_shared_footer(linked_document):
+    engine = PlaceholderEngine(linked_document)
+    assert len(engine.get_index()['curso']) == 2
+
+    assert engine.replace_all({'curso': '5A'}) == 2
+    assert linked_document.sections[1].footer.paragraphs[0].text == "Pie 5A"
+    assert linked_document.sections[4].footer.paragraphs[0].text == "Anexo 5A"
+
+
+@pytest.fixture
+def variant_document():
+    """Documento con header de primera página y footer de páginas pares"""
+    doc = Document()
+    doc.sections[0].different_first_page_header_footer = True
+    doc.settings.odd_and_even_pages_header_footer = True
+    doc.sections[0].first_page_header.paragraphs[0].text = "Portada {{curso}}"
+    doc.sections[0].even_page_footer.paragraphs[0].text = "Par {{curso}}"
+    doc.sections[0].footer.paragraphs[0].text = "Impar"
+    return doc
+
+
+def test_variants_are_covered(variant_document):
+    engine = PlaceholderEngine(variant_document)
+    assert engine.replace_all({'curso': '5A'}) == 2
+
+    section = variant_document.sections[0]
+    assert section.first_page_header.paragraphs[0].text == "Portada 5A"
+    assert section.even_page_footer.paragraphs[0].text == "Par 5A"
+
+
+def test_apply_footer_includes_variants(variant_document):
+    FooterEditor(variant_document).apply_to_all_sections("Pie")
+
+    section = variant_document.sections[0]
+    assert section.footer.paragraphs[0].text == "Pie"
+    assert section.even_page_footer.paragraphs[0].text == "Pie"
+    assert section.first_page_footer.is_linked_to_previous
+
+
+def test_reading_footer_variants_does_not_create_parts(variant_document):
+    editor = FooterEditor(variant_document)
+    assert editor.get_footer_text(variant='even_page') == "Par {{curso}}"
+    assert editor.get_footer_text(variant='first_page') == ""
+
+    assert variant_document.sections[0].first_page_footer.is_linked_to_previous
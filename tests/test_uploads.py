@@ -0,0 +1,95 @@
+"""
+Tests para los límites de tamaño de uploads
+"""
+import sys
+import os
+import io
+import hashlib
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from api.uploads import UploadLimitMiddleware, copy_limited, read_fingerprinted
+from core.document_processor import DocumentProcessor
+from utils.exceptions import FileSizeExceededError
+
+LIMIT = 64 * 1024
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, limit_for_path=lambda path: LIMIT)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+
+class TestUploadLimitMiddleware:
+    """Tests para UploadLimitMiddleware"""
+
+    def test_accepts_small_upload(self, client):
+        response = client.post("/upload", files={"file": ("a.docx", b"x" * 100)})
+        assert response.status_code == 200
+        assert response.json() == {"size": 100}
+
+    def test_rejects_by_content_length(self, client):
+        response = client.post("/upload", files={"file": ("a.docx", b"x" * (LIMIT + 1))})
+        assert response.status_code == 413
+
+    def test_rejects_malformed_content_length(self, client):
+        response = client.post(
+            "/upload",
+            content=b"x" * 10,
+            headers={
+                "content-type": "multipart/form-data; boundary=limite",
+                "content-length": "diez"
+            }
+        )
+        assert response.status_code == 400
+
+    def test_rejects_streamed_body_without_content_length(self, client):
+        def body():
+            for _ in range(100):
+                yield b"x" * 8192
+
+        response = client.post(
+            "/upload",
+            content=body(),
+            headers={"content-type": "multipart/form-data; boundary=limite"}
+        )
+        assert response.status_code == 413
+
+
+class TestStreamLimits:
+    """Tests para la lectura por bloques con límite"""
+
+    def test_copy_limited(self):
+        target = io.BytesIO()
+        assert copy_limited(io.BytesIO(b"abc" * 10), target, 100, 4) == 30
+        assert target.getvalue() == b"abc" * 10
+
+    def test_copy_limited_stops_early(self):
+        source = io.BytesIO(b"x" * 1000)
+        with pytest.raises(FileSizeExceededError):
+            copy_limited(source, io.BytesIO(), 100, 16)
+        assert source.tell() < 1000
+
+    def test_processor_stream_limit(self, monkeypatch):
+        monkeypatch.setattr(DocumentProcessor, 'MAX_FILE_SIZE', 100)
+        source = io.BytesIO(b"x" * 1000)
+        with pytest.raises(FileSizeExceededError):
+            DocumentProcessor(source, chunk_size=16)
+        assert source.tell() < 1000
+
+    def test_read_fingerprinted(self):
+        blob, fingerprint = read_fingerprinted(io.BytesIO(b"abc" * 10), 100, 7)
+        assert blob == b"abc" * 10
+        assert fingerprint == hashlib.sha256(b"abc" * 10).hexdigest()
@@ -0,0 +1,86 @@
+"""
+Tests para XmlPlaceholderEngine
+"""
+import sys
+import os
+import io
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from docx import Document
+from core.placeholder_engine import PlaceholderEngine
+from core.xml_engine import XmlPlaceholderEngine
+
+
+DATA = {'nombre': 'Ana', 'cliente': 'Acme', 'empresa': 'TechCorp'}
+
+
+@pytest.fixture
+def docx_bytes():
+    """Documento con placeholders en body (uno partido), tabla, header y footer"""
+    doc = Document()
+    para = doc.add_paragraph('Hola {{nom')
+    para.add_run('bre}}').bold = True
+    table = doc.add_table(rows=1, cols=1)
+    table.cell(0, 0).text = 'Cliente: {{cliente}}'
+    doc.sections[0].header.add_paragraph('{{empresa}} - {{faltante}}')
+    doc.sections[0].footer.add_paragraph('© {{empresa}}')
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _texts(blob):
+    doc = Document(io.BytesIO(blob))
+    section = doc.sections[0]
+    return (
+        [p.text for p in doc.paragraphs],
+        doc.tables[0].cell(0, 0).text,
+        [p.text for p in section.header.paragraphs],
+        [p.text for p in section.footer.paragraphs],
+    )
+
+
+class TestXmlPlaceholderEngine:
+    """Tests para el motor lxml directo"""
+
+    def test_find_all_placeholders(self, docx_bytes):
+        engine = XmlPlaceholderEngine(docx_bytes)
+        assert engine.find_all_placeholders() == set(DATA) | {'faltante'}
+
+    def test_same_result_as_docx_engine(self, docx_bytes):
+        engine = XmlPlaceholderEngine(docx_bytes)
+        count = engine.replace_all(DATA)
+
+        doc = Document(io.BytesIO(docx_bytes))
+        expected = PlaceholderEngine(doc).replace_all(DATA)
+        reference = io.BytesIO()
+        doc.save(reference)
+
+        assert count == expected == 4
+        assert _texts(engine.to_bytes()) == _texts(reference.getvalue())
+
+    def test_absolute_relationship_targets(self, docx_bytes):
+        rels_name = 'word/_rels/document.xml.rels'
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(docx_bytes)) as source, \
+                zipfile.ZipFile(buffer, 'w') as target:
+            for info in source.infolist():
+                blob = source.read(info)
+                if info.filename == rels_name:
+                    blob = blob.replace(b'Target="header', b'Target="/word/header')
+                    blob = blob.replace(b'Target="footer', b'Target="/word/footer')
+                target.writestr(info, blob)
+
+        engine = XmlPlaceholderEngine(buffer.getvalue())
+        assert 'word/header1.xml' in engine.parts
+        assert 'word/footer1.xml' in engine.parts
+        assert engine.replace_all(DATA) == 4
+
+    def test_strict_missing(self, docx_bytes):
+        engine = XmlPlaceholderEngine(docx_bytes)
+        with pytest.raises(ValueError, match="sin datos"):
+            engine.replace_all(DATA, strict=True)